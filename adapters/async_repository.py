@@ -0,0 +1,235 @@
+"""
+asyncio counterparts of the repositories, used by the ASGI entry point.
+Statements are built by the same functions as the synchronous
+SqlAlchemyRepository, so both issue identical SQL.
+"""
+
+from abc import ABC, abstractmethod
+from typing import Generic, List, Optional, Type
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from adapters.repository import (
+    LoadOptions,
+    T,
+    bulk_update_statement,
+    delete_statement,
+    document_statement,
+    insert_statement,
+    loader_options,
+    version_statement,
+)
+
+
+class AbstractAsyncRepository(ABC, Generic[T]):
+    """Abstract asyncio Repository, see AbstractRepository."""
+
+    @abstractmethod
+    async def add(self, entity: T) -> T:
+        """Add a new entity to the repository."""
+        ...
+
+    @abstractmethod
+    async def add_all(self, entities: List[T]) -> List[T]:
+        """Add several new entities at once and return them as stored."""
+        ...
+
+    @abstractmethod
+    async def get_by_id(
+        self, entity_id: int, load: Optional[LoadOptions] = None
+    ) -> Optional[T]:
+        """Retrieve an entity by its ID."""
+        ...
+
+    @abstractmethod
+    async def get_all(self, load: Optional[LoadOptions] = None) -> List[T]:
+        """Retrieve all entities from the repository."""
+        ...
+
+    @abstractmethod
+    async def get_page(
+        self,
+        limit: int,
+        after: Optional[int] = None,
+        load: Optional[LoadOptions] = None,
+        **filters,
+    ) -> List[T]:
+        """
+        Retrieve up to `limit` entities ordered by ID, starting after the
+        `after` cursor and matching the given column filters.
+        """
+        ...
+
+    @abstractmethod
+    async def find_by(
+        self, load: Optional[LoadOptions] = None, **filters
+    ) -> List[T]:
+        """Retrieve all entities matching the given column filters, by ID."""
+        ...
+
+    @abstractmethod
+    async def get_json(self, entity_id: int) -> Optional[bytes]:
+        """
+        Retrieve an entity, with its child collections, as an encoded JSON
+        document matching its `to_dict`. None if not found.
+        """
+        ...
+
+    @abstractmethod
+    async def get_version(self, entity_id: int) -> Optional[tuple]:
+        """
+        Cheap fingerprint of an entity and its child collections that
+        changes whenever any of them is modified. None if not found.
+        """
+        ...
+
+    @abstractmethod
+    async def update(self, entity: T) -> T:
+        """Update an existing entity in the repository."""
+        ...
+
+    @abstractmethod
+    async def bulk_update(
+        self, values: dict, ids: Optional[List[int]] = None, **filters
+    ) -> List[T]:
+        """
+        Set `values` on every entity matching `ids` (when given) and the
+        column filters. Returns the updated entities.
+        """
+        ...
+
+    @abstractmethod
+    async def delete_by_id(self, entity_id: int) -> bool:
+        """Delete an entity by its ID. Returns True if successful."""
+        ...
+
+
+class AsyncSqlAlchemyRepository(AbstractAsyncRepository[T]):
+    """
+    SQLAlchemy repository implementation on an AsyncSession.
+
+    Lazy loading cannot run under asyncio, so relationships that are read
+    must be loaded through `load` (e.g. {"grocery_items": "selectin"}).
+    """
+
+    def __init__(
+        self,
+        session: AsyncSession,
+        model_class: Type[T],
+        load: Optional[LoadOptions] = None,
+        raise_on_lazy_load: bool = False,
+    ):
+        self.session = session
+        self.model_class = model_class
+        self.load = load or {}
+        self.raise_on_lazy_load = raise_on_lazy_load
+
+    def _select(self, load: Optional[LoadOptions] = None):
+        """Build a SELECT for the model with the loading options applied."""
+        options = loader_options(
+            self.model_class,
+            {**self.load, **(load or {})},
+            self.raise_on_lazy_load,
+        )
+        return select(self.model_class).options(*options)
+
+    async def add(self, entity: T) -> T:
+        """Add a new entity to the repository."""
+        self.session.add(entity)
+        await self.session.flush()  # populate entity.id immediately
+        return entity
+
+    async def add_all(self, entities: List[T]) -> List[T]:
+        """
+        Add several new entities with a single multi-row
+        INSERT ... RETURNING and return the stored entities, in input order.
+        """
+        if not entities:
+            return []
+        statement, rows = insert_statement(self.model_class, entities)
+        return list(await self.session.scalars(statement, rows))
+
+    async def get_by_id(
+        self, entity_id: int, load: Optional[LoadOptions] = None
+    ) -> Optional[T]:
+        """Retrieve an entity by its ID."""
+        result = await self.session.scalars(
+            self._select(load).filter_by(id=entity_id)
+        )
+        return result.first()
+
+    async def get_all(self, load: Optional[LoadOptions] = None) -> List[T]:
+        """Retrieve all entities from the repository."""
+        return list(await self.session.scalars(self._select(load)))
+
+    async def get_page(
+        self,
+        limit: int,
+        after: Optional[int] = None,
+        load: Optional[LoadOptions] = None,
+        **filters,
+    ) -> List[T]:
+        """
+        Retrieve up to `limit` entities ordered by ID, starting after the
+        `after` cursor and matching the given column filters.
+        """
+        statement = self._select(load).filter_by(**filters)
+        if after is not None:
+            statement = statement.where(self.model_class.id > after)
+        statement = statement.order_by(self.model_class.id).limit(limit)
+        return list(await self.session.scalars(statement))
+
+    async def find_by(
+        self, load: Optional[LoadOptions] = None, **filters
+    ) -> List[T]:
+        """Retrieve all entities matching the given column filters, by ID."""
+        statement = (
+            self._select(load)
+            .filter_by(**filters)
+            .order_by(self.model_class.id)
+        )
+        return list(await self.session.scalars(statement))
+
+    async def get_json(self, entity_id: int) -> Optional[bytes]:
+        """
+        Retrieve an entity, with its child collections, as an encoded JSON
+        document built by the database in one query.
+        """
+        document = await self.session.scalar(
+            document_statement(self.model_class, entity_id)
+        )
+        return document.encode() if document is not None else None
+
+    async def get_version(self, entity_id: int) -> Optional[tuple]:
+        """Fingerprint of an entity, see SqlAlchemyRepository.get_version."""
+        result = await self.session.execute(
+            version_statement(self.model_class, entity_id)
+        )
+        version = result.first()
+        return tuple(version) if version is not None else None
+
+    async def update(self, entity: T) -> T:
+        """Update an existing entity in the repository."""
+        await self.session.merge(entity)
+        return entity
+
+    async def bulk_update(
+        self, values: dict, ids: Optional[List[int]] = None, **filters
+    ) -> List[T]:
+        """
+        Set `values` on every entity matching `ids` (when given) and the
+        column filters with a single UPDATE ... RETURNING.
+        Returns the updated entities.
+        """
+        statement = bulk_update_statement(
+            self.model_class, values, ids, filters
+        )
+        return list(await self.session.scalars(statement))
+
+    async def delete_by_id(self, entity_id: int) -> bool:
+        """Delete an entity by its ID. Returns True if successful."""
+        result = await self.session.execute(
+            delete_statement(self.model_class, entity_id)
+        )
+        return result.first() is not None
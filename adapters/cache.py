@@ -0,0 +1,418 @@
+"""
+In-memory entity cache used by CachedRepository, with optional
+cross-process invalidation so several workers stay coherent.
+"""
+
+import logging
+import select
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Message published to invalidate every entry of a cache
+INVALIDATE_ALL = "*"
+
+# Invalidation counters of an EntityCache, striped over a fixed number of
+# slots so they take bounded memory; keys sharing a slot only cost each
+# other a dropped set()
+GENERATION_SLOTS = 1024
+
+
+class InvalidationChannel(ABC):
+    """Broadcasts cache invalidations to every subscribed cache."""
+
+    @abstractmethod
+    def publish(self, key: str) -> None:
+        """Broadcast that the entry stored under `key` is stale."""
+        ...
+
+    @abstractmethod
+    def subscribe(self, callback: Callable[[str], None]) -> None:
+        """Call `callback` with every key published on the channel."""
+        ...
+
+    def reset_after_fork(self) -> None:
+        """Recreate per-process resources in a forked child process."""
+
+
+class InProcessInvalidationChannel(InvalidationChannel):
+    """Invalidation channel shared by the caches of a single process."""
+
+    def __init__(self):
+        self._subscribers: List[Callable[[str], None]] = []
+
+    def publish(self, key: str) -> None:
+        for callback in list(self._subscribers):
+            callback(key)
+
+    def subscribe(self, callback: Callable[[str], None]) -> None:
+        self._subscribers.append(callback)
+
+
+class PostgresInvalidationChannel(InvalidationChannel):
+    """
+    Invalidation channel built on PostgreSQL LISTEN/NOTIFY, so every worker
+    process connected to the same database drops stale entries.
+    A daemon thread holds a dedicated connection that LISTENs on the channel
+    and reconnects after errors.
+    """
+
+    def __init__(
+        self,
+        dsn: str,
+        channel: str = "grocery_cache_invalidation",
+        poll_timeout: float = 5.0,
+    ):
+        self.dsn = dsn
+        self.channel = channel
+        self.poll_timeout = poll_timeout
+        self._subscribers: List[Callable[[str], None]] = []
+        self._publish_connection = None
+        self._publish_lock = threading.Lock()
+        self._listener: Optional[threading.Thread] = None
+
+    def _connect(self):
+        import psycopg2
+
+        connection = psycopg2.connect(self.dsn)
+        connection.autocommit = True
+        return connection
+
+    def publish(self, key: str) -> None:
+        with self._publish_lock:
+            try:
+                if (
+                    self._publish_connection is None
+                    or self._publish_connection.closed
+                ):
+                    self._publish_connection = self._connect()
+                with self._publish_connection.cursor() as cursor:
+                    cursor.execute(
+                        "SELECT pg_notify(%s, %s)", (self.channel, key)
+                    )
+            except Exception:
+                # Other workers fall back to the cache TTL
+                logger.exception("Failed to publish cache invalidation")
+                self._publish_connection = None
+
+    def subscribe(self, callback: Callable[[str], None]) -> None:
+        self._subscribers.append(callback)
+        if self._listener is None:
+            self._start_listener()
+
+    def reset_after_fork(self) -> None:
+        """
+        Threads and sockets are not shared with a forked child: forget the
+        parent's connections (without closing them) and start a listener.
+        """
+        self._publish_connection = None
+        self._publish_lock = threading.Lock()
+        self._listener = None
+        if self._subscribers:
+            self._start_listener()
+
+    def _start_listener(self) -> None:
+        self._listener = threading.Thread(
+            target=self._listen, name="cache-invalidation", daemon=True
+        )
+        self._listener.start()
+
+    def _listen(self) -> None:
+        while True:
+            try:
+                connection = self._connect()
+                with connection.cursor() as cursor:
+                    cursor.execute(f'LISTEN "{self.channel}"')
+                # Entries may have gone stale while disconnected
+                self._dispatch(INVALIDATE_ALL)
+                while True:
+                    readable, _, _ = select.select(
+                        [connection], [], [], self.poll_timeout
+                    )
+                    if not readable:
+                        continue
+                    connection.poll()
+                    while connection.notifies:
+                        notify = connection.notifies.pop(0)
+                        self._dispatch(notify.payload)
+            except Exception:
+                logger.exception("Cache invalidation listener failed")
+                time.sleep(1)
+
+    def _dispatch(self, key: str) -> None:
+        for callback in list(self._subscribers):
+            callback(key)
+
+
+class EntityCache:
+    """
+    Thread-safe LRU cache with a per-entry time to live.
+    A `maxsize` of 0 disables caching. When an invalidation channel is
+    given, invalidations are broadcast to (and received from) other caches
+    sharing the channel under the same `namespace`.
+
+    Readers that load a value to cache take a `generation` token first and
+    pass it to `set`, which drops the value if the key was invalidated in
+    the meantime: the value may have been read before the write that the
+    invalidation announced.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: float = 30.0,
+        channel: Optional[InvalidationChannel] = None,
+        namespace: str = "default",
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.channel = channel
+        self.namespace = namespace
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._generations = [0] * GENERATION_SLOTS
+        self._epoch = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._listeners: List[Callable[[Hashable], None]] = []
+        if channel is not None:
+            channel.subscribe(self._on_invalidation)
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for `key`, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at <= self._clock():
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def generation(self, key: Hashable) -> tuple:
+        """Token that changes whenever `key` is invalidated."""
+        with self._lock:
+            return self._generation(key)
+
+    def set(
+        self, key: Hashable, value: Any, generation: Optional[tuple] = None
+    ) -> None:
+        """
+        Store `value` under `key`, evicting the least recently used entry.
+        Nothing is stored if `generation` is given and `key` has been
+        invalidated since it was taken.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            if generation is not None and generation != self._generation(key):
+                return
+            self._entries[key] = (value, self._clock() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop `key` here and in every cache sharing the channel."""
+        self.discard(key)
+        if self.channel is not None:
+            self.channel.publish(f"{self.namespace}:{key}")
+
+    def clear(self) -> None:
+        """Drop every entry here and in every cache sharing the channel."""
+        self.discard_all()
+        if self.channel is not None:
+            self.channel.publish(f"{self.namespace}:{INVALIDATE_ALL}")
+
+    def discard(self, key: Hashable) -> None:
+        """Drop `key` from this cache only, without publishing it."""
+        with self._lock:
+            self._entries.pop(key, None)
+            self._generations[hash(key) % GENERATION_SLOTS] += 1
+        for callback in self._listeners:
+            callback(key)
+
+    def discard_all(self) -> None:
+        """Drop every entry of this cache only, without publishing it."""
+        with self._lock:
+            self._entries.clear()
+            self._epoch += 1
+        for callback in self._listeners:
+            callback(INVALIDATE_ALL)
+
+    def stats(self) -> dict:
+        """Hit, miss and eviction counters plus the current size."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+            }
+
+    def add_listener(self, callback: Callable[[Hashable], None]) -> None:
+        """
+        Call `callback` with the key of every invalidated entry, whether
+        invalidated here or through the channel (INVALIDATE_ALL when every
+        entry is dropped).
+        """
+        self._listeners.append(callback)
+
+    def reset_after_fork(self) -> None:
+        """
+        Recreate the lock, which another thread may have held at fork time,
+        and the channel's per-process resources.
+        """
+        self._lock = threading.Lock()
+        if self.channel is not None:
+            self.channel.reset_after_fork()
+
+    def _generation(self, key: Hashable) -> tuple:
+        return self._epoch, self._generations[hash(key) % GENERATION_SLOTS]
+
+    def _on_invalidation(self, message: str) -> None:
+        if message == INVALIDATE_ALL:
+            self.discard_all()
+            return
+        namespace, _, key = message.partition(":")
+        if namespace != self.namespace:
+            return
+        if key == INVALIDATE_ALL:
+            self.discard_all()
+        else:
+            # Keys travel as strings; entity caches are keyed by integer IDs
+            self.discard(int(key) if key.isdigit() else key)
+
+
+class _Call:
+    """A computation shared by the callers of one SingleFlight key."""
+
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Runs concurrent calls for the same key once: the first caller computes
+    the value and the others wait for it and get the same result (or
+    exception). A successful result is also reused for `window` seconds
+    after it is computed, so requests arriving just after one another are
+    coalesced too; 0 only shares calls in flight.
+
+    Keys are tuples whose first element is the entity they are read from.
+    `forget` drops the in-flight calls and recent results of an entity, so
+    callers arriving after a write this process is told about never get a
+    value computed before it; callers already waiting still get the value
+    they joined. Writes made in other processes are only seen once they
+    are forgotten through a shared invalidation channel, or once `window`
+    has passed.
+    """
+
+    def __init__(
+        self,
+        window: float = 0.05,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.window = window
+        self._clock = clock
+        self._in_flight: dict = {}
+        # Results by key, in the order they expire
+        self._recent: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.shared = 0
+
+    def do(self, key: tuple, compute: Callable[[], Any]) -> Any:
+        """Return `compute()`, or the result of an identical call."""
+        with self._lock:
+            self._expire()
+            recent = self._recent.get(key)
+            if recent is not None:
+                self.shared += 1
+                return recent[0]
+            call = self._in_flight.get(key)
+            if call is None:
+                call = self._in_flight[key] = _Call()
+                self.calls += 1
+                is_leader = True
+            else:
+                self.shared += 1
+                is_leader = False
+
+        if not is_leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = compute()
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                # Unless forgotten meanwhile, the result is still current
+                if self._in_flight.get(key) is call:
+                    del self._in_flight[key]
+                    if call.error is None and self.window > 0:
+                        self._recent[key] = (
+                            call.result,
+                            self._clock() + self.window,
+                        )
+            call.done.set()
+        return call.result
+
+    def _expire(self) -> None:
+        now = self._clock()
+        while self._recent:
+            key, (_, expires_at) = next(iter(self._recent.items()))
+            if expires_at > now:
+                return
+            del self._recent[key]
+
+    def forget(self, entity_key: Hashable) -> None:
+        """Drop the calls of one entity, or all of them (INVALIDATE_ALL)."""
+        with self._lock:
+            if entity_key == INVALIDATE_ALL:
+                self._in_flight.clear()
+                self._recent.clear()
+                return
+            for calls in (self._in_flight, self._recent):
+                for key in [key for key in calls if key[0] == entity_key]:
+                    del calls[key]
+
+    def stats(self) -> dict:
+        """Computed and shared call counters."""
+        with self._lock:
+            return {"calls": self.calls, "shared": self.shared}
+
+    def reset_after_fork(self) -> None:
+        """
+        Forget the parent's calls, whose leaders do not exist in a forked
+        child, and recreate the lock.
+        """
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self._recent = OrderedDict()
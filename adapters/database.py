@@ -0,0 +1,186 @@
+"""
+Engine and connection pool setup driven by config.DatabaseConfig, plus live
+pool statistics so an exhausted pool shows up instead of requests queueing
+silently.
+"""
+
+import logging
+import threading
+import time
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+
+from config import DatabaseConfig
+
+logger = logging.getLogger(__name__)
+
+
+class CheckoutTimingMixin:
+    """
+    Records how long pool checkouts wait for a connection, including the
+    time to open one when the pool grows, and keeps the configured
+    `max_overflow`, which QueuePool does not expose.
+    """
+
+    # wait_warning is not keyword-only so create_engine() forwards it
+    def __init__(
+        self,
+        creator,
+        wait_warning: float = 0.1,
+        max_overflow: int = 10,
+        **kwargs,
+    ):
+        super().__init__(creator, max_overflow=max_overflow, **kwargs)
+        self.wait_warning = wait_warning
+        self.max_overflow = max_overflow
+        self._stats_lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            with self._stats_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            self._record_wait(time.perf_counter() - start)
+
+    def _record_wait(self, wait: float) -> None:
+        with self._stats_lock:
+            self.checkouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+        if wait > self.wait_warning:
+            logger.warning(
+                "Waited %.3fs for a database connection (%s)",
+                wait,
+                self.status(),
+            )
+
+    def recreate(self):
+        # Keep the wait warning when the engine is disposed and recreates
+        # its pool (e.g. after a fork)
+        pool = super().recreate()
+        pool.wait_warning = self.wait_warning
+        return pool
+
+
+class TimedQueuePool(CheckoutTimingMixin, QueuePool):
+    """QueuePool recording checkout wait times."""
+
+
+class TimedAsyncQueuePool(CheckoutTimingMixin, AsyncAdaptedQueuePool):
+    """Pool of asyncio engines recording checkout wait times."""
+
+
+# Drivers used by the asyncio engine, per database backend
+ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+
+def async_database_uri(uri: str) -> str:
+    """The database URI with the backend's asyncio driver."""
+    url = make_url(uri)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No asyncio driver configured for {backend}")
+    return url.set(
+        drivername=f"{backend}+{ASYNC_DRIVERS[backend]}"
+    ).render_as_string(hide_password=False)
+
+
+def engine_options(config: DatabaseConfig) -> dict:
+    """Keyword arguments for create_engine built from the configuration."""
+    url = make_url(config.uri)
+    if url.get_backend_name() != "postgresql":
+        # Pool settings and connect arguments are PostgreSQL specific;
+        # SQLite (tests, local benchmarks) keeps SQLAlchemy's defaults
+        return {"pool_pre_ping": config.pool_pre_ping}
+
+    is_asyncpg = url.get_driver_name() == "asyncpg"
+    server_settings = {"application_name": config.application_name}
+    if config.pgbouncer:
+        if is_asyncpg:
+            # Prepared statements do not survive transaction pooling
+            connect_args = {
+                "server_settings": server_settings,
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+            }
+        else:
+            connect_args = server_settings
+        # PgBouncer pools the connections; holding idle ones here as well
+        # would pin server connections to this process
+        return {"poolclass": NullPool, "connect_args": connect_args}
+
+    # Session-level settings sent once per connection at startup
+    if is_asyncpg:
+        if config.statement_timeout:
+            server_settings["statement_timeout"] = str(
+                config.statement_timeout
+            )
+        connect_args = {"server_settings": server_settings}
+    else:
+        connect_args = server_settings
+        if config.statement_timeout:
+            connect_args["options"] = (
+                f"-c statement_timeout={config.statement_timeout}"
+            )
+    return {
+        "poolclass": TimedAsyncQueuePool if is_asyncpg else TimedQueuePool,
+        "pool_size": config.pool_size,
+        "max_overflow": config.max_overflow,
+        "pool_timeout": config.pool_timeout,
+        "pool_pre_ping": config.pool_pre_ping,
+        "pool_recycle": config.pool_recycle,
+        "wait_warning": config.pool_wait_warning,
+        "connect_args": connect_args,
+    }
+
+
+def install_engine_events(engine: Engine, config: DatabaseConfig) -> None:
+    """Register per-transaction settings that cannot be set at connect."""
+    if not (config.pgbouncer and config.statement_timeout):
+        return
+
+    # With transaction pooling a session-level SET would leak to other
+    # clients, so the timeout is scoped to every transaction instead
+    @event.listens_for(engine, "begin")
+    def set_statement_timeout(connection):
+        connection.exec_driver_sql(
+            f"SET LOCAL statement_timeout = {config.statement_timeout}"
+        )
+
+
+def pool_stats(engine: Engine) -> dict:
+    """Live statistics of the engine's connection pool."""
+    pool = engine.pool
+    stats = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            {
+                "size": pool.size(),
+                "checked_in": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+                # Negative while the base connections are not all open
+                "overflow": max(pool.overflow(), 0),
+            }
+        )
+    if isinstance(pool, CheckoutTimingMixin):
+        with pool._stats_lock:
+            stats.update(
+                {
+                    "max_overflow": pool.max_overflow,
+                    "checkouts": pool.checkouts,
+                    "timeouts": pool.timeouts,
+                    "total_wait_seconds": round(pool.total_wait, 6),
+                    "max_wait_seconds": round(pool.max_wait, 6),
+                }
+            )
+    return stats
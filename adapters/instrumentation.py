@@ -0,0 +1,187 @@
+"""
+Per-request timing of SQL, ORM and serialization work.
+
+SQLAlchemy cursor events count the statements of the current request and
+add up their execution time; the entry point times the serialization of
+the response with `timed("serialize")`. Whatever else the request spends
+goes to "orm", which is mostly building and hydrating entities. The
+request in progress is kept in a context variable, so the hooks work the
+same for threaded workers and asyncio tasks.
+
+Statements slower than a threshold can also be logged, with the shape of
+their bound parameters (types, not values, which may be personal data).
+"""
+
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+request_logger = logging.getLogger(f"{__name__}.requests")
+
+_current: ContextVar[Optional["RequestTimings"]] = ContextVar(
+    "request_timings", default=None
+)
+
+
+class RequestTimings:
+    """Statement count and time spent per phase of one request."""
+
+    def __init__(self, clock=time.perf_counter):
+        self._clock = clock
+        self.started = clock()
+        self.finished = None
+        self.statements = 0
+        self.db = 0.0
+        self.phases = {}
+        # SQL run inside a phase (e.g. a lazy load while serializing) is
+        # reported as db time, not as part of the phase
+        self._db_in_phase = {}
+        self._phase = None
+
+    def add_query(self, duration: float) -> None:
+        self.statements += 1
+        self.db += duration
+        if self._phase is not None:
+            self._db_in_phase[self._phase] = (
+                self._db_in_phase.get(self._phase, 0.0) + duration
+            )
+
+    def add_phase(self, name: str, duration: float) -> None:
+        self.phases[name] = self.phases.get(name, 0.0) + duration
+
+    def finish(self) -> None:
+        self.finished = self._clock()
+
+    @property
+    def total(self) -> float:
+        end = self.finished if self.finished is not None else self._clock()
+        return end - self.started
+
+    def durations(self) -> dict:
+        """Seconds spent in SQL, serialization and everything else ("orm")."""
+        durations = {"db": self.db}
+        for name, duration in self.phases.items():
+            durations[name] = max(
+                duration - self._db_in_phase.get(name, 0.0), 0.0
+            )
+        durations["orm"] = max(self.total - sum(durations.values()), 0.0)
+        return durations
+
+    def server_timing(self) -> str:
+        """Value of the Server-Timing response header."""
+        metrics = []
+        for name, duration in self.durations().items():
+            metric = f"{name};dur={duration * 1000:.2f}"
+            if name == "db":
+                metric += f';desc="{self.statements} statements"'
+            metrics.append(metric)
+        metrics.append(f"total;dur={self.total * 1000:.2f}")
+        return ", ".join(metrics)
+
+    def as_fields(self) -> dict:
+        """Timings as flat log fields, in milliseconds."""
+        fields = {"statements": self.statements}
+        for name, duration in self.durations().items():
+            fields[f"{name}_ms"] = round(duration * 1000, 2)
+        fields["total_ms"] = round(self.total * 1000, 2)
+        return fields
+
+
+def log_request(timings: RequestTimings, **fields) -> None:
+    """
+    Log the timings of a finished request as one key=value line, with the
+    fields also attached to the record (`record.request`) for structured
+    log handlers.
+    """
+    if not request_logger.isEnabledFor(logging.INFO):
+        return
+    fields.update(timings.as_fields())
+    request_logger.info(
+        " ".join(f"{key}={value}" for key, value in fields.items()),
+        extra={"request": fields},
+    )
+
+
+def start_request() -> RequestTimings:
+    """Start timing a request in the current context."""
+    timings = RequestTimings()
+    _current.set(timings)
+    return timings
+
+
+def current_timings() -> Optional[RequestTimings]:
+    """Timings of the request in progress, if it is being timed."""
+    return _current.get()
+
+
+def end_request() -> None:
+    """Stop attributing work in the current context to a request."""
+    _current.set(None)
+
+
+@contextmanager
+def timed(phase: str):
+    """Time a phase of the current request (a no-op when not timing)."""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    outer, timings._phase = timings._phase, phase
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add_phase(phase, time.perf_counter() - start)
+        timings._phase = outer
+
+
+def parameter_shape(parameters):
+    """Describe bound parameters by their types, e.g. {'id': 'int'}."""
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, list):
+        # executemany: describe the first row
+        if not parameters:
+            return []
+        return f"{len(parameters)} x {parameter_shape(parameters[0])}"
+    if isinstance(parameters, tuple):
+        return tuple(type(value).__name__ for value in parameters)
+    return type(parameters).__name__
+
+
+def install_query_instrumentation(
+    engine: Engine, slow_query_threshold: float = 0.0
+) -> None:
+    """
+    Time every statement run on `engine` and add it to the current
+    request. Statements taking at least `slow_query_threshold` seconds are
+    logged as warnings (0 disables the slow query log).
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(
+        conn, cursor, statement, parameters, context, executemany
+    ):
+        context._query_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(
+        conn, cursor, statement, parameters, context, executemany
+    ):
+        duration = time.perf_counter() - context._query_start
+        timings = _current.get()
+        if timings is not None:
+            timings.add_query(duration)
+        if slow_query_threshold and duration >= slow_query_threshold:
+            logger.warning(
+                "Slow query (%.1f ms): %s parameters=%s",
+                duration * 1000,
+                statement,
+                parameter_shape(parameters),
+            )
@@ -0,0 +1,170 @@
+"""
+JSON documents built by the database instead of by the ORM.
+
+A document query renders the same shape as the domain's `to_dict` in a
+single SELECT, so a read can go straight from the database to the response
+body without creating any ORM objects. PostgreSQL builds the document with
+json_build_object/json_agg; SQLite's JSON1 functions are used as a portable
+fallback so the same queries run in tests.
+"""
+
+from typing import Callable, Dict, Type
+
+from sqlalchemy import Text, cast, literal_column, select
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql import ColumnElement, Select
+from sqlalchemy.sql.functions import FunctionElement
+
+from adapters.orm import grocery_items, grocery_lists
+from domain.models import GroceryItem, GroceryList, ItemStatus
+
+
+class json_object(FunctionElement):
+    """JSON object from alternating key and value arguments."""
+
+    inherit_cache = True
+
+
+class json_array_agg(FunctionElement):
+    """Aggregate JSON values into an array; an empty group gives []."""
+
+    inherit_cache = True
+
+
+class json_nested(FunctionElement):
+    """Embed a scalar subquery returning a JSON document."""
+
+    inherit_cache = True
+
+
+class json_boolean(FunctionElement):
+    """A SQL condition rendered as a JSON true/false."""
+
+    inherit_cache = True
+
+
+class json_timestamp(FunctionElement):
+    """A timestamp rendered as an ISO 8601 string, like `isoformat()`."""
+
+    inherit_cache = True
+
+
+@compiles(json_object, "postgresql")
+def _pg_json_object(element, compiler, **kw):
+    return f"json_build_object({compiler.process(element.clauses, **kw)})"
+
+
+@compiles(json_object)
+def _json_object(element, compiler, **kw):
+    return f"json_object({compiler.process(element.clauses, **kw)})"
+
+
+@compiles(json_array_agg, "postgresql")
+def _pg_json_array_agg(element, compiler, **kw):
+    return (
+        f"coalesce(json_agg({compiler.process(element.clauses, **kw)}), "
+        "'[]'::json)"
+    )
+
+
+@compiles(json_array_agg)
+def _json_array_agg(element, compiler, **kw):
+    # Values read from a subquery have lost their JSON subtype, see below
+    return f"json_group_array(json({compiler.process(element.clauses, **kw)}))"
+
+
+@compiles(json_nested, "postgresql")
+def _pg_json_nested(element, compiler, **kw):
+    return compiler.process(element.clauses, **kw)
+
+
+@compiles(json_nested)
+def _json_nested(element, compiler, **kw):
+    # SQLite loses the JSON subtype across subqueries; without json() the
+    # nested document would be embedded as a string
+    return f"json({compiler.process(element.clauses, **kw)})"
+
+
+@compiles(json_boolean, "postgresql")
+def _pg_json_boolean(element, compiler, **kw):
+    return f"({compiler.process(element.clauses, **kw)})"
+
+
+@compiles(json_boolean)
+def _json_boolean(element, compiler, **kw):
+    condition = compiler.process(element.clauses, **kw)
+    return f"json(CASE WHEN {condition} THEN 'true' ELSE 'false' END)"
+
+
+@compiles(json_timestamp, "postgresql")
+def _pg_json_timestamp(element, compiler, **kw):
+    return compiler.process(element.clauses, **kw)
+
+
+@compiles(json_timestamp)
+def _json_timestamp(element, compiler, **kw):
+    # SQLite stores timestamps as "YYYY-MM-DD HH:MM:SS[.ffffff]" strings
+    return f"replace({compiler.process(element.clauses, **kw)}, ' ', 'T')"
+
+
+def json_fields(fields: Dict[str, ColumnElement]) -> json_object:
+    """JSON object from a mapping of keys to SQL expressions."""
+    arguments = []
+    for key, value in fields.items():
+        # Keys are inlined so no parameter of unknown type is sent
+        arguments.extend((literal_column(f"'{key}'"), value))
+    return json_object(*arguments)
+
+
+def grocery_item_document() -> ColumnElement:
+    """JSON object matching `GroceryItem.to_dict`."""
+    items = grocery_items.c
+    return json_fields(
+        {
+            "id": items.id,
+            "name": items.name,
+            "quantity": items.quantity,
+            "is_purchased": json_boolean(items.status == ItemStatus.PURCHASED),
+            "purchased_at": json_timestamp(items.purchased_at),
+            "created_at": json_timestamp(items.created_at),
+            "updated_at": json_timestamp(items.updated_at),
+        }
+    )
+
+
+def grocery_list_document_query(list_id: int) -> Select:
+    """Query for the JSON document matching `GroceryList.to_dict`."""
+    # Aggregate over an ordered subquery so items come out by ID
+    ordered_items = (
+        select(grocery_item_document().label("document"))
+        .where(grocery_items.c.grocery_list_id == list_id)
+        .order_by(grocery_items.c.id)
+        .subquery()
+    )
+    items = select(json_array_agg(ordered_items.c.document)).scalar_subquery()
+    document = json_fields(
+        {
+            "id": grocery_lists.c.id,
+            "name": grocery_lists.c.name,
+            "created_at": json_timestamp(grocery_lists.c.created_at),
+            "updated_at": json_timestamp(grocery_lists.c.updated_at),
+            "grocery_items": json_nested(items),
+        }
+    )
+    # Text, so the driver hands back the encoded document instead of
+    # decoding it into Python objects
+    return select(cast(document, Text)).where(grocery_lists.c.id == list_id)
+
+
+def grocery_item_document_query(item_id: int) -> Select:
+    """Query for the JSON document matching `GroceryItem.to_dict`."""
+    return select(cast(grocery_item_document(), Text)).where(
+        grocery_items.c.id == item_id
+    )
+
+
+# Document queries by model class, see SqlAlchemyRepository.get_json
+DOCUMENT_QUERIES: Dict[Type, Callable[[int], Select]] = {
+    GroceryList: grocery_list_document_query,
+    GroceryItem: grocery_item_document_query,
+}
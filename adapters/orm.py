@@ -1,3 +1,5 @@
+import threading
+
 from sqlalchemy import (
     Table,
     MetaData,
@@ -7,6 +9,7 @@ from sqlalchemy import (
     DateTime,
     ForeignKey,
     Enum,
+    Index,
 )
 from sqlalchemy.orm import registry, relationship
 from sqlalchemy.sql import func
@@ -16,6 +19,7 @@ from domain.models import ItemStatus
 
 metadata = MetaData()
 mapper_registry = registry()
+_mapping_lock = threading.Lock()
 
 grocery_items = Table(
     "grocery_items",
@@ -24,7 +28,11 @@ grocery_items = Table(
     Column("name", String(255)),
     Column("quantity", Integer, nullable=False),
     Column("status", Enum(ItemStatus, name="item_status")),
-    Column("grocery_list_id", Integer, ForeignKey("grocery_lists.id")),
+    Column(
+        "grocery_list_id",
+        Integer,
+        ForeignKey("grocery_lists.id", ondelete="CASCADE"),
+    ),
     Column("purchased_at", DateTime(timezone=True), nullable=True),
     Column("created_at", DateTime(timezone=True), server_default=func.now()),
     Column(
@@ -35,6 +43,26 @@ grocery_items = Table(
     ),
 )
 
+# Serves a list's items filtered by status (pending/purchased)
+Index(
+    "ix_grocery_items_grocery_list_id_status",
+    grocery_items.c.grocery_list_id,
+    grocery_items.c.status,
+)
+# Serves pages of a list's items, which are keyset-ordered by ID
+Index(
+    "ix_grocery_items_grocery_list_id_id",
+    grocery_items.c.grocery_list_id,
+    grocery_items.c.id,
+)
+# Serves delta (changed since) reads of a list's items
+Index(
+    "ix_grocery_items_grocery_list_id_updated_at_id",
+    grocery_items.c.grocery_list_id,
+    grocery_items.c.updated_at,
+    grocery_items.c.id,
+)
+
 grocery_lists = Table(
     "grocery_lists",
     metadata,
@@ -51,6 +79,18 @@ grocery_lists = Table(
 
 
 def start_mappers():
+    """
+    Map the domain classes onto the tables. Safe to call more than once
+    (e.g. by every application created in a process); only the first call
+    maps, until clear_mappers() is called.
+    """
+    with _mapping_lock:
+        if mapper_registry.mappers:
+            return
+        _map_domain_classes()
+
+
+def _map_domain_classes():
     mapper_registry.map_imperatively(
         models.GroceryItem,
         grocery_items,
@@ -69,6 +109,9 @@ def start_mappers():
                 models.GroceryItem,
                 back_populates="grocery_list",
                 cascade="all, delete-orphan",
+                # let the database's ON DELETE CASCADE remove the items
+                # instead of loading and deleting them one by one
+                passive_deletes=True,
             )
         },
     )
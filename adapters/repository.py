@@ -1,10 +1,33 @@
-from typing import TypeVar, Generic, List, Optional, Type
+from typing import Dict, TypeVar, Generic, List, Optional, Type
 from abc import abstractmethod, ABC
-from sqlalchemy.orm import Session
+from adapters.cache import INVALIDATE_ALL, EntityCache
+from adapters.json_documents import DOCUMENT_QUERIES
+from sqlalchemy import delete, event, func, inspect, insert, select, update
+from sqlalchemy.orm import (
+    ONETOMANY,
+    Session,
+    joinedload,
+    lazyload,
+    make_transient_to_detached,
+    raiseload,
+    selectinload,
+)
+from sqlalchemy.orm.attributes import set_committed_value
 
 
 T = TypeVar("T")
 
+# Maps relationship names to a loading strategy name,
+# e.g. {"grocery_items": "selectin"}
+LoadOptions = Dict[str, str]
+
+LOADING_STRATEGIES = {
+    "lazy": lazyload,
+    "selectin": selectinload,
+    "joined": joinedload,
+    "raise": raiseload,
+}
+
 
 class AbstractRepository(ABC, Generic[T]):
     """Abstract Repository for CRUD operations."""
@@ -15,20 +38,74 @@ class AbstractRepository(ABC, Generic[T]):
         ...
 
     @abstractmethod
-    def get_by_id(self, entity_id: int) -> Optional[T]:
+    def add_all(self, entities: List[T]) -> List[T]:
+        """Add several new entities at once and return them as stored."""
+        ...
+
+    @abstractmethod
+    def get_by_id(
+        self, entity_id: int, load: Optional[LoadOptions] = None
+    ) -> Optional[T]:
         """Retrieve an entity by its ID."""
         ...
 
     @abstractmethod
-    def get_all(self) -> List[T]:
+    def get_all(self, load: Optional[LoadOptions] = None) -> List[T]:
         """Retrieve all entities from the repository."""
         ...
 
+    @abstractmethod
+    def get_page(
+        self,
+        limit: int,
+        after: Optional[int] = None,
+        load: Optional[LoadOptions] = None,
+        **filters,
+    ) -> List[T]:
+        """
+        Retrieve up to `limit` entities ordered by ID, starting after the
+        `after` cursor and matching the given column filters.
+        """
+        ...
+
+    @abstractmethod
+    def find_by(
+        self, load: Optional[LoadOptions] = None, **filters
+    ) -> List[T]:
+        """Retrieve all entities matching the given column filters, by ID."""
+        ...
+
+    @abstractmethod
+    def get_json(self, entity_id: int) -> Optional[bytes]:
+        """
+        Retrieve an entity, with its child collections, as an encoded JSON
+        document matching its `to_dict`. None if not found.
+        """
+        ...
+
+    @abstractmethod
+    def get_version(self, entity_id: int) -> Optional[tuple]:
+        """
+        Cheap fingerprint of an entity and its child collections that
+        changes whenever any of them is modified. None if not found.
+        """
+        ...
+
     @abstractmethod
     def update(self, entity: T) -> T:
         """Update an existing entity in the repository."""
         ...
 
+    @abstractmethod
+    def bulk_update(
+        self, values: dict, ids: Optional[List[int]] = None, **filters
+    ) -> List[T]:
+        """
+        Set `values` on every entity matching `ids` (when given) and the
+        column filters. Returns the updated entities.
+        """
+        ...
+
     @abstractmethod
     def delete_by_id(self, entity_id: int) -> bool:
         """Delete an entity by its ID. Returns True if successful."""
@@ -36,31 +113,126 @@ class AbstractRepository(ABC, Generic[T]):
 
 
 class SqlAlchemyRepository(AbstractRepository[T]):
-    """SQLAlchemy repository implementation."""
+    """
+    SQLAlchemy repository implementation.
+
+    `load` sets the default relationship loading strategies for queries made
+    through this repository; read methods accept a `load` argument that
+    overrides it per call. With `raise_on_lazy_load` any relationship that
+    was not explicitly loaded raises on access instead of issuing a query,
+    which makes N+1 regressions fail loudly in tests. With `defer_flush`,
+    `add` leaves new entities pending until the session's next flush (as
+    a unit of work does) instead of flushing each one on its own.
+    """
 
-    def __init__(self, session: Session, model_class: Type[T]):
+    def __init__(
+        self,
+        session: Session,
+        model_class: Type[T],
+        load: Optional[LoadOptions] = None,
+        raise_on_lazy_load: bool = False,
+        defer_flush: bool = False,
+    ):
         self.session = session
         self.model_class = model_class
+        self.load = load or {}
+        self.raise_on_lazy_load = raise_on_lazy_load
+        self.defer_flush = defer_flush
+
+    def _query(self, load: Optional[LoadOptions] = None):
+        """Build a query for the model with the loading options applied."""
+        options = loader_options(
+            self.model_class,
+            {**self.load, **(load or {})},
+            self.raise_on_lazy_load,
+        )
+        return self.session.query(self.model_class).options(*options)
 
     def add(self, entity: T) -> T:
         """Add a new entity to the repository."""
         self.session.add(entity)
-        self.session.flush()  # populate entity.id immediately
+        if not self.defer_flush:
+            self.session.flush()  # populate entity.id immediately
         # we will commit the transaction at the service level
         # to allow for grouping multiple operations
         return entity
 
-    def get_by_id(self, entity_id: int) -> Optional[T]:
+    def add_all(self, entities: List[T]) -> List[T]:
+        """
+        Add several new entities with a single multi-row
+        INSERT ... RETURNING and return the stored entities, in input order.
+        Dialects that cannot guarantee RETURNING order for multi-row inserts
+        (e.g. SQLite) fall back to one INSERT per row.
+        """
+        if not entities:
+            return []
+        statement, rows = insert_statement(self.model_class, entities)
+        return list(self.session.scalars(statement, rows))
+
+    def get_by_id(
+        self, entity_id: int, load: Optional[LoadOptions] = None
+    ) -> Optional[T]:
         """Retrieve an entity by its ID."""
+        return self._query(load).filter_by(id=entity_id).first()
+
+    def get_all(self, load: Optional[LoadOptions] = None) -> List[T]:
+        """Retrieve all entities from the repository."""
+        return self._query(load).all()
+
+    def get_page(
+        self,
+        limit: int,
+        after: Optional[int] = None,
+        load: Optional[LoadOptions] = None,
+        **filters,
+    ) -> List[T]:
+        """
+        Retrieve up to `limit` entities ordered by ID, starting after the
+        `after` cursor and matching the given column filters.
+        """
+        query = self._query(load).filter_by(**filters)
+        if after is not None:
+            query = query.filter(self.model_class.id > after)
+        return query.order_by(self.model_class.id).limit(limit).all()
+
+    def find_by(
+        self, load: Optional[LoadOptions] = None, **filters
+    ) -> List[T]:
+        """Retrieve all entities matching the given column filters, by ID."""
         return (
-            self.session.query(self.model_class)
-            .filter_by(id=entity_id)
-            .first()
+            self._query(load)
+            .filter_by(**filters)
+            .order_by(self.model_class.id)
+            .all()
         )
 
-    def get_all(self) -> List[T]:
-        """Retrieve all entities from the repository."""
-        return self.session.query(self.model_class).all()
+    def get_json(self, entity_id: int) -> Optional[bytes]:
+        """
+        Retrieve an entity, with its child collections, as an encoded JSON
+        document matching its `to_dict`. None if not found.
+
+        The database builds the whole document in one query, so no ORM
+        objects are created or added to the identity map.
+        """
+        document = self.session.execute(
+            document_statement(self.model_class, entity_id)
+        ).scalar()
+        return document.encode() if document is not None else None
+
+    def get_version(self, entity_id: int) -> Optional[tuple]:
+        """
+        Cheap fingerprint of an entity and its child collections that
+        changes whenever any of them is modified. None if not found.
+
+        Built from a single aggregate query over updated_at and id columns:
+        the entity's updated_at plus, for every one-to-many relationship,
+        the children's count, latest updated_at and highest id. Counting
+        catches deletes, the highest id catches delete-then-insert.
+        """
+        version = self.session.execute(
+            version_statement(self.model_class, entity_id)
+        ).first()
+        return tuple(version) if version is not None else None
 
     def update(self, entity: T) -> T:
         """Update an existing entity in the repository."""
@@ -69,13 +241,305 @@ class SqlAlchemyRepository(AbstractRepository[T]):
         # to allow for grouping multiple operations
         return entity
 
+    def bulk_update(
+        self, values: dict, ids: Optional[List[int]] = None, **filters
+    ) -> List[T]:
+        """
+        Set `values` on every entity matching `ids` (when given) and the
+        column filters with a single UPDATE ... RETURNING.
+        Returns the updated entities.
+        """
+        statement = bulk_update_statement(
+            self.model_class, values, ids, filters
+        )
+        # we will commit the transaction at the service level
+        # to allow for grouping multiple operations
+        return list(self.session.scalars(statement))
+
     def delete_by_id(self, entity_id: int) -> bool:
         """Delete an entity by its ID. Returns True if successful."""
-        deleted_count = (
-            self.session.query(self.model_class)
-            .filter_by(id=entity_id)
-            .delete(synchronize_session="fetch")
-        )
+        deleted = self.session.execute(
+            delete_statement(self.model_class, entity_id)
+        ).first()
         # we will commit the transaction at the service level
         # to allow for grouping multiple operations
-        return deleted_count > 0
+        return deleted is not None
+
+
+# Statement builders shared by the synchronous and asyncio repositories
+
+
+def loader_options(
+    model_class: Type, strategies: LoadOptions, raise_on_lazy_load: bool
+) -> list:
+    """Loader options applying the relationship loading strategies."""
+    options = []
+    for relationship_name, strategy in strategies.items():
+        if strategy not in LOADING_STRATEGIES:
+            raise ValueError(f"Unknown loading strategy: {strategy}")
+        attribute = getattr(model_class, relationship_name)
+        options.append(LOADING_STRATEGIES[strategy](attribute))
+    if raise_on_lazy_load:
+        options.append(raiseload("*"))
+    return options
+
+
+def insert_statement(model_class: Type[T], entities: List[T]):
+    """
+    Multi-row INSERT ... RETURNING for new entities, with the parameter
+    rows to execute it with.
+    """
+    mapper = inspect(model_class)
+    rows = [
+        {
+            attr.key: getattr(entity, attr.key, None)
+            for attr in mapper.column_attrs
+            if not (
+                attr.columns[0].primary_key
+                and getattr(entity, attr.key, None) is None
+            )
+        }
+        for entity in entities
+    ]
+    statement = insert(model_class).returning(
+        model_class, sort_by_parameter_order=True
+    )
+    return statement, rows
+
+
+def version_statement(model_class: Type, entity_id: int):
+    """Aggregate query behind AbstractRepository.get_version."""
+    model = model_class
+    statement = select(model.updated_at).where(model.id == entity_id)
+    for relationship in inspect(model).relationships:
+        if relationship.direction is not ONETOMANY:
+            continue
+        child = relationship.entity.class_
+        statement = statement.add_columns(
+            func.count(child.id),
+            func.max(child.updated_at),
+            func.max(child.id),
+        ).outerjoin(child, relationship.primaryjoin)
+    return statement.group_by(model.id)
+
+
+def bulk_update_statement(
+    model_class: Type, values: dict, ids: Optional[List[int]], filters: dict
+):
+    """UPDATE ... RETURNING behind AbstractRepository.bulk_update."""
+    statement = (
+        update(model_class)
+        .filter_by(**filters)
+        .values(**values)
+        .returning(model_class)
+    )
+    if ids is not None:
+        statement = statement.where(model_class.id.in_(ids))
+    return statement
+
+
+def delete_statement(model_class: Type, entity_id: int):
+    """DELETE ... RETURNING behind AbstractRepository.delete_by_id."""
+    return (
+        delete(model_class)
+        .where(model_class.id == entity_id)
+        .returning(model_class.id)
+    )
+
+
+def document_statement(model_class: Type, entity_id: int):
+    """JSON document query behind AbstractRepository.get_json."""
+    if model_class not in DOCUMENT_QUERIES:
+        raise ValueError(
+            f"No JSON document defined for {model_class.__name__}"
+        )
+    return DOCUMENT_QUERIES[model_class](entity_id)
+
+
+# Session.info key holding the cache invalidations to publish after commit
+PENDING_INVALIDATIONS = "pending_cache_invalidations"
+
+# Loading strategies that leave a relationship unloaded, as it is on a
+# cached snapshot
+DEFERRED_STRATEGIES = ("lazy", "raise")
+
+
+class CachedRepository(AbstractRepository[T]):
+    """
+    Read-through cache in front of another repository.
+
+    Only get_by_id is served from the cache, for lookups that do not
+    eagerly load relationships (by default or through `load`, as in
+    SqlAlchemyRepository): e.g. checking that a list exists or reading its
+    name. Every write path invalidates the entries it touches.
+
+    With a SQLAlchemy `session`, entities are cached as detached snapshots
+    of their columns, so a list is cached without its items, and merged
+    into the session on a hit without emitting SQL; a relationship read
+    from a hit is loaded lazily. Writes drop the entry from this cache at
+    once and publish the invalidation to the other caches once the
+    transaction commits. A miss only fills the cache if the entry was not
+    invalidated while it was being loaded (see EntityCache.generation), so
+    a concurrent reader that loaded the pre-commit state cannot cache it,
+    and entities are not cached by a session with uncommitted writes.
+    """
+
+    def __init__(
+        self,
+        repository: AbstractRepository[T],
+        cache: EntityCache,
+        session: Optional[Session] = None,
+        load: Optional[LoadOptions] = None,
+    ):
+        self.repository = repository
+        self.cache = cache
+        self.session = session
+        self.load = load or {}
+
+    def add(self, entity: T) -> T:
+        """Add a new entity to the repository."""
+        return self.repository.add(entity)
+
+    def add_all(self, entities: List[T]) -> List[T]:
+        """Add several new entities at once and return them as stored."""
+        return self.repository.add_all(entities)
+
+    def get_by_id(
+        self, entity_id: int, load: Optional[LoadOptions] = None
+    ) -> Optional[T]:
+        """Retrieve an entity by its ID, from the cache when possible."""
+        strategies = {**self.load, **(load or {})}.values()
+        if any(s not in DEFERRED_STRATEGIES for s in strategies):
+            # The cache holds no relationships to serve this from
+            return self.repository.get_by_id(entity_id, load)
+
+        cached = self.cache.get(entity_id)
+        if cached is not None:
+            return self._attach(cached)
+
+        # Taken before the SELECT, so a write committed after it was read
+        # invalidates the value about to be cached
+        generation = self.cache.generation(entity_id)
+        entity = self.repository.get_by_id(entity_id, load)
+        if entity is not None and self._is_cacheable(entity):
+            self.cache.set(entity_id, self._snapshot(entity), generation)
+        return entity
+
+    def get_all(self, load: Optional[LoadOptions] = None) -> List[T]:
+        """Retrieve all entities from the repository."""
+        return self.repository.get_all(load)
+
+    def get_page(
+        self,
+        limit: int,
+        after: Optional[int] = None,
+        load: Optional[LoadOptions] = None,
+        **filters,
+    ) -> List[T]:
+        """Retrieve a page of entities from the repository."""
+        return self.repository.get_page(limit, after, load, **filters)
+
+    def find_by(
+        self, load: Optional[LoadOptions] = None, **filters
+    ) -> List[T]:
+        """Retrieve all entities matching the given column filters, by ID."""
+        return self.repository.find_by(load, **filters)
+
+    def get_json(self, entity_id: int) -> Optional[bytes]:
+        """JSON document of an entity, always read from the repository."""
+        return self.repository.get_json(entity_id)
+
+    def get_version(self, entity_id: int) -> Optional[tuple]:
+        """Fingerprint of an entity, always read from the repository."""
+        return self.repository.get_version(entity_id)
+
+    def update(self, entity: T) -> T:
+        """Update an existing entity and invalidate its cache entry."""
+        updated = self.repository.update(entity)
+        self.invalidate(entity.id)
+        return updated
+
+    def bulk_update(
+        self, values: dict, ids: Optional[List[int]] = None, **filters
+    ) -> List[T]:
+        """Update matching entities and invalidate their cache entries."""
+        updated = self.repository.bulk_update(values, ids, **filters)
+        for entity in updated:
+            self.invalidate(entity.id)
+        return updated
+
+    def delete_by_id(self, entity_id: int) -> bool:
+        """Delete an entity by its ID and invalidate its cache entry."""
+        is_deleted = self.repository.delete_by_id(entity_id)
+        self.invalidate(entity_id)
+        return is_deleted
+
+    def invalidate(self, entity_id: int) -> None:
+        """
+        Drop the cached entity here now and everywhere once the transaction
+        commits. Used directly when a write elsewhere (e.g. to a child
+        entity) changes it.
+        """
+        if self.session is None:
+            self.cache.invalidate(entity_id)
+            return
+        # Other caches cannot see the write before it commits, so they are
+        # only told (once per entity) afterwards
+        self.cache.discard(entity_id)
+        self._after_commit(entity_id, lambda: self.cache.invalidate(entity_id))
+
+    def invalidate_all(self) -> None:
+        """Drop every cached entity here now and everywhere after commit."""
+        if self.session is None:
+            self.cache.clear()
+            return
+        self.cache.discard_all()
+        self._after_commit(INVALIDATE_ALL, self.cache.clear)
+
+    def _after_commit(self, key, invalidation) -> None:
+        pending = self.session.info.setdefault(PENDING_INVALIDATIONS, {})
+        pending[(id(self.cache), key)] = invalidation
+
+    def _is_cacheable(self, entity: T) -> bool:
+        """
+        Entities are not cached by sessions with writes waiting to commit,
+        which may be rolled back.
+        """
+        if not self.cache.enabled:
+            return False
+        if self.session is None:
+            return True
+        return not self.session.info.get(PENDING_INVALIDATIONS)
+
+    def _snapshot(self, entity: T) -> T:
+        """
+        Copy an entity's columns into a detached instance no session will
+        mutate, leaving its relationships unloaded.
+        """
+        if self.session is None:
+            return entity
+        mapper = inspect(entity).mapper
+        snapshot = mapper.class_manager.new_instance()
+        for attribute in mapper.column_attrs:
+            set_committed_value(
+                snapshot, attribute.key, getattr(entity, attribute.key)
+            )
+        make_transient_to_detached(snapshot)
+        return snapshot
+
+    def _attach(self, snapshot: T) -> T:
+        """Copy a cached snapshot into the current session, without SQL."""
+        if self.session is None:
+            return snapshot
+        return self.session.merge(snapshot, load=False)
+
+
+@event.listens_for(Session, "after_commit")
+def _run_pending_invalidations(session: Session) -> None:
+    for invalidation in session.info.pop(PENDING_INVALIDATIONS, {}).values():
+        invalidation()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_invalidations(session: Session) -> None:
+    session.info.pop(PENDING_INVALIDATIONS, None)
@@ -0,0 +1,547 @@
+"""
+Endpoint benchmark suite with per-endpoint budgets.
+
+Seeds a database at several sizes and drives every route of the Flask app
+through its test client, recording for each endpoint the p50/p95 latency,
+the number of SQL statements per request and the peak Python memory of one
+request. Endpoints over their budget (see BUDGETS) fail the run with exit
+status 1, and the results are written as JSON so they can be compared
+across commits.
+
+Datasets (see DATASETS):
+    small    1 list of 100 items
+    medium   100 lists of 100 items, the last one with 5k items
+    large    10k lists of 10 items, the last one with 50k items
+
+Usage:
+    uv run python -m benchmarks.endpoints [--url sqlite://]
+        [--datasets small medium large] [--requests 50]
+        [--output endpoints.json] [--budgets budgets.json]
+        [--latency-scale 1.0]
+
+`--url` may point at a PostgreSQL database; use a scratch one, since its
+tables are dropped and recreated for each dataset. Latency budgets were set
+with headroom over SQLite runs on a single core; scale them with
+`--latency-scale` on slower machines. The p95 of fewer than
+MIN_LATENCY_SAMPLES requests is too noisy to hold to a budget, so shorter
+runs only check statement counts. `--budgets` takes a JSON file with the
+same shape as BUDGETS, whose entries replace the defaults.
+
+Single-flight is disabled, so every request runs its own queries: shared
+reads would hide statements from the counts (e.g. the version query of a
+conditional GET made just after the request that fetched its ETag).
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from sqlalchemy import event, insert, make_url, select
+
+from adapters.orm import grocery_items, grocery_lists, metadata
+from benchmarks.list_documents import peak_memory
+from config import DatabaseConfig
+from domain.models import ItemStatus
+from entrypoints.flask_app import create_app, db
+
+DATASETS = {
+    "small": {"lists": 1, "items": 100, "big_list_items": 100},
+    "medium": {"lists": 100, "items": 100, "big_list_items": 5_000},
+    "large": {"lists": 10_000, "items": 10, "big_list_items": 50_000},
+}
+
+
+@dataclass
+class Scenario:
+    """One request to benchmark, built from the seeded IDs in `ids`."""
+
+    name: str
+    method: str
+    path: Callable[[dict], str]
+    status: int
+    body: Optional[Callable[[dict], object]] = None
+    # Untimed preparation run before each request, e.g. creating the row
+    # a DELETE removes. Returns extra IDs for `path` and `body`.
+    setup: Optional[Callable[[object, dict], dict]] = None
+    headers: Optional[Callable[[object, dict], dict]] = None
+
+
+def new_list(connection, ids):
+    """Insert a list with a few items, for the DELETE scenarios."""
+    list_id = connection.execute(
+        insert(grocery_lists).values(name="Disposable")
+    ).inserted_primary_key[0]
+    item_id = connection.execute(
+        insert(grocery_items).values(
+            name="Disposable",
+            quantity=1,
+            status=ItemStatus.PENDING,
+            grocery_list_id=ids["list_id"],
+        )
+    ).inserted_primary_key[0]
+    return {"new_list_id": list_id, "new_item_id": item_id}
+
+
+def if_none_match(client, ids):
+    """Send the current ETag of the list, as a polling client would."""
+    response = client.get(f"/api/v1/grocery-lists/{ids['list_id']}")
+    return {"If-None-Match": response.headers["ETag"]}
+
+
+def sync_operations(ids):
+    """A client's queued offline edits: a new list filled and checked off."""
+    operations = [{"op": "create_list", "name": "Synced", "ref": "list"}]
+    for i in range(5):
+        operations.append(
+            {
+                "op": "add_item",
+                "list_id": {"$ref": "list"},
+                "name": f"Item {i}",
+                "ref": f"item {i}",
+            }
+        )
+    for i in range(5):
+        operations.append(
+            {"op": "purchase_item", "item_id": {"$ref": f"item {i}"}}
+        )
+    operations.append(
+        {"op": "update_item", "item_id": ids["item_id"], "quantity": 4}
+    )
+    return operations
+
+
+SCENARIOS = [
+    Scenario("pool_status", "GET", lambda ids: "/api/v1/status/pool", 200),
+    Scenario(
+        "list_grocery_lists",
+        "GET",
+        lambda ids: "/api/v1/grocery-lists?limit=50",
+        200,
+    ),
+    Scenario(
+        "get_grocery_list",
+        "GET",
+        lambda ids: f"/api/v1/grocery-lists/{ids['list_id']}",
+        200,
+    ),
+    Scenario(
+        "get_grocery_list_not_modified",
+        "GET",
+        lambda ids: f"/api/v1/grocery-lists/{ids['list_id']}",
+        304,
+        headers=if_none_match,
+    ),
+    Scenario(
+        "get_big_grocery_list",
+        "GET",
+        lambda ids: f"/api/v1/grocery-lists/{ids['big_list_id']}",
+        200,
+    ),
+    Scenario(
+        "list_items",
+        "GET",
+        lambda ids: f"/api/v1/grocery-lists/{ids['big_list_id']}/items",
+        200,
+    ),
+    Scenario(
+        "list_items_by_status",
+        "GET",
+        lambda ids: (
+            f"/api/v1/grocery-lists/{ids['big_list_id']}/items"
+            "?status=purchased&limit=200"
+        ),
+        200,
+    ),
+    Scenario(
+        "create_grocery_list",
+        "POST",
+        lambda ids: "/api/v1/grocery-lists",
+        201,
+        body=lambda ids: {"name": "Benchmark"},
+    ),
+    Scenario(
+        "update_grocery_list",
+        "PUT",
+        lambda ids: f"/api/v1/grocery-lists/{ids['list_id']}",
+        200,
+        body=lambda ids: {"name": "Renamed"},
+    ),
+    Scenario(
+        "delete_grocery_list",
+        "DELETE",
+        lambda ids: f"/api/v1/grocery-lists/{ids['new_list_id']}",
+        200,
+        setup=new_list,
+    ),
+    Scenario(
+        "add_item",
+        "POST",
+        lambda ids: f"/api/v1/grocery-lists/{ids['list_id']}/items",
+        201,
+        body=lambda ids: {"name": "Milk", "quantity": 2},
+    ),
+    Scenario(
+        "add_items_bulk",
+        "POST",
+        lambda ids: f"/api/v1/grocery-lists/{ids['list_id']}/items/bulk",
+        201,
+        body=lambda ids: [{"name": f"Item {i}"} for i in range(100)],
+    ),
+    Scenario(
+        "purchase_items",
+        "POST",
+        lambda ids: f"/api/v1/grocery-lists/{ids['list_id']}/items/purchase",
+        200,
+        body=lambda ids: {"item_ids": ids["item_ids"]},
+    ),
+    Scenario(
+        "unpurchase_items",
+        "POST",
+        lambda ids: f"/api/v1/grocery-lists/{ids['list_id']}/items/unpurchase",
+        200,
+        body=lambda ids: {"item_ids": ids["item_ids"]},
+    ),
+    Scenario(
+        "update_item",
+        "PATCH",
+        lambda ids: f"/api/v1/grocery-items/{ids['item_id']}",
+        200,
+        body=lambda ids: {"quantity": 3},
+    ),
+    Scenario(
+        "purchase_item",
+        "POST",
+        lambda ids: f"/api/v1/grocery-items/{ids['item_id']}/purchase",
+        200,
+    ),
+    Scenario(
+        "unpurchase_item",
+        "POST",
+        lambda ids: f"/api/v1/grocery-items/{ids['item_id']}/unpurchase",
+        200,
+    ),
+    Scenario(
+        "delete_item",
+        "DELETE",
+        lambda ids: f"/api/v1/grocery-items/{ids['new_item_id']}",
+        200,
+        setup=new_list,
+    ),
+    Scenario(
+        "batch",
+        "POST",
+        lambda ids: "/api/v1/batch",
+        200,
+        body=lambda ids: {"operations": sync_operations(ids)},
+    ),
+]
+
+# Latency budgets are only checked with at least this many requests per
+# endpoint; below it the p95 is one of the few slowest requests
+MIN_LATENCY_SAMPLES = 50
+
+# Per-endpoint budgets: SQL statements per request (per database dialect
+# where they differ), and p95 latency in milliseconds per dataset; datasets
+# without a latency budget use the one of the next smaller dataset.
+# Statement counts do not depend on the data size, so a higher count is an
+# N+1 or lost batching regression. Cache misses are included: the first
+# read of a list loads it and its items.
+BUDGETS = {
+    "pool_status": {"statements": 0, "p95_ms": 30},
+    "list_grocery_lists": {
+        "statements": 2,
+        "p95_ms": {"small": 50, "medium": 400, "large": 100},
+    },
+    "get_grocery_list": {"statements": 3, "p95_ms": 50},
+    "get_grocery_list_not_modified": {"statements": 1, "p95_ms": 30},
+    "get_big_grocery_list": {
+        "statements": 3,
+        "p95_ms": {"small": 80, "medium": 400, "large": 7500},
+    },
+    "list_items": {
+        "statements": 3,
+        "p95_ms": {"small": 50, "medium": 300, "large": 4000},
+    },
+    "list_items_by_status": {
+        "statements": 3,
+        "p95_ms": {"small": 50, "medium": 300, "large": 100},
+    },
+    "create_grocery_list": {"statements": 2, "p95_ms": 50},
+    "update_grocery_list": {"statements": 3, "p95_ms": 50},
+    "delete_grocery_list": {"statements": 1, "p95_ms": 30},
+    "add_item": {"statements": 2, "p95_ms": 50},
+    # SQLite cannot return the rows of a multi-row INSERT in parameter
+    # order, so SQLAlchemy sends one INSERT per item there
+    "add_items_bulk": {
+        "statements": {"sqlite": 101, "default": 2},
+        "p95_ms": 100,
+    },
+    "purchase_items": {"statements": 1, "p95_ms": 50},
+    "unpurchase_items": {"statements": 1, "p95_ms": 50},
+    "update_item": {"statements": 1, "p95_ms": 50},
+    "purchase_item": {"statements": 1, "p95_ms": 50},
+    "unpurchase_item": {"statements": 1, "p95_ms": 50},
+    "delete_item": {"statements": 1, "p95_ms": 50},
+    # 12 operations: the statements of the matching requests, one commit
+    "batch": {"statements": 18, "p95_ms": 100},
+}
+
+
+def seed(engine, lists, items, big_list_items):
+    """Create the dataset; returns the IDs the scenarios work on."""
+    with engine.begin() as connection:
+        connection.execute(
+            insert(grocery_lists),
+            [{"name": f"List {i}"} for i in range(lists)],
+        )
+        list_ids = list(
+            connection.scalars(
+                select(grocery_lists.c.id).order_by(grocery_lists.c.id)
+            )
+        )
+        rows = []
+        for list_id in list_ids:
+            size = big_list_items if list_id == list_ids[-1] else items
+            rows.extend(
+                {
+                    "name": f"Item {i}",
+                    "quantity": i % 5 + 1,
+                    "status": (
+                        ItemStatus.PURCHASED if i % 2 else ItemStatus.PENDING
+                    ),
+                    "grocery_list_id": list_id,
+                }
+                for i in range(size)
+            )
+        connection.execute(insert(grocery_items), rows)
+        # The big list is the last one, so it is not on the first page of
+        # lists; writes go to the first list
+        list_id = list_ids[0]
+        item_ids = list(
+            connection.scalars(
+                select(grocery_items.c.id)
+                .where(grocery_items.c.grocery_list_id == list_id)
+                .order_by(grocery_items.c.id)
+                .limit(10)
+            )
+        )
+    return {
+        "big_list_id": list_ids[-1],
+        "list_id": list_id,
+        "item_id": item_ids[0],
+        "item_ids": item_ids,
+    }
+
+
+def percentile(sorted_values, fraction):
+    index = min(int(len(sorted_values) * fraction), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def run_scenario(app, client, scenario, ids, requests, statements):
+    """Time `requests` runs of `scenario`; returns its measurements."""
+
+    def prepare():
+        request_ids = dict(ids)
+        if scenario.setup:
+            with app.app_context(), db.engine.begin() as connection:
+                request_ids.update(scenario.setup(connection, request_ids))
+        return {
+            "method": scenario.method,
+            "path": scenario.path(request_ids),
+            "json": scenario.body(request_ids) if scenario.body else None,
+            "headers": (
+                scenario.headers(client, request_ids)
+                if scenario.headers
+                else None
+            ),
+        }
+
+    latencies, counts, statuses = [], [], set()
+    for _ in range(requests):
+        request = prepare()
+        statements.clear()
+        start = time.perf_counter()
+        response = client.open(**request)
+        latencies.append(time.perf_counter() - start)
+        counts.append(len(statements))
+        statuses.add(response.status_code)
+
+    request = prepare()
+    peak = peak_memory(lambda: client.open(**request))
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "p50_ms": round(percentile(latencies, 0.5) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "statements": max(counts),
+        "peak_kib": round(peak / 1024, 1),
+        "statuses": sorted(statuses),
+    }
+
+
+def check_budget(
+    dataset, dialect, name, result, budget, latency_scale, expected
+):
+    """Return the ways `result` is over `budget`, as messages."""
+    violations = []
+    if result["statuses"] != [expected]:
+        violations.append(
+            f"{dataset}/{name}: status {result['statuses']}, "
+            f"expected {expected}"
+        )
+    if budget is None:
+        return violations
+    statements_budget = budget["statements"]
+    if isinstance(statements_budget, dict):
+        statements_budget = statements_budget.get(
+            dialect, statements_budget["default"]
+        )
+    if result["statements"] > statements_budget:
+        violations.append(
+            f"{dataset}/{name}: {result['statements']} statements, "
+            f"budget {statements_budget}"
+        )
+    p95_budget = budget["p95_ms"]
+    if isinstance(p95_budget, dict):
+        # Datasets without their own budget use the one of the next
+        # smaller dataset that has one
+        sizes = list(DATASETS)
+        candidates = sizes[: sizes.index(dataset) + 1]
+        p95_budget = next(
+            (p95_budget[d] for d in reversed(candidates) if d in p95_budget),
+            None,
+        )
+    if (
+        p95_budget is not None
+        and result["requests"] >= MIN_LATENCY_SAMPLES
+        and result["p95_ms"] > p95_budget * latency_scale
+    ):
+        violations.append(
+            f"{dataset}/{name}: p95 {result['p95_ms']:.1f} ms, "
+            f"budget {p95_budget * latency_scale:.1f} ms"
+        )
+    return violations
+
+
+def run_dataset(url, dataset, requests):
+    """Seed a fresh database with `dataset` and benchmark every scenario."""
+    app = create_app(
+        {
+            "DATABASE_CONFIG": DatabaseConfig(uri=url),
+            "WARM_UP": False,
+            "SINGLE_FLIGHT": False,
+        }
+    )
+    statements = []
+    with app.app_context():
+        engine = db.engine
+        metadata.drop_all(engine)
+        metadata.create_all(engine)
+        ids = seed(engine, **DATASETS[dataset])
+        event.listen(
+            engine,
+            "before_cursor_execute",
+            lambda *args: statements.append(args[2]),
+        )
+
+    client = app.test_client()
+    results = {}
+    for scenario in SCENARIOS:
+        results[scenario.name] = run_scenario(
+            app, client, scenario, ids, requests, statements
+        )
+
+    with app.app_context():
+        db.engine.dispose()
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", default="sqlite://")
+    parser.add_argument(
+        "--datasets", nargs="+", choices=list(DATASETS), default=DATASETS
+    )
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--output", default="endpoints.json")
+    parser.add_argument("--budgets")
+    parser.add_argument("--latency-scale", type=float, default=1.0)
+    args = parser.parse_args()
+
+    budgets = dict(BUDGETS)
+    if args.budgets:
+        with open(args.budgets) as budgets_file:
+            budgets.update(json.load(budgets_file))
+
+    expected = {scenario.name: scenario.status for scenario in SCENARIOS}
+    dialect = make_url(args.url).get_backend_name()
+    report = {
+        "commit": git_commit(),
+        "database": dialect,
+        "python": platform.python_version(),
+        "requests": args.requests,
+        "results": {},
+        "violations": [],
+    }
+    print(
+        f"{'dataset':>8} {'endpoint':>30} {'p50 ms':>9} {'p95 ms':>9} "
+        f"{'stmts':>6} {'peak KiB':>9}"
+    )
+    if args.requests < MIN_LATENCY_SAMPLES:
+        print(
+            f"Fewer than {MIN_LATENCY_SAMPLES} requests per endpoint: "
+            "latency budgets are not checked"
+        )
+    for dataset in args.datasets:
+        results = run_dataset(args.url, dataset, args.requests)
+        report["results"][dataset] = results
+        for name, result in results.items():
+            print(
+                f"{dataset:>8} {name:>30} {result['p50_ms']:>9.2f} "
+                f"{result['p95_ms']:>9.2f} {result['statements']:>6} "
+                f"{result['peak_kib']:>9.1f}"
+            )
+            report["violations"].extend(
+                check_budget(
+                    dataset,
+                    dialect,
+                    name,
+                    result,
+                    budgets.get(name),
+                    args.latency_scale,
+                    expected[name],
+                )
+            )
+
+    with open(args.output, "w") as output:
+        json.dump(report, output, indent=2)
+    print(f"Results written to {args.output}")
+
+    if report["violations"]:
+        print("Budget violations:")
+        for violation in report["violations"]:
+            print(f"  {violation}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
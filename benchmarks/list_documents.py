@@ -0,0 +1,102 @@
+"""
+Benchmark the two read paths of GET /api/v1/grocery-lists/<id>.
+
+"orm" loads the list and its items through the identity map and encodes
+`to_dict()`; "document" has the database build the JSON document
+(SqlAlchemyRepository.get_json). Reports the best wall time and the peak
+Python memory of one read, for lists of 1k and 50k items.
+
+Usage:
+    uv run python -m benchmarks.list_documents [--url sqlite://] [--repeat 5]
+
+`--url` may point at a PostgreSQL database; use a scratch one, since the
+benchmark creates the tables and inserts its own rows.
+"""
+
+import argparse
+import functools
+import json
+import tracemalloc
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+from adapters.orm import grocery_items, grocery_lists, metadata, start_mappers
+from adapters.repository import SqlAlchemyRepository
+from benchmarks.serialization import best_time
+from domain.models import GroceryList, ItemStatus
+
+LIST_SIZES = (1_000, 50_000)
+
+
+def seed(engine, sizes):
+    """Create one grocery list per size; returns their IDs."""
+    list_ids = []
+    with engine.begin() as connection:
+        for size in sizes:
+            list_id = connection.execute(
+                insert(grocery_lists).values(name=f"{size} items")
+            ).inserted_primary_key[0]
+            connection.execute(
+                insert(grocery_items),
+                [
+                    {
+                        "name": f"Item {i}",
+                        "quantity": i % 5 + 1,
+                        "status": ItemStatus.PENDING,
+                        "grocery_list_id": list_id,
+                    }
+                    for i in range(size)
+                ],
+            )
+            list_ids.append(list_id)
+    return list_ids
+
+
+def read_with_orm(engine, list_id):
+    with Session(engine) as session:
+        repo = SqlAlchemyRepository(
+            session, GroceryList, load={"grocery_items": "selectin"}
+        )
+        return json.dumps(repo.get_by_id(list_id).to_dict()).encode()
+
+
+def read_document(engine, list_id):
+    with Session(engine) as session:
+        return SqlAlchemyRepository(session, GroceryList).get_json(list_id)
+
+
+def peak_memory(function):
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", default="sqlite://")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    engine = create_engine(args.url)
+    metadata.create_all(engine)
+    start_mappers()
+    list_ids = seed(engine, LIST_SIZES)
+
+    readers = {"orm": read_with_orm, "document": read_document}
+    print(f"{'items':>8} {'path':>9} {'ms':>10} {'peak MiB':>10}")
+    for size, list_id in zip(LIST_SIZES, list_ids):
+        for name, reader in readers.items():
+            read = functools.partial(reader, engine, list_id)
+            elapsed = best_time(read, args.repeat)
+            peak = peak_memory(read)
+            print(
+                f"{size:>8} {name:>9} {elapsed * 1000:>10.2f} "
+                f"{peak / 2**20:>10.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Closed-loop HTTP load test: `--concurrency` clients each send requests
+back to back over a keep-alive connection for `--duration` seconds.
+Reports requests per second, latency percentiles and errors.
+
+Usage:
+    uv run python -m benchmarks.load_test \
+        --url http://localhost:5000/api/v1/grocery-lists/1 \
+        [--concurrency 32] [--duration 20]
+
+To compare the development server with the production one, start each
+against the same database and run the same load test:
+
+    uv run flask run --port 5000
+    uv run python -m entrypoints.serve    # SERVER_BIND=0.0.0.0:5000
+
+Run the load generator on a different machine (or cores) than the server
+when measuring for real; on a shared host it competes for the CPU.
+"""
+
+import argparse
+import http.client
+import statistics
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+def run_client(url, deadline, latencies, errors):
+    parts = urlsplit(url)
+    path = parts.path + (f"?{parts.query}" if parts.query else "")
+    connection = http.client.HTTPConnection(parts.hostname, parts.port)
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            connection.request("GET", path)
+            response = connection.getresponse()
+            response.read()
+            if response.status >= 500:
+                errors.append(response.status)
+                continue
+            if response.getheader("Connection", "").lower() == "close":
+                connection.close()
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(type(e).__name__)
+            connection.close()
+            continue
+        latencies.append(time.perf_counter() - start)
+    connection.close()
+
+
+def percentile(sorted_values, fraction):
+    index = min(int(len(sorted_values) * fraction), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", required=True)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=20)
+    args = parser.parse_args()
+
+    latencies, errors = [], []
+    deadline = time.perf_counter() + args.duration
+    clients = [
+        threading.Thread(
+            target=run_client, args=(args.url, deadline, latencies, errors)
+        )
+        for _ in range(args.concurrency)
+    ]
+    start = time.perf_counter()
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    elapsed = time.perf_counter() - start
+
+    if not latencies:
+        print(f"No successful requests, {len(errors)} errors")
+        return
+    latencies.sort()
+    print(f"requests      {len(latencies)}")
+    print(f"errors        {len(errors)}")
+    print(f"req/s         {len(latencies) / elapsed:,.1f}")
+    print(f"mean ms       {statistics.mean(latencies) * 1000:.2f}")
+    for label, fraction in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99)):
+        value = percentile(latencies, fraction) * 1000
+        print(f"{label} ms        {value:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Micro-benchmark comparing JSON serialization backends for grocery lists.
+
+Measures the response path of GET /api/v1/grocery-lists/<id> for lists
+of 10, 1k and 50k items: encoding the output of `GroceryList.to_dict()`
+into a response body on its own ("encode") and together with building the
+dict ("total").
+
+Usage:
+    uv run python -m benchmarks.serialization [--repeat 5]
+"""
+
+import argparse
+import time
+from datetime import datetime
+
+from flask import Flask
+
+from domain.models import GroceryItem, GroceryList
+from entrypoints.json_provider import OrjsonProvider, orjson
+from flask.json.provider import DefaultJSONProvider
+
+LIST_SIZES = (10, 1_000, 50_000)
+
+
+def build_grocery_list(number_of_items):
+    grocery_list = GroceryList("Benchmark list")
+    grocery_list.id = 1
+    grocery_list.grocery_items = []
+    for i in range(number_of_items):
+        item = GroceryItem(f"Item {i}", quantity=i % 5 + 1)
+        item.id = i + 1
+        if i % 2:
+            item.mark_as_purchased()
+        grocery_list.grocery_items.append(item)
+    grocery_list.updated_at = datetime.now()
+    return grocery_list
+
+
+def best_time(function, repeat):
+    """Best wall time over `repeat` runs, to reduce scheduler noise."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    providers = {"std": DefaultJSONProvider(app)}
+    if orjson is not None:
+        providers["orjson"] = OrjsonProvider(app)
+    else:
+        print("orjson is not installed, only the std backend is measured")
+
+    print(
+        f"{'items':>8} {'backend':>8} {'encode ms':>10} {'total ms':>10} "
+        f"{'items/s':>12}"
+    )
+    with app.app_context():
+        for size in LIST_SIZES:
+            grocery_list = build_grocery_list(size)
+            payload = grocery_list.to_dict()
+            for name, provider in providers.items():
+                encode = best_time(
+                    lambda provider=provider, payload=payload: (
+                        provider.response(payload).get_data()
+                    ),
+                    args.repeat,
+                )
+                total = best_time(
+                    lambda provider=provider, grocery_list=grocery_list: (
+                        provider.response(grocery_list.to_dict()).get_data()
+                    ),
+                    args.repeat,
+                )
+                print(
+                    f"{size:>8} {name:>8} {encode * 1000:>10.2f} "
+                    f"{total * 1000:>10.2f} {size / total:>12,.0f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Benchmark container startup: the time to import the app, to check or run
+migrations and, with the production server, to answer the first request.
+
+Each step runs in a fresh interpreter, as in a new container:
+
+- import: `import entrypoints.flask_app`
+- migrate: `python -m entrypoints.migrate` on a database already at the
+  head revision, against `flask db upgrade` doing the same no-op
+- first 200: from starting `python -m entrypoints.serve` (one worker) until
+  GET /api/v1/grocery-lists returns 200
+
+Usage:
+    uv run python -m benchmarks.startup [--url sqlite:////tmp/startup.db]
+        [--repeat 5]
+
+`--url` may point at a PostgreSQL database; use a scratch one, since the
+benchmark creates the tables and stamps them at the head revision.
+"""
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+IMPORT_APP = (
+    "import time; start = time.perf_counter(); "
+    "import entrypoints.flask_app; print(time.perf_counter() - start)"
+)
+
+
+def prepare_database(url):
+    """Create the tables and record them as migrated to the head revision."""
+    from flask_migrate import stamp
+
+    from config import DatabaseConfig
+    from entrypoints.flask_app import create_app, db, init_migrations
+    from entrypoints.migrate import MIGRATIONS_DIRECTORY
+
+    app = create_app({"DATABASE_CONFIG": DatabaseConfig(uri=url)})
+    init_migrations(app)
+    with app.app_context():
+        db.create_all()
+        stamp(directory=str(MIGRATIONS_DIRECTORY))
+
+
+def run_timed(command, env):
+    """Wall time of running `command` to completion."""
+    start = time.perf_counter()
+    subprocess.run(command, env=env, check=True, capture_output=True)
+    return time.perf_counter() - start
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def time_to_first_200(env, timeout=30.0):
+    """Seconds from starting the production server to its first 200."""
+    port = free_port()
+    env = {**env, "SERVER_BIND": f"127.0.0.1:{port}", "WEB_CONCURRENCY": "1"}
+    url = f"http://127.0.0.1:{port}/api/v1/grocery-lists"
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "entrypoints.serve"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except (OSError, urllib.error.URLError):
+                pass
+            time.sleep(0.01)
+        raise RuntimeError(f"No 200 from {url} within {timeout}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    url = args.url or "sqlite:///" + os.path.join(
+        tempfile.mkdtemp(), "startup.db"
+    )
+    prepare_database(url)
+    env = {
+        **os.environ,
+        "DATABASE_URL": url,
+        "FLASK_APP": "entrypoints/flask_app.py",
+    }
+
+    timings = {
+        "import app": lambda: float(
+            subprocess.run(
+                [sys.executable, "-c", IMPORT_APP],
+                env=env,
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+        ),
+        "entrypoints.migrate": lambda: run_timed(
+            [sys.executable, "-m", "entrypoints.migrate"], env
+        ),
+        "flask db upgrade": lambda: run_timed(
+            [sys.executable, "-m", "flask", "db", "upgrade"], env
+        ),
+        "first 200": lambda: time_to_first_200(env),
+    }
+    print(f"{'step':>20} {'median ms':>10} {'min ms':>10}")
+    for name, measure in timings.items():
+        samples = [measure() for _ in range(args.repeat)]
+        print(
+            f"{name:>20} {statistics.median(samples) * 1000:>10.1f} "
+            f"{min(samples) * 1000:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
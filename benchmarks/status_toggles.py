@@ -0,0 +1,144 @@
+"""
+Benchmark item status toggles under concurrent load, committed one request
+at a time against the group commit of STATUS_WRITE_BUFFER.
+
+`--concurrency` clients each send `--toggles` purchase/unpurchase requests
+back to back through the Flask test client, on random items of one list of
+`--items` items. Reports toggles per second, latency percentiles and the
+number of transactions committed, for each mode.
+
+Usage:
+    uv run python -m benchmarks.status_toggles [--url sqlite:////tmp/t.db]
+        [--concurrency 16] [--toggles 50] [--items 20] [--interval-ms 5]
+
+Commits only cost an fsync on a durable database, so use a file (the
+default) or a scratch PostgreSQL database rather than `sqlite://`; the
+benchmark drops and recreates the tables.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+
+from sqlalchemy import event, insert, select
+
+from adapters.orm import grocery_items, grocery_lists, metadata
+from config import DatabaseConfig
+from entrypoints.flask_app import create_app, db
+
+
+def seed(engine, items):
+    """Create one list of `items` items; returns the item IDs."""
+    metadata.drop_all(engine)
+    metadata.create_all(engine)
+    with engine.begin() as connection:
+        list_id = connection.execute(
+            insert(grocery_lists).values(name="Store run")
+        ).inserted_primary_key[0]
+        connection.execute(
+            insert(grocery_items),
+            [
+                {
+                    "name": f"Item {i}",
+                    "quantity": 1,
+                    "grocery_list_id": list_id,
+                }
+                for i in range(items)
+            ],
+        )
+        return list(connection.scalars(select(grocery_items.c.id)))
+
+
+def run_client(app, item_ids, toggles, latencies, errors):
+    client = app.test_client()
+    for _ in range(toggles):
+        action = random.choice(("purchase", "unpurchase"))
+        path = f"/api/v1/grocery-items/{random.choice(item_ids)}/{action}"
+        start = time.perf_counter()
+        response = client.post(path)
+        if response.status_code != 200:
+            errors.append(response.status_code)
+            continue
+        latencies.append(time.perf_counter() - start)
+
+
+def run_mode(url, buffered, args):
+    app = create_app(
+        {
+            "DATABASE_CONFIG": DatabaseConfig(uri=url),
+            "CACHE_INVALIDATION": "local",
+            "METRICS": False,
+            "SERVER_TIMING": False,
+            "STATUS_WRITE_BUFFER": buffered,
+            "STATUS_FLUSH_INTERVAL": args.interval_ms / 1000,
+        }
+    )
+    with app.app_context():
+        engine = db.engine
+        item_ids = seed(engine, args.items)
+        commits = []
+        event.listen(engine, "commit", lambda connection: commits.append(1))
+
+        latencies, errors = [], []
+        clients = [
+            threading.Thread(
+                target=run_client,
+                args=(app, item_ids, args.toggles, latencies, errors),
+            )
+            for _ in range(args.concurrency)
+        ]
+        start = time.perf_counter()
+        for client in clients:
+            client.start()
+        for client in clients:
+            client.join()
+        elapsed = time.perf_counter() - start
+        engine.dispose()
+
+    latencies.sort()
+    return {
+        "toggles/s": len(latencies) / elapsed,
+        "p50 ms": statistics.median(latencies) * 1000,
+        "p95 ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        "commits": len(commits),
+        "errors": len(errors),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--toggles", type=int, default=50)
+    parser.add_argument("--items", type=int, default=20)
+    parser.add_argument("--interval-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    url = args.url
+    if url is None:
+        path = os.path.join(tempfile.mkdtemp(), "status_toggles.db")
+        url = f"sqlite:///{path}"
+
+    print(
+        f"{args.concurrency} clients x {args.toggles} toggles "
+        f"on {args.items} items, {url}"
+    )
+    print(
+        f"{'mode':<16}{'toggles/s':>11}{'p50 ms':>9}{'p95 ms':>9}"
+        f"{'commits':>9}{'errors':>8}"
+    )
+    for mode, buffered in (("per request", False), ("group commit", True)):
+        result = run_mode(url, buffered, args)
+        print(
+            f"{mode:<16}{result['toggles/s']:>11.0f}{result['p50 ms']:>9.2f}"
+            f"{result['p95 ms']:>9.2f}{result['commits']:>9}"
+            f"{result['errors']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,326 @@
 import os
+from dataclasses import dataclass, fields
+from typing import Mapping, Optional
 
 
-def get_postgres_uri():
-    host = os.environ.get("DB_HOST", "localhost")
+def get_postgres_uri(environ: Optional[Mapping[str, str]] = None):
+    environ = os.environ if environ is None else environ
+    host = environ.get("DB_HOST", "localhost")
     port = 54321 if host == "localhost" else 5432
-    password = os.environ.get("DB_PASSWORD", "abc123")
+    password = environ.get("DB_PASSWORD", "abc123")
     user, db_name = (
-        os.environ.get("DB_USER", "myuser"),
-        os.environ.get("DB_NAME", "grocery"),
+        environ.get("DB_USER", "myuser"),
+        environ.get("DB_NAME", "grocery"),
     )
-    return f"postgresql://{user}:{password}@{host}:{port}/{db_name}"
\ No newline at end of file
+    return f"postgresql://{user}:{password}@{host}:{port}/{db_name}"
+
+
+def get_raise_on_lazy_load():
+    return os.environ.get("RAISE_ON_LAZY_LOAD", "0").lower() in (
+        "1",
+        "true",
+        "yes",
+    )
+
+
+def get_entity_cache_size():
+    # Maximum number of cached grocery lists per process, 0 disables caching
+    return int(os.environ.get("ENTITY_CACHE_SIZE", "1024"))
+
+
+def get_entity_cache_ttl():
+    return float(os.environ.get("ENTITY_CACHE_TTL", "30"))
+
+
+def get_cache_invalidation():
+    # "local" keeps invalidations in-process; "postgres" broadcasts them to
+    # every worker through LISTEN/NOTIFY
+    return os.environ.get("CACHE_INVALIDATION", "local")
+
+
+def get_json_backend():
+    # "auto" uses orjson when installed, "std" forces the standard library
+    return os.environ.get("JSON_BACKEND", "auto")
+
+
+def get_db_json_documents():
+    # Let the database build full grocery list documents (json_agg) instead
+    # of loading and serializing ORM objects
+    return os.environ.get("DB_JSON_DOCUMENTS", "0").lower() in (
+        "1",
+        "true",
+        "yes",
+    )
+
+
+def get_warm_up():
+    # Compile the hot queries and fill the connection pool at startup
+    return os.environ.get("WARM_UP", "0").lower() in ("1", "true", "yes")
+
+
+def get_server_timing():
+    # Time SQL, ORM and serialization work per request, reported in a
+    # Server-Timing header and a log line
+    return os.environ.get("SERVER_TIMING", "1").lower() in ("1", "true", "yes")
+
+
+def get_metrics():
+    # Serve Prometheus metrics at /metrics
+    return os.environ.get("METRICS", "1").lower() in ("1", "true", "yes")
+
+
+def get_single_flight():
+    # Share one query and payload between concurrent reads of the same list
+    return os.environ.get("SINGLE_FLIGHT", "1").lower() in ("1", "true", "yes")
+
+
+def get_single_flight_window():
+    # Seconds a shared list read is reused after it completes, 0 only
+    # shares reads in flight
+    return float(os.environ.get("SINGLE_FLIGHT_WINDOW_MS", "50")) / 1000
+
+
+def get_status_write_buffer():
+    # Commit item purchase/unpurchase toggles in batches (group commit)
+    return os.environ.get("STATUS_WRITE_BUFFER", "0").lower() in (
+        "1",
+        "true",
+        "yes",
+    )
+
+
+def get_status_flush_interval():
+    # Seconds toggles wait for others before their batch is committed
+    return float(os.environ.get("STATUS_FLUSH_INTERVAL_MS", "5")) / 1000
+
+
+def get_status_flush_max_batch():
+    # Items per batch; a full batch is committed without waiting
+    return int(os.environ.get("STATUS_FLUSH_MAX_BATCH", "100"))
+
+
+def get_slow_query_threshold():
+    # Log statements taking at least this many seconds, 0 disables the log
+    return float(os.environ.get("SLOW_QUERY_MS", "0")) / 1000
+
+
+def get_profile_dir():
+    # Directory for request profiles; profiling is disabled when unset
+    return os.environ.get("PROFILE_DIR") or None
+
+
+def get_profile_token():
+    # Requests sending this value in X-Profile-Token are profiled
+    return os.environ.get("PROFILE_TOKEN", "")
+
+
+def get_profile_sample_rate():
+    # Fraction of requests profiled without the token, between 0 and 1
+    return float(os.environ.get("PROFILE_SAMPLE_RATE", "0"))
+
+
+def get_profile_max_files():
+    # Number of profiles kept in PROFILE_DIR, older ones are deleted
+    return int(os.environ.get("PROFILE_MAX_FILES", "100"))
+
+
+class ConfigError(ValueError):
+    """Raised at startup when a setting is missing or invalid."""
+
+
+def _parse_bool(value: str) -> bool:
+    if value.lower() in ("1", "true", "yes"):
+        return True
+    if value.lower() in ("0", "false", "no"):
+        return False
+    raise ValueError(f"expected a boolean, got {value!r}")
+
+
+@dataclass(frozen=True)
+class DatabaseConfig:
+    """
+    Engine and connection pool settings.
+
+    Every field is read from the environment variable named in
+    DATABASE_ENV_VARS, falling back to a KEY=VALUE file given by
+    DB_CONFIG_FILE, then to the defaults below.
+    """
+
+    uri: str
+    # Connections kept open per process, plus extra ones opened in bursts
+    pool_size: int = 10
+    max_overflow: int = 20
+    # Seconds a request waits for a free connection before failing
+    pool_timeout: float = 30.0
+    # Test connections on checkout so restarts of the database are survived
+    pool_pre_ping: bool = True
+    # Seconds after which a connection is replaced, -1 to never recycle
+    pool_recycle: int = 1800
+    # Milliseconds before the server cancels a statement, 0 to disable
+    statement_timeout: int = 0
+    application_name: str = "grocery-app-backend"
+    # Behind PgBouncer (transaction pooling): no client-side pool, no
+    # session-level settings and no server-side prepared statements
+    pgbouncer: bool = False
+    # Log a warning when a checkout waits longer than this many seconds
+    pool_wait_warning: float = 0.1
+
+    def validate(self) -> "DatabaseConfig":
+        """Raise ConfigError when the settings are inconsistent."""
+        if not self.uri:
+            raise ConfigError("The database URI is empty")
+        if self.pool_size < 1:
+            raise ConfigError("DB_POOL_SIZE must be at least 1")
+        if self.max_overflow < 0:
+            raise ConfigError("DB_MAX_OVERFLOW cannot be negative")
+        if self.pool_timeout <= 0:
+            raise ConfigError("DB_POOL_TIMEOUT must be positive")
+        if self.pool_recycle < -1 or self.pool_recycle == 0:
+            raise ConfigError("DB_POOL_RECYCLE must be positive or -1")
+        if self.statement_timeout < 0:
+            raise ConfigError("DB_STATEMENT_TIMEOUT cannot be negative")
+        if self.pool_wait_warning < 0:
+            raise ConfigError("DB_POOL_WAIT_WARNING cannot be negative")
+        return self
+
+
+DATABASE_ENV_VARS = {
+    "uri": "DATABASE_URL",
+    "pool_size": "DB_POOL_SIZE",
+    "max_overflow": "DB_MAX_OVERFLOW",
+    "pool_timeout": "DB_POOL_TIMEOUT",
+    "pool_pre_ping": "DB_POOL_PRE_PING",
+    "pool_recycle": "DB_POOL_RECYCLE",
+    "statement_timeout": "DB_STATEMENT_TIMEOUT",
+    "application_name": "DB_APPLICATION_NAME",
+    "pgbouncer": "DB_PGBOUNCER",
+    "pool_wait_warning": "DB_POOL_WAIT_WARNING",
+}
+
+
+def read_config_file(path: str) -> dict:
+    """Read a KEY=VALUE file; blank lines and # comments are ignored."""
+    values = {}
+    with open(path) as config_file:
+        for line_number, line in enumerate(config_file, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            key, separator, value = line.partition("=")
+            if not separator:
+                raise ConfigError(f"{path}:{line_number}: expected KEY=VALUE")
+            values[key.strip()] = value.strip().strip("\"'")
+    return values
+
+
+def get_database_config(
+    environ: Optional[Mapping[str, str]] = None,
+) -> DatabaseConfig:
+    """Load and validate the database settings."""
+    environ = os.environ if environ is None else environ
+    settings = {}
+    config_file = environ.get("DB_CONFIG_FILE")
+    if config_file:
+        settings.update(read_config_file(config_file))
+    settings.update(environ)
+
+    values = {"uri": get_postgres_uri(settings)}
+    values.update(_parse_settings(DatabaseConfig, DATABASE_ENV_VARS, settings))
+    return DatabaseConfig(**values).validate()
+
+
+def _parse_settings(
+    config_class: type, env_vars: dict, settings: Mapping[str, str]
+) -> dict:
+    """Convert the raw settings present to the config class' field types."""
+    types = {field.name: field.type for field in fields(config_class)}
+    values = {}
+    for name, env_var in env_vars.items():
+        if env_var not in settings:
+            continue
+        raw = settings[env_var]
+        parse = {bool: _parse_bool, int: int, float: float}.get(
+            types[name], str
+        )
+        try:
+            values[name] = parse(raw)
+        except ValueError as e:
+            raise ConfigError(f"Invalid {env_var}={raw!r}: {e}") from e
+    return values
+
+
+@dataclass(frozen=True)
+class ServerConfig:
+    """
+    Settings of the production WSGI server (see entrypoints/serve.py), read
+    from the environment variables named in SERVER_ENV_VARS.
+    """
+
+    bind: str = "0.0.0.0:5000"
+    # Worker processes, 0 for one per CPU core
+    workers: int = 0
+    # Threads per worker; each one may hold a pooled database connection
+    threads: int = 4
+    # Restart a worker after this many requests (plus up to the jitter, so
+    # workers do not all restart at once), 0 to never restart
+    max_requests: int = 1000
+    max_requests_jitter: int = 100
+    # Seconds before a silent worker is killed, and before workers still
+    # finishing requests are killed on reload or shutdown
+    timeout: int = 30
+    graceful_timeout: int = 30
+    # Seconds an idle keep-alive connection stays open
+    keepalive: int = 5
+    # Connections queued by the kernel before new ones are refused
+    backlog: int = 2048
+    # Create the app once in the master process before forking workers
+    preload: bool = True
+
+    def worker_count(self) -> int:
+        """
+        Configured workers, or one per CPU core: the threads of a worker
+        already overlap requests waiting on the database, and each extra
+        worker holds database connections of its own.
+        """
+        return self.workers or os.cpu_count() or 1
+
+    def validate(self) -> "ServerConfig":
+        """Raise ConfigError when the settings are inconsistent."""
+        if not self.bind:
+            raise ConfigError("SERVER_BIND is empty")
+        if self.workers < 0:
+            raise ConfigError("WEB_CONCURRENCY cannot be negative")
+        for name in ("threads", "timeout", "graceful_timeout", "backlog"):
+            if getattr(self, name) < 1:
+                raise ConfigError(
+                    f"{SERVER_ENV_VARS[name]} must be at least 1"
+                )
+        for name in ("max_requests", "max_requests_jitter", "keepalive"):
+            if getattr(self, name) < 0:
+                raise ConfigError(
+                    f"{SERVER_ENV_VARS[name]} cannot be negative"
+                )
+        return self
+
+
+SERVER_ENV_VARS = {
+    "bind": "SERVER_BIND",
+    "workers": "WEB_CONCURRENCY",
+    "threads": "SERVER_THREADS",
+    "max_requests": "SERVER_MAX_REQUESTS",
+    "max_requests_jitter": "SERVER_MAX_REQUESTS_JITTER",
+    "timeout": "SERVER_TIMEOUT",
+    "graceful_timeout": "SERVER_GRACEFUL_TIMEOUT",
+    "keepalive": "SERVER_KEEPALIVE",
+    "backlog": "SERVER_BACKLOG",
+    "preload": "SERVER_PRELOAD",
+}
+
+
+def get_server_config(
+    environ: Optional[Mapping[str, str]] = None,
+) -> ServerConfig:
+    """Load and validate the WSGI server settings."""
+    environ = os.environ if environ is None else environ
+    values = _parse_settings(ServerConfig, SERVER_ENV_VARS, environ)
+    return ServerConfig(**values).validate()
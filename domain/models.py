@@ -1,6 +1,6 @@
 from enum import Enum
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Optional, Protocol
 
 
 class ItemStatus(Enum):
@@ -17,24 +17,52 @@ class GroceryItem:
         self.created_at: datetime = datetime.now()
         self.updated_at: datetime = datetime.now()
 
+    @staticmethod
+    def purchased_changes() -> dict:
+        """Field changes applied when an item is marked as purchased."""
+        now = datetime.now()
+        return {
+            "status": ItemStatus.PURCHASED,
+            "purchased_at": now,
+            "updated_at": now,
+        }
+
+    @staticmethod
+    def pending_changes() -> dict:
+        """Field changes applied when an item is marked as pending."""
+        return {
+            "status": ItemStatus.PENDING,
+            "purchased_at": None,
+            "updated_at": datetime.now(),
+        }
+
+    def _apply(self, changes: dict):
+        for field, value in changes.items():
+            setattr(self, field, value)
+
     def mark_as_purchased(self):
-        self.status = ItemStatus.PURCHASED
-        self.purchased_at = datetime.now()
-        self.updated_at = datetime.now()
+        self._apply(self.purchased_changes())
 
     def mark_as_pending(self):
-        self.status = ItemStatus.PENDING
-        self.purchased_at = None
-        self.updated_at = datetime.now()
+        self._apply(self.pending_changes())
+
+    @staticmethod
+    def update_changes(
+        name: Optional[str] = None, quantity: Optional[int] = None
+    ) -> dict:
+        """Field changes applied when an item's name or quantity is updated."""
+        changes = {}
+        if name is not None:
+            changes["name"] = name
+        if quantity is not None:
+            changes["quantity"] = quantity
+        changes["updated_at"] = datetime.now()
+        return changes
 
     def update(
         self, name: Optional[str] = None, quantity: Optional[int] = None
     ):
-        if name is not None:
-            self.name = name
-        if quantity is not None:
-            self.quantity = quantity
-        self.updated_at = datetime.now()
+        self._apply(self.update_changes(name=name, quantity=quantity))
 
     def to_dict(self) -> dict:
         """Convert GroceryItem to dictionary for JSON serialization."""
@@ -51,6 +79,15 @@ class GroceryItem:
         }
 
 
+class ItemFinder(Protocol):
+    """
+    Looks up grocery items by column values in a data store, e.g. an item
+    repository of the adapters layer.
+    """
+
+    def find_by(self, load=None, **filters) -> List[GroceryItem]: ...
+
+
 class GroceryList:
     def __init__(self, name: str):
         self.name = name
@@ -71,19 +108,28 @@ class GroceryList:
             self.grocery_items.remove(item_to_remove)
             self.updated_at = datetime.now()
 
-    def get_pending_items(self) -> List[GroceryItem]:
-        return [
-            item
-            for item in self.grocery_items
-            if item.status == ItemStatus.PENDING
-        ]
-
-    def get_purchased_items(self) -> List[GroceryItem]:
-        return [
-            item
-            for item in self.grocery_items
-            if item.status == ItemStatus.PURCHASED
-        ]
+    def get_pending_items(
+        self, item_repo: Optional[ItemFinder] = None
+    ) -> List[GroceryItem]:
+        return self._get_items_with_status(ItemStatus.PENDING, item_repo)
+
+    def get_purchased_items(
+        self, item_repo: Optional[ItemFinder] = None
+    ) -> List[GroceryItem]:
+        return self._get_items_with_status(ItemStatus.PURCHASED, item_repo)
+
+    def _get_items_with_status(
+        self,
+        status: ItemStatus,
+        item_repo: Optional[ItemFinder] = None,
+    ) -> List[GroceryItem]:
+        """
+        Items with the given status. With an item repository the filter runs
+        in the data store instead of loading the whole item collection.
+        """
+        if item_repo is not None:
+            return item_repo.find_by(grocery_list_id=self.id, status=status)
+        return [item for item in self.grocery_items if item.status == status]
 
     def update(self, name: Optional[str] = None):
         """Update grocery list properties."""
@@ -91,6 +137,18 @@ class GroceryList:
             self.name = name
         self.updated_at = datetime.now()
 
+    @staticmethod
+    def touch_changes(changed_at: Optional[datetime] = None) -> dict:
+        """
+        Field changes applied to a list when its items are added, changed
+        or removed, so the list's updated_at covers its items.
+        """
+        return {"updated_at": changed_at or datetime.now()}
+
+    def touch(self, changed_at: Optional[datetime] = None):
+        """Record that the list's items changed at `changed_at`."""
+        self.updated_at = self.touch_changes(changed_at)["updated_at"]
+
     def to_dict(self) -> dict:
         """Convert GroceryList to dictionary for JSON serialization."""
         return {
@@ -1,8 +1,16 @@
 #!/bin/sh
 set -e
 
-# Run migrations
-uv run flask db upgrade
+# Metrics of the gunicorn workers are shared through this directory, which
+# must exist and not hold files of a previous run (see entrypoints/metrics.py)
+if [ -n "$PROMETHEUS_MULTIPROC_DIR" ]; then
+    rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+    mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+fi
 
-# Start the app
-exec uv run flask run --host=0.0.0.0 --port=5000
+# Run migrations, skipped when the database is already at the latest
+# revision (see entrypoints/migrate.py)
+uv run python -m entrypoints.migrate
+
+# Start the app under gunicorn (see entrypoints/serve.py)
+exec uv run python -m entrypoints.serve
@@ -0,0 +1,555 @@
+"""
+ASGI variant of the API, serving the same /api/v1 routes as
+entrypoints.flask_app on asyncio: requests waiting on the database do not
+hold a thread, so one process can keep thousands of connections open.
+
+Validation and serialization are shared with the Flask app
+(entrypoints.validation, the domain's `to_dict` and the JSON backends).
+Requires the `async` extra (`uv sync --extra async`). Run with:
+
+    uv run uvicorn entrypoints.asgi_app:create_asgi_app --factory
+
+The per-process grocery list cache of the Flask app is not used here.
+"""
+
+import contextlib
+import dataclasses
+import functools
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Route
+from werkzeug.http import http_date
+
+from adapters.async_repository import AsyncSqlAlchemyRepository
+from adapters.database import (
+    async_database_uri,
+    engine_options,
+    install_engine_events,
+    pool_stats,
+)
+from adapters.instrumentation import (
+    end_request,
+    install_query_instrumentation,
+    log_request,
+    start_request,
+    timed,
+)
+from adapters.orm import start_mappers
+from domain.models import GroceryItem, GroceryList
+from entrypoints.json_provider import make_json_encoder
+from entrypoints.settings import LIST_DETAIL_LOAD, LIST_INDEX_LOAD, SETTINGS
+from entrypoints.validation import (
+    is_not_modified,
+    make_validators,
+    parse_item_selection,
+    parse_pagination_args,
+    parse_status_filter,
+    validate_item_update,
+    validate_list_name,
+    validate_new_item,
+    validate_new_items,
+)
+from service_layer.async_services import (
+    AsyncGroceryItemService,
+    AsyncGroceryListService,
+)
+
+JSON_MEDIA_TYPE = "application/json"
+
+
+def json_response(request: Request, data, status_code: int = 200):
+    """Encode `data` with the app's JSON backend."""
+    with timed("serialize"):
+        body = request.app.state.encode_json(data)
+    return Response(body, status_code=status_code, media_type=JSON_MEDIA_TYPE)
+
+
+def error_response(request: Request, message: str, status_code: int):
+    return json_response(request, {"error": message}, status_code)
+
+
+async def read_json(request: Request):
+    """The parsed request body, or None when it is missing or invalid."""
+    try:
+        return await request.json()
+    except ValueError:
+        return None
+
+
+def with_validators(response: Response, etag, last_modified):
+    """Attach the ETag and Last-Modified headers to a response."""
+    response.headers["ETag"] = f'"{etag}"'
+    if last_modified is not None:
+        response.headers["Last-Modified"] = http_date(last_modified)
+    # Clients may store the response but must revalidate before reusing it
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+
+def request_not_modified(request: Request, etag, last_modified):
+    """Evaluate the request's conditional headers."""
+    return is_not_modified(
+        etag,
+        last_modified,
+        request.headers.get("if-none-match"),
+        request.headers.get("if-modified-since"),
+    )
+
+
+def etag_for(request: Request, version):
+    """ETag and Last-Modified for the request, see make_validators."""
+    return make_validators(
+        version, request.url.path, request.url.query.encode()
+    )
+
+
+def endpoint(handler):
+    """
+    Run a route handler with a database session, passed as its second
+    argument. Uncommitted changes are rolled back when the session closes,
+    and errors are reported as 500 responses. With SERVER_TIMING, the
+    request's timings are reported as in the Flask app.
+    """
+
+    @functools.wraps(handler)
+    async def run(request: Request):
+        timings = None
+        if request.app.state.settings["SERVER_TIMING"]:
+            timings = start_request()
+        try:
+            try:
+                async with request.app.state.sessionmaker() as session:
+                    response = await handler(request, session)
+            except Exception as e:
+                response = error_response(request, str(e), 500)
+            if timings is not None:
+                timings.finish()
+                response.headers["Server-Timing"] = timings.server_timing()
+                log_request(
+                    timings,
+                    method=request.method,
+                    path=request.url.path,
+                    endpoint=handler.__name__,
+                    status=response.status_code,
+                )
+            return response
+        finally:
+            end_request()
+
+    return run
+
+
+def make_repository(request: Request, session, model_class, load=None):
+    """Create a repository bound to the request's session."""
+    return AsyncSqlAlchemyRepository(
+        session,
+        model_class,
+        load=load,
+        raise_on_lazy_load=request.app.state.settings["RAISE_ON_LAZY_LOAD"],
+    )
+
+
+def make_item_service(request: Request, session) -> AsyncGroceryItemService:
+    return AsyncGroceryItemService(
+        make_repository(request, session, GroceryItem),
+        make_repository(request, session, GroceryList),
+    )
+
+
+async def get_pool_status(request: Request):
+    """Live statistics of the database connection pool."""
+    return json_response(
+        request, pool_stats(request.app.state.engine.sync_engine)
+    )
+
+
+@endpoint
+async def get_grocery_lists(request: Request, session):
+    """Get a page of grocery lists, ordered by ID."""
+    limit, after, error = parse_pagination_args(request.query_params)
+    if error:
+        return error_response(request, error, 400)
+
+    service = AsyncGroceryListService(
+        make_repository(request, session, GroceryList, load=LIST_INDEX_LOAD)
+    )
+    page = await service.get_grocery_lists_page(limit, after)
+    return json_response(
+        request,
+        {
+            "grocery_lists": [
+                grocery_list.to_dict()
+                for grocery_list in page["grocery_lists"]
+            ],
+            "next_cursor": page["next_cursor"],
+        },
+    )
+
+
+@endpoint
+async def create_grocery_list(request: Request, session):
+    """Create a new grocery list."""
+    name, error = validate_list_name(await read_json(request))
+    if error:
+        return error_response(request, error, 400)
+
+    service = AsyncGroceryListService(
+        make_repository(request, session, GroceryList)
+    )
+    grocery_list = await service.create_grocery_list(name)
+    await session.commit()
+    return json_response(request, grocery_list.to_dict(), 201)
+
+
+@endpoint
+async def get_grocery_list(request: Request, session):
+    """Get a grocery list by ID."""
+    list_id = request.path_params["list_id"]
+    service = AsyncGroceryListService(
+        make_repository(request, session, GroceryList, load=LIST_DETAIL_LOAD)
+    )
+
+    # Answer polls for an unchanged list from one aggregate query
+    version = await service.get_grocery_list_version(list_id)
+    if version is None:
+        return error_response(request, "Grocery list not found", 404)
+
+    etag, last_modified = etag_for(request, version)
+    if request_not_modified(request, etag, last_modified):
+        return with_validators(Response(status_code=304), etag, last_modified)
+
+    if request.app.state.settings["DB_JSON_DOCUMENTS"]:
+        document = await service.get_grocery_list_json(list_id)
+        if document is None:
+            return error_response(request, "Grocery list not found", 404)
+        response = Response(document, media_type=JSON_MEDIA_TYPE)
+        return with_validators(response, etag, last_modified)
+
+    grocery_list = await service.get_grocery_list(list_id)
+    if not grocery_list:
+        return error_response(request, "Grocery list not found", 404)
+    response = json_response(request, grocery_list.to_dict())
+    return with_validators(response, etag, last_modified)
+
+
+@endpoint
+async def update_grocery_list(request: Request, session):
+    """Update a grocery list's name."""
+    name, error = validate_list_name(await read_json(request))
+    if error:
+        return error_response(request, error, 400)
+
+    service = AsyncGroceryListService(
+        make_repository(request, session, GroceryList, load=LIST_DETAIL_LOAD)
+    )
+    updated_list = await service.update_grocery_list(
+        request.path_params["list_id"], name
+    )
+    if not updated_list:
+        return error_response(request, "Grocery list not found", 404)
+
+    await session.commit()
+    return json_response(request, updated_list.to_dict())
+
+
+@endpoint
+async def delete_grocery_list(request: Request, session):
+    """Delete a grocery list by ID."""
+    service = AsyncGroceryListService(
+        make_repository(request, session, GroceryList)
+    )
+    if not await service.delete_grocery_list(request.path_params["list_id"]):
+        return error_response(request, "Grocery list not found", 404)
+
+    await session.commit()
+    return json_response(
+        request, {"message": "Grocery list deleted successfully"}
+    )
+
+
+@endpoint
+async def get_items_by_list(request: Request, session):
+    """
+    Get a page of items for a specific grocery list, ordered by ID.
+    Optionally filtered with `?status=pending|purchased`.
+    """
+    limit, after, error = parse_pagination_args(request.query_params)
+    if error:
+        return error_response(request, error, 400)
+    status, error = parse_status_filter(request.query_params.get("status"))
+    if error:
+        return error_response(request, error, 400)
+
+    list_id = request.path_params["list_id"]
+    list_service = AsyncGroceryListService(
+        make_repository(request, session, GroceryList)
+    )
+
+    # Answer polls for an unchanged list from one aggregate query
+    version = await list_service.get_grocery_list_version(list_id)
+    if version is None:
+        return error_response(request, "Grocery list not found", 404)
+
+    etag, last_modified = etag_for(request, version)
+    if request_not_modified(request, etag, last_modified):
+        return with_validators(Response(status_code=304), etag, last_modified)
+
+    result = await make_item_service(request, session).get_items_by_list(
+        list_id, limit, after, status
+    )
+    if result is None:
+        return error_response(request, "Grocery list not found", 404)
+
+    response = json_response(
+        request,
+        {
+            "grocery_list_name": result["grocery_list_name"],
+            "items": [item.to_dict() for item in result["items"]],
+            "next_cursor": result["next_cursor"],
+        },
+    )
+    return with_validators(response, etag, last_modified)
+
+
+@endpoint
+async def add_item_to_list(request: Request, session):
+    """Add a new item to a grocery list."""
+    name, quantity, error = validate_new_item(await read_json(request))
+    if error:
+        return error_response(request, error, 400)
+
+    item = await make_item_service(request, session).add_item_to_list(
+        request.path_params["list_id"], name, quantity
+    )
+    if not item:
+        return error_response(request, "Grocery list not found", 404)
+
+    await session.commit()
+    return json_response(request, item.to_dict(), 201)
+
+
+@endpoint
+async def add_items_to_list_bulk(request: Request, session):
+    """Add several items to a grocery list in a single statement."""
+    # Validate the whole batch before touching the database
+    items, error = validate_new_items(await read_json(request))
+    if error:
+        return error_response(request, error, 400)
+
+    new_items = await make_item_service(request, session).add_items_bulk(
+        request.path_params["list_id"], items
+    )
+    if new_items is None:
+        return error_response(request, "Grocery list not found", 404)
+
+    await session.commit()
+    return json_response(request, [item.to_dict() for item in new_items], 201)
+
+
+async def set_items_status(request: Request, session, purchased: bool):
+    """Apply a bulk status change to the items of a grocery list."""
+    item_ids, error = parse_item_selection(await read_json(request))
+    if error:
+        return error_response(request, error, 400)
+
+    service = make_item_service(request, session)
+    list_id = request.path_params["list_id"]
+    # Update every selected item in a single statement
+    if purchased:
+        items = await service.mark_items_as_purchased(list_id, item_ids)
+    else:
+        items = await service.mark_items_as_pending(list_id, item_ids)
+    if items is None:
+        return error_response(request, "Grocery list not found", 404)
+
+    await session.commit()
+    return json_response(request, [item.to_dict() for item in items])
+
+
+@endpoint
+async def mark_items_as_purchased(request: Request, session):
+    """Mark several items of a grocery list as purchased."""
+    return await set_items_status(request, session, purchased=True)
+
+
+@endpoint
+async def mark_items_as_pending(request: Request, session):
+    """Mark several items of a grocery list as pending (not purchased)."""
+    return await set_items_status(request, session, purchased=False)
+
+
+@endpoint
+async def update_grocery_item(request: Request, session):
+    """Update a grocery item's name and/or quantity."""
+    name, quantity, error = validate_item_update(await read_json(request))
+    if error:
+        return error_response(request, error, 400)
+
+    updated_item = await make_item_service(request, session).update_item(
+        request.path_params["item_id"], name=name, quantity=quantity
+    )
+    if not updated_item:
+        return error_response(request, "Grocery item not found", 404)
+
+    await session.commit()
+    return json_response(request, updated_item.to_dict())
+
+
+@endpoint
+async def mark_item_as_purchased(request: Request, session):
+    """Mark a grocery item as purchased."""
+    service = make_item_service(request, session)
+    updated_item = await service.mark_item_as_purchased(
+        request.path_params["item_id"]
+    )
+    if not updated_item:
+        return error_response(request, "Grocery item not found", 404)
+
+    await session.commit()
+    return json_response(request, updated_item.to_dict())
+
+
+@endpoint
+async def mark_item_as_pending(request: Request, session):
+    """Mark a grocery item as pending (not purchased)."""
+    service = make_item_service(request, session)
+    updated_item = await service.mark_item_as_pending(
+        request.path_params["item_id"]
+    )
+    if not updated_item:
+        return error_response(request, "Grocery item not found", 404)
+
+    await session.commit()
+    return json_response(request, updated_item.to_dict())
+
+
+@endpoint
+async def delete_grocery_item(request: Request, session):
+    """Delete a grocery item by ID."""
+    service = make_item_service(request, session)
+    if not await service.delete_item(request.path_params["item_id"]):
+        return error_response(request, "Grocery item not found", 404)
+
+    await session.commit()
+    return json_response(
+        request, {"message": "Grocery item deleted successfully"}
+    )
+
+
+routes = [
+    Route("/api/v1/status/pool", get_pool_status, methods=["GET"]),
+    Route("/api/v1/grocery-lists", get_grocery_lists, methods=["GET"]),
+    Route("/api/v1/grocery-lists", create_grocery_list, methods=["POST"]),
+    Route(
+        "/api/v1/grocery-lists/{list_id:int}",
+        get_grocery_list,
+        methods=["GET"],
+    ),
+    Route(
+        "/api/v1/grocery-lists/{list_id:int}",
+        update_grocery_list,
+        methods=["PUT"],
+    ),
+    Route(
+        "/api/v1/grocery-lists/{list_id:int}",
+        delete_grocery_list,
+        methods=["DELETE"],
+    ),
+    Route(
+        "/api/v1/grocery-lists/{list_id:int}/items",
+        get_items_by_list,
+        methods=["GET"],
+    ),
+    Route(
+        "/api/v1/grocery-lists/{list_id:int}/items",
+        add_item_to_list,
+        methods=["POST"],
+    ),
+    Route(
+        "/api/v1/grocery-lists/{list_id:int}/items/bulk",
+        add_items_to_list_bulk,
+        methods=["POST"],
+    ),
+    Route(
+        "/api/v1/grocery-lists/{list_id:int}/items/purchase",
+        mark_items_as_purchased,
+        methods=["POST"],
+    ),
+    Route(
+        "/api/v1/grocery-lists/{list_id:int}/items/unpurchase",
+        mark_items_as_pending,
+        methods=["POST"],
+    ),
+    Route(
+        "/api/v1/grocery-items/{item_id:int}",
+        update_grocery_item,
+        methods=["PATCH"],
+    ),
+    Route(
+        "/api/v1/grocery-items/{item_id:int}",
+        delete_grocery_item,
+        methods=["DELETE"],
+    ),
+    Route(
+        "/api/v1/grocery-items/{item_id:int}/purchase",
+        mark_item_as_purchased,
+        methods=["POST"],
+    ),
+    Route(
+        "/api/v1/grocery-items/{item_id:int}/unpurchase",
+        mark_item_as_pending,
+        methods=["POST"],
+    ),
+]
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app: Starlette):
+    yield
+    await app.state.engine.dispose()
+
+
+def create_asgi_app(overrides: Optional[dict] = None) -> Starlette:
+    """
+    Create the ASGI application, configured like
+    entrypoints.flask_app.create_app.
+    """
+    overrides = overrides or {}
+    settings = {
+        key: read() for key, read in SETTINGS.items() if key not in overrides
+    }
+    settings.update(overrides)
+
+    database_config = settings["DATABASE_CONFIG"]
+    database_config = dataclasses.replace(
+        database_config, uri=async_database_uri(database_config.uri)
+    )
+    engine = create_async_engine(
+        database_config.uri, **engine_options(database_config)
+    )
+    install_engine_events(engine.sync_engine, database_config)
+    install_query_instrumentation(
+        engine.sync_engine, settings["SLOW_QUERY_THRESHOLD"]
+    )
+    start_mappers()
+
+    app = Starlette(
+        routes=routes,
+        # Enable CORS for all routes
+        # For production use more specific origin
+        middleware=[Middleware(CORSMiddleware, allow_origins=["*"])],
+        lifespan=lifespan,
+    )
+    app.state.settings = settings
+    app.state.engine = engine
+    # Objects are not expired on commit, so responses are serialized from
+    # the rows already loaded instead of reloading them
+    app.state.sessionmaker = async_sessionmaker(engine, expire_on_commit=False)
+    app.state.encode_json = make_json_encoder(settings["JSON_BACKEND"])
+    return app
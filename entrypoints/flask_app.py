@@ -1,373 +1,890 @@
-from flask import Flask, request, jsonify
-from flask_migrate import Migrate
+import os
+import weakref
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Optional
+
+from flask import Blueprint, Flask, current_app, request, jsonify
 from flask_sqlalchemy import SQLAlchemy
-from flask_cors import CORS
 from adapters.orm import start_mappers, metadata
-from adapters.repository import SqlAlchemyRepository
+from sqlalchemy.orm import configure_mappers
+from adapters.database import (
+    engine_options,
+    install_engine_events,
+    pool_stats,
+)
+from adapters.instrumentation import (
+    current_timings,
+    end_request,
+    install_query_instrumentation,
+    log_request,
+    start_request,
+    timed,
+)
+from adapters.cache import (
+    EntityCache,
+    InProcessInvalidationChannel,
+    PostgresInvalidationChannel,
+    SingleFlight,
+)
+from entrypoints.json_provider import make_json_provider
+from entrypoints.metrics import init_metrics
+from entrypoints.profiling import init_profiling
 from service_layer.services import GroceryListService, GroceryItemService
-from domain.models import GroceryList, GroceryItem
+from service_layer.unit_of_work import SqlAlchemyUnitOfWork
+from service_layer.write_buffer import StatusWriteBuffer
+from entrypoints.validation import (
+    is_not_modified,
+    make_validators,
+    parse_item_selection,
+    parse_pagination_args,
+    parse_status_filter,
+    validate_item_update,
+    validate_list_name,
+    validate_new_item,
+    validate_new_items,
+    validate_batch,
+)
+from entrypoints.settings import LIST_DETAIL_LOAD, LIST_INDEX_LOAD, SETTINGS
 
 import config
 
+# Initialize SQLAlchemy with the metadata object holding table definitions.
+# Objects are not expired on commit, so responses are serialized from the rows
+# already loaded (or returned by UPDATE ... RETURNING) instead of reloading them.
+db = SQLAlchemy(metadata=metadata, session_options={"expire_on_commit": False})
+
+api = Blueprint("api", __name__, url_prefix="/api/v1")
+
+
+def create_app(overrides: Optional[dict] = None) -> Flask:
+    """
+    Create a configured application. `overrides` replaces any of the
+    default settings, e.g. {"DATABASE_CONFIG": DatabaseConfig("sqlite://")}.
+
+    Apart from mapping the domain classes once per process, nothing here
+    touches global state, so several apps can live in one process and an
+    app created in a prefork master is safe to use in its workers.
+    """
+    overrides = overrides or {}
+    app = Flask(__name__)
+    # Only read the environment for settings that are not overridden
+    app.config.update(
+        {key: read() for key, read in SETTINGS.items() if key not in overrides}
+    )
+    app.config.update(overrides)
+    database_config = app.config["DATABASE_CONFIG"]
+    app.config["SQLALCHEMY_DATABASE_URI"] = database_config.uri
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(database_config)
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+
+    # Enable CORS for all routes
+    # For production use more specific origin
+    from flask_cors import CORS
+
+    CORS(app)
+
+    # Configure Flask to redirect trailing slashes
+    app.url_map.strict_slashes = False
+
+    # Serialize responses with orjson when it is installed
+    app.json = make_json_provider(app, app.config["JSON_BACKEND"])
+
+    db.init_app(app)
+    # Flask-Migrate pulls in Alembic, which takes longer to import than the
+    # rest of the app; only the `flask db` commands need it
+    if os.environ.get("FLASK_RUN_FROM_CLI") == "true":
+        init_migrations(app)
+    start_mappers()
 
-app = Flask(__name__)
-
-# Enable CORS for all routes
-# For production use more specific origin
-CORS(app)
-
-# Configure Flask to redirect trailing slashes
-app.url_map.strict_slashes = False
-
-# Configure Flask-Migrate
-app.config["SQLALCHEMY_DATABASE_URI"] = config.get_postgres_uri()
-app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
-
-# Initialize SQLAlchemy with the app and metadata object holding table definitions.
-db = SQLAlchemy(app, metadata=metadata)
-
-# Initialize Flask-Migrate
-migrate = Migrate(app, db)
+    # Grocery lists are read far more often than written, so lookups that
+    # do not need their items (the list name of an items page, the list
+    # check of an item add) are served from a per-process cache.
+    # Invalidations go through a channel so that, with
+    # CACHE_INVALIDATION=postgres, every worker process drops stale lists.
+    if app.config["CACHE_INVALIDATION"] == "postgres":
+        invalidation_channel = PostgresInvalidationChannel(database_config.uri)
+    else:
+        invalidation_channel = InProcessInvalidationChannel()
+    app.extensions["grocery_list_cache"] = EntityCache(
+        maxsize=app.config["ENTITY_CACHE_SIZE"],
+        ttl=app.config["ENTITY_CACHE_TTL"],
+        channel=invalidation_channel,
+        namespace="grocery_lists",
+    )
+    # Shared reads are forgotten whenever the cache invalidates their list:
+    # when a write is made and again after it commits, or when another
+    # worker publishes an invalidation (CACHE_INVALIDATION=postgres only)
+    if app.config["SINGLE_FLIGHT"]:
+        flight = SingleFlight(window=app.config["SINGLE_FLIGHT_WINDOW"])
+        app.extensions["grocery_list_cache"].add_listener(flight.forget)
+        app.extensions["grocery_list_flight"] = flight
+
+    if app.config["STATUS_WRITE_BUFFER"]:
+        app.extensions["status_write_buffer"] = StatusWriteBuffer(
+            make_batch_applier(app),
+            interval=app.config["STATUS_FLUSH_INTERVAL"],
+            max_batch=app.config["STATUS_FLUSH_MAX_BATCH"],
+            timeout=status_flush_timeout(
+                database_config,
+                app.config["STATUS_FLUSH_INTERVAL"],
+                app.config["STATUS_FLUSH_MAX_BATCH"],
+            ),
+        )
 
-# start_mappers() needs an active application context to properly configure the mappers
-with app.app_context():
-    start_mappers()
+    with app.app_context():
+        install_engine_events(db.engine, database_config)
+        install_query_instrumentation(
+            db.engine, app.config["SLOW_QUERY_THRESHOLD"]
+        )
+        app.extensions["engines"] = list(db.engines.values())
+
+    if app.config["METRICS"]:
+        init_metrics(app)
+    init_profiling(app)
+
+    if app.config["SERVER_TIMING"]:
+        app.before_request(start_request_timing)
+        app.after_request(report_request_timing)
+        app.teardown_request(end_request_timing)
+
+    app.register_blueprint(api)
+    _apps.add(app)
+
+    if app.config["WARM_UP"]:
+        warm_up(app)
+    return app
+
+
+def init_migrations(app: Flask) -> None:
+    """Register Flask-Migrate and its `flask db` commands on `app`."""
+    from flask_migrate import Migrate
+
+    Migrate(app, db)
+
+
+def make_unit_of_work(list_load=None, cached=True) -> SqlAlchemyUnitOfWork:
+    """
+    Create a unit of work on the request's session, reading grocery lists
+    with the `list_load` loading strategies, through the app's cache unless
+    `cached` is False.
+    """
+    list_cache = current_app.extensions["grocery_list_cache"]
+    return SqlAlchemyUnitOfWork(
+        db.session,
+        list_cache=list_cache if cached else None,
+        list_load=list_load,
+        raise_on_lazy_load=current_app.config["RAISE_ON_LAZY_LOAD"],
+    )
+
+
+def make_batch_applier(app: Flask):
+    """
+    Apply a batch of item changes from the status write buffer's thread,
+    in one transaction of its own.
+    """
+
+    def apply_batch(changes_by_item):
+        with app.app_context(), make_unit_of_work() as uow:
+            service = GroceryItemService(uow.grocery_items, uow.grocery_lists)
+            items = service.apply_item_changes(changes_by_item)
+            uow.commit()
+            return items
+
+    return apply_batch
+
+
+def status_flush_timeout(
+    database_config: config.DatabaseConfig, interval: float, max_batch: int
+) -> float:
+    """
+    Seconds a toggle may wait for the status write buffer: for the batch
+    being written and then its own, each waiting for the interval, a pooled
+    connection and its statements (one per item plus the commit). Without
+    DB_STATEMENT_TIMEOUT the statements get as long as the connection.
+    """
+    statements = (max_batch + 1) * database_config.statement_timeout / 1000
+    batch = interval + database_config.pool_timeout
+    return 2 * (batch + (statements or database_config.pool_timeout))
+
+
+def warm_up(app: Flask, connections: Optional[int] = None) -> None:
+    """
+    Do the one-off work of the first requests ahead of time: configure the
+    mappers, compile the hot queries into SQLAlchemy's statement cache and
+    open `connections` pooled connections (default: the pool size).
+    """
+    configure_mappers()
+    with app.app_context():
+        with make_unit_of_work(list_load=LIST_DETAIL_LOAD) as uow:
+            list_repo, item_repo = uow.grocery_lists, uow.grocery_items
+            # Reads of a missing ID compile the same statements as real ones
+            list_repo.get_version(0)
+            list_repo.repository.get_by_id(0)
+            list_repo.get_page(1, after=0)
+            item_repo.get_page(1, after=0, grocery_list_id=0)
+            item_repo.find_by(grocery_list_id=0)
+            if app.config["DB_JSON_DOCUMENTS"]:
+                list_repo.get_json(0)
+
+        engine = db.engine
+        if connections is None:
+            connections = getattr(engine.pool, "size", lambda: 0)()
+        opened = [engine.connect() for _ in range(connections)]
+        for connection in opened:
+            connection.close()
+
+
+# Applications created in this process, reset in forked children
+_apps: "weakref.WeakSet[Flask]" = weakref.WeakSet()
+
+
+def reset_after_fork() -> None:
+    """
+    Make the applications inherited from a parent process safe to use in a
+    forked child. Pooled connections are dropped without closing them, so
+    the parent's sockets are untouched, and per-process state (locks, the
+    invalidation listener thread) is recreated.
+    """
+    for app in list(_apps):
+        for engine in app.extensions.get("engines", []):
+            engine.dispose(close=False)
+        app.extensions["grocery_list_cache"].reset_after_fork()
+        if "grocery_list_flight" in app.extensions:
+            app.extensions["grocery_list_flight"].reset_after_fork()
+        if "status_write_buffer" in app.extensions:
+            app.extensions["status_write_buffer"].reset_after_fork()
+        if "metrics_exporter" in app.extensions:
+            app.extensions["metrics_exporter"].reset_after_fork()
+
+
+os.register_at_fork(after_in_child=reset_after_fork)
+
+
+def start_request_timing():
+    start_request()
+
+
+def report_request_timing(response):
+    """Add the Server-Timing header and log the request's timings."""
+    timings = current_timings()
+    if timings is None:
+        return response
+    timings.finish()
+    response.headers["Server-Timing"] = timings.server_timing()
+    log_request(
+        timings,
+        method=request.method,
+        path=request.path,
+        endpoint=request.endpoint,
+        status=response.status_code,
+    )
+    return response
+
+
+def end_request_timing(exception=None):
+    end_request()
+
+
+def single_flight(key, read):
+    """
+    Run `read`, sharing its result with concurrent requests for the same
+    `key` (a tuple starting with the list ID) when single flight is on.
+    """
+    flight = current_app.extensions.get("grocery_list_flight")
+    if flight is None:
+        return read()
+    return flight.do(key, read)
+
+
+def etag_for(version):
+    """ETag and Last-Modified for the current request, see make_validators."""
+    return make_validators(version, request.path, request.query_string)
+
+
+def request_not_modified(etag, last_modified):
+    """Evaluate the current request's conditional headers."""
+    return is_not_modified(
+        etag,
+        last_modified,
+        request.headers.get("If-None-Match"),
+        request.headers.get("If-Modified-Since"),
+    )
+
+
+def with_validators(response, etag, last_modified):
+    """Attach the ETag and Last-Modified headers to a response."""
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    # Clients may store the response but must revalidate before reusing it
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
+def not_modified(etag, last_modified):
+    """An empty 304 response carrying the current validators."""
+    return with_validators(
+        current_app.response_class(status=304), etag, last_modified
+    )
+
+
+@api.route("/status/pool", methods=["GET"])
+def get_pool_status():
+    """Live statistics of the database connection pool."""
+    return jsonify(pool_stats(db.engine)), 200
 
 
-@app.route("/api/v1/grocery-lists", methods=["GET"])
+@api.route("/grocery-lists", methods=["GET"])
 def get_grocery_lists():
-    """Get all grocery lists."""
+    """Get a page of grocery lists, ordered by ID."""
     try:
-        grocery_list_repo = SqlAlchemyRepository(db.session, GroceryList)
-        service = GroceryListService(grocery_list_repo)
-
-        grocery_lists = service.get_all_grocery_lists()
-
-        return jsonify(
-            [grocery_list.to_dict() for grocery_list in grocery_lists]
-        ), 200
+        limit, after, error = parse_pagination_args(request.args)
+        if error:
+            return jsonify({"error": error}), 400
+
+        with make_unit_of_work(list_load=LIST_INDEX_LOAD) as uow:
+            service = GroceryListService(uow.grocery_lists)
+
+            page = service.get_grocery_lists_page(limit, after)
+
+            with timed("serialize"):
+                response = jsonify(
+                    {
+                        "grocery_lists": [
+                            grocery_list.to_dict()
+                            for grocery_list in page["grocery_lists"]
+                        ],
+                        "next_cursor": page["next_cursor"],
+                    }
+                )
+        return response, 200
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
-@app.route("/api/v1/grocery-lists/<int:list_id>", methods=["GET"])
+@api.route("/grocery-lists/<int:list_id>", methods=["GET"])
 def get_grocery_list(list_id):
     """Get a grocery list by ID."""
     try:
-        grocery_list_repo = SqlAlchemyRepository(db.session, GroceryList)
-        service = GroceryListService(grocery_list_repo)
-
-        grocery_list = service.get_grocery_list(list_id)
-
-        if not grocery_list:
+        # The document is shared under the ETag of `version`, so it is read
+        # from the database rather than from a cache entry that may predate
+        # that version
+        with make_unit_of_work(
+            list_load=LIST_DETAIL_LOAD, cached=False
+        ) as uow:
+            service = GroceryListService(uow.grocery_lists)
+
+            # Answer polls for an unchanged list from one aggregate query
+            version = single_flight(
+                (list_id, "version"),
+                lambda: service.get_grocery_list_version(list_id),
+            )
+            if version is None:
+                return jsonify({"error": "Grocery list not found"}), 404
+
+            etag, last_modified = etag_for(version)
+            if request_not_modified(etag, last_modified):
+                return not_modified(etag, last_modified)
+
+            if current_app.config["DB_JSON_DOCUMENTS"]:
+
+                def read_document():
+                    return service.get_grocery_list_json(list_id)
+
+            else:
+
+                def read_document():
+                    grocery_list = service.get_grocery_list(list_id)
+                    if grocery_list is None:
+                        return None
+                    with timed("serialize"):
+                        return current_app.json.dumps(grocery_list.to_dict())
+
+            # Keyed by version: a read of another version is never shared
+            document = single_flight(
+                (list_id, "document", version), read_document
+            )
+        if document is None:
             return jsonify({"error": "Grocery list not found"}), 404
 
-        return jsonify(grocery_list.to_dict()), 200
+        response = current_app.response_class(
+            document, mimetype=current_app.json.mimetype
+        )
+        return with_validators(response, etag, last_modified), 200
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
-@app.route("/api/v1/grocery-lists/<int:list_id>", methods=["PUT"])
+@api.route("/grocery-lists/<int:list_id>", methods=["PUT"])
 def update_grocery_list(list_id):
     """Update a grocery list's name."""
     try:
-        data = request.get_json()
-        if not data or "name" not in data:
-            return jsonify({"error": "Name is required"}), 400
+        name, error = validate_list_name(request.get_json())
+        if error:
+            return jsonify({"error": error}), 400
 
-        name = data["name"].strip()
-        if not name:
-            return jsonify({"error": "Name cannot be empty"}), 400
+        with make_unit_of_work(list_load=LIST_DETAIL_LOAD) as uow:
+            service = GroceryListService(uow.grocery_lists)
 
-        grocery_list_repo = SqlAlchemyRepository(db.session, GroceryList)
-        service = GroceryListService(grocery_list_repo)
+            updated_list = service.update_grocery_list(list_id, name)
 
-        updated_list = service.update_grocery_list(list_id, name)
+            if not updated_list:
+                return jsonify({"error": "Grocery list not found"}), 404
 
-        if not updated_list:
-            return jsonify({"error": "Grocery list not found"}), 404
-
-        db.session.commit()
+            uow.commit()
 
-        return jsonify(updated_list.to_dict()), 200
+            with timed("serialize"):
+                response = jsonify(updated_list.to_dict())
+        return response, 200
 
     except Exception as e:
-        db.session.rollback()
         return jsonify({"error": str(e)}), 500
 
 
-@app.route("/api/v1/grocery-lists/<int:list_id>", methods=["DELETE"])
+@api.route("/grocery-lists/<int:list_id>", methods=["DELETE"])
 def delete_grocery_list(list_id):
     """Delete a grocery list by ID."""
     try:
-        grocery_list_repo = SqlAlchemyRepository(db.session, GroceryList)
-        service = GroceryListService(grocery_list_repo)
+        with make_unit_of_work() as uow:
+            service = GroceryListService(uow.grocery_lists)
 
-        # Check if the grocery list exists first
-        grocery_list = service.get_grocery_list(list_id)
-        if not grocery_list:
-            return jsonify({"error": "Grocery list not found"}), 404
+            # Delete the grocery list (the database cascades to all items)
+            is_deleted = service.delete_grocery_list(list_id)
 
-        # Delete the grocery list (cascade will automatically delete all items)
-        is_deleted = service.delete_grocery_list(list_id)
+            if not is_deleted:
+                return jsonify({"error": "Grocery list not found"}), 404
 
-        if is_deleted:
-            db.session.commit()
-            return jsonify(
-                {"message": "Grocery list deleted successfully"}
-            ), 200
-        else:
-            return jsonify({"error": "Failed to delete grocery list"}), 500
+            uow.commit()
+        return jsonify({"message": "Grocery list deleted successfully"}), 200
 
     except Exception as e:
-        db.session.rollback()
         return jsonify({"error": str(e)}), 500
 
 
-@app.route("/api/v1/grocery-lists", methods=["POST"])
+@api.route("/grocery-lists", methods=["POST"])
 def create_grocery_list():
     """Create a new grocery list."""
     try:
-        data = request.get_json()
-        if not data or "name" not in data:
-            return jsonify({"error": "Name is required"}), 400
+        name, error = validate_list_name(request.get_json())
+        if error:
+            return jsonify({"error": error}), 400
 
-        name = data["name"].strip()
-        if not name:
-            return jsonify({"error": "Name cannot be empty"}), 400
+        with make_unit_of_work() as uow:
+            service = GroceryListService(uow.grocery_lists)
 
-        grocery_list_repo = SqlAlchemyRepository(db.session, GroceryList)
+            # The INSERT is flushed by the commit, which sets the ID
+            grocery_list = service.create_grocery_list(name)
+            uow.commit()
 
-        service = GroceryListService(grocery_list_repo)
+            with timed("serialize"):
+                response = jsonify(grocery_list.to_dict())
+        return response, 201
 
-        grocery_list = service.create_grocery_list(name)
-        db.session.commit()
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
 
-        return jsonify(grocery_list.to_dict()), 201
+
+@api.route("/grocery-lists/<int:list_id>/items", methods=["GET"])
+def get_items_by_list(list_id):
+    """
+    Get a page of items for a specific grocery list, ordered by ID.
+    Optionally filtered with `?status=pending|purchased`.
+    """
+    try:
+        limit, after, error = parse_pagination_args(request.args)
+        if error:
+            return jsonify({"error": error}), 400
+
+        status, error = parse_status_filter(request.args.get("status"))
+        if error:
+            return jsonify({"error": error}), 400
+
+        with make_unit_of_work() as uow:
+            # Create services
+            service = GroceryItemService(uow.grocery_items, uow.grocery_lists)
+            list_service = GroceryListService(uow.grocery_lists)
+
+            # Answer polls for an unchanged list from one aggregate query
+            version = list_service.get_grocery_list_version(list_id)
+            if version is None:
+                return jsonify({"error": "Grocery list not found"}), 404
+
+            etag, last_modified = etag_for(version)
+            if request_not_modified(etag, last_modified):
+                return not_modified(etag, last_modified)
+
+            # Get items and list name
+            result = service.get_items_by_list(list_id, limit, after, status)
+
+            if result is None:
+                return jsonify({"error": "Grocery list not found"}), 404
+
+            with timed("serialize"):
+                response = jsonify(
+                    {
+                        "grocery_list_name": result["grocery_list_name"],
+                        "items": [item.to_dict() for item in result["items"]],
+                        "next_cursor": result["next_cursor"],
+                    }
+                )
+        return with_validators(response, etag, last_modified), 200
 
     except Exception as e:
-        db.session.rollback()
         return jsonify({"error": str(e)}), 500
 
 
-@app.route("/api/v1/grocery-lists/<int:list_id>/items", methods=["GET"])
-def get_items_by_list(list_id):
-    """Get all items for a specific grocery list."""
+@api.route("/grocery-lists/<int:list_id>/items", methods=["POST"])
+def add_item_to_list(list_id):
+    """Add a new item to a grocery list."""
     try:
-        # Create repositories
-        grocery_list_repo = SqlAlchemyRepository(db.session, GroceryList)
-        grocery_item_repo = SqlAlchemyRepository(db.session, GroceryItem)
+        name, quantity, error = validate_new_item(request.get_json())
+        if error:
+            return jsonify({"error": error}), 400
 
-        # Create service
-        service = GroceryItemService(
-            grocery_item_repo, grocery_list_repo, db.session
-        )
+        with make_unit_of_work() as uow:
+            service = GroceryItemService(uow.grocery_items, uow.grocery_lists)
 
-        # Get items and list name
-        result = service.get_items_by_list(list_id)
+            # Add item to list
+            item = service.add_item_to_list(list_id, name, quantity)
 
-        if result is None:
-            return jsonify({"error": "Grocery list not found"}), 404
+            if not item:
+                return jsonify({"error": "Grocery list not found"}), 404
 
-        response_data = {
-            "grocery_list_name": result["grocery_list_name"],
-            "items": [item.to_dict() for item in result["items"]]
-        }
+            uow.commit()
 
-        return jsonify(response_data), 200
+            with timed("serialize"):
+                response = jsonify(item.to_dict())
+        return response, 201
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
-@app.route("/api/v1/grocery-lists/<int:list_id>/items", methods=["POST"])
-def add_item_to_list(list_id):
-    """Add a new item to a grocery list."""
+@api.route("/grocery-lists/<int:list_id>/items/bulk", methods=["POST"])
+def add_items_to_list_bulk(list_id):
+    """Add several items to a grocery list in a single statement."""
     try:
-        data = request.get_json()
-        if not data or "name" not in data:
-            return jsonify({"error": "Item name is required"}), 400
-
-        name = data["name"].strip()
-        if not name:
-            return jsonify({"error": "Item name cannot be empty"}), 400
-
-        quantity = data.get("quantity", 1)
-        if not isinstance(quantity, int) or quantity < 1:
-            return jsonify(
-                {"error": "Quantity must be a positive integer"}
-            ), 400
-
-        # Create repositories
-        grocery_list_repo = SqlAlchemyRepository(db.session, GroceryList)
-        grocery_item_repo = SqlAlchemyRepository(db.session, GroceryItem)
-
-        # Create service
-        service = GroceryItemService(
-            grocery_item_repo, grocery_list_repo, db.session
-        )
+        # Validate the whole batch before touching the database
+        items, error = validate_new_items(request.get_json())
+        if error:
+            return jsonify({"error": error}), 400
 
-        # Add item to list
-        item = service.add_item_to_list(list_id, name, quantity)
+        with make_unit_of_work() as uow:
+            service = GroceryItemService(uow.grocery_items, uow.grocery_lists)
 
-        if not item:
-            return jsonify({"error": "Grocery list not found"}), 404
+            # Add all items to the list
+            new_items = service.add_items_bulk(list_id, items)
+
+            if new_items is None:
+                return jsonify({"error": "Grocery list not found"}), 404
 
-        db.session.commit()
+            # Serialize before committing so the rows returned by the INSERT
+            # are used instead of reloading every expired item afterwards
+            with timed("serialize"):
+                response = jsonify([item.to_dict() for item in new_items])
+            uow.commit()
 
-        return jsonify(item.to_dict()), 201
+        return response, 201
 
     except Exception as e:
-        db.session.rollback()
         return jsonify({"error": str(e)}), 500
 
 
-@app.route("/api/v1/grocery-items/<int:item_id>", methods=["PATCH"])
-def update_grocery_item(item_id):
-    """Update a grocery item's name and/or quantity."""
+@api.route("/grocery-lists/<int:list_id>/items/purchase", methods=["POST"])
+def mark_items_as_purchased(list_id):
+    """Mark several items of a grocery list as purchased."""
+    return set_items_status(list_id, purchased=True)
+
+
+@api.route("/grocery-lists/<int:list_id>/items/unpurchase", methods=["POST"])
+def mark_items_as_pending(list_id):
+    """Mark several items of a grocery list as pending (not purchased)."""
+    return set_items_status(list_id, purchased=False)
+
+
+def set_items_status(list_id, purchased):
+    """Apply a bulk status change to the items of a grocery list."""
     try:
-        data = request.get_json()
-        if not data:
-            return jsonify({"error": "Request body is required"}), 400
-
-        # Extract optional fields
-        name = data.get("name")
-        quantity = data.get("quantity")
-
-        # Validate name if provided
-        if name is not None:
-            name = name.strip()
-            if not name:
-                return jsonify({"error": "Name cannot be empty"}), 400
-
-        # Validate quantity if provided
-        if quantity is not None:
-            if not isinstance(quantity, int) or quantity < 1:
-                return jsonify(
-                    {"error": "Quantity must be a positive integer"}
-                ), 400
-
-        # At least one field must be provided
-        if name is None and quantity is None:
-            return jsonify(
-                {
-                    "error": "At least one field (name or quantity) must be provided"
-                }
-            ), 400
-
-        # Create repositories
-        grocery_list_repo = SqlAlchemyRepository(db.session, GroceryList)
-        grocery_item_repo = SqlAlchemyRepository(db.session, GroceryItem)
-
-        # Create service
-        service = GroceryItemService(
-            grocery_item_repo, grocery_list_repo, db.session
-        )
+        item_ids, error = parse_item_selection(request.get_json(silent=True))
+        if error:
+            return jsonify({"error": error}), 400
 
-        # Update the item
-        updated_item = service.update_item(
-            item_id, name=name, quantity=quantity
-        )
+        with make_unit_of_work() as uow:
+            service = GroceryItemService(uow.grocery_items, uow.grocery_lists)
 
-        if not updated_item:
-            return jsonify({"error": "Grocery item not found"}), 404
+            # Update every selected item in a single statement
+            if purchased:
+                items = service.mark_items_as_purchased(list_id, item_ids)
+            else:
+                items = service.mark_items_as_pending(list_id, item_ids)
 
-        db.session.commit()
+            if items is None:
+                return jsonify({"error": "Grocery list not found"}), 404
 
-        return jsonify(updated_item.to_dict()), 200
+            # Serialize the rows returned by the UPDATE before committing
+            with timed("serialize"):
+                response = jsonify([item.to_dict() for item in items])
+            uow.commit()
+
+        return response, 200
 
     except Exception as e:
-        db.session.rollback()
         return jsonify({"error": str(e)}), 500
 
 
-@app.route("/api/v1/grocery-items/<int:item_id>/purchase", methods=["POST"])
-def mark_item_as_purchased(item_id):
-    """Mark a grocery item as purchased."""
+@api.route("/grocery-items/<int:item_id>", methods=["PATCH"])
+def update_grocery_item(item_id):
+    """Update a grocery item's name and/or quantity."""
     try:
-        # Create repositories
-        grocery_list_repo = SqlAlchemyRepository(db.session, GroceryList)
-        grocery_item_repo = SqlAlchemyRepository(db.session, GroceryItem)
+        name, quantity, error = validate_item_update(request.get_json())
+        if error:
+            return jsonify({"error": error}), 400
 
-        # Create service
-        service = GroceryItemService(
-            grocery_item_repo, grocery_list_repo, db.session
-        )
+        with make_unit_of_work() as uow:
+            service = GroceryItemService(uow.grocery_items, uow.grocery_lists)
 
-        # Mark item as purchased
-        updated_item = service.mark_item_as_purchased(item_id)
+            # Update the item
+            updated_item = service.update_item(
+                item_id, name=name, quantity=quantity
+            )
 
-        if not updated_item:
-            return jsonify({"error": "Grocery item not found"}), 404
+            if not updated_item:
+                return jsonify({"error": "Grocery item not found"}), 404
 
-        db.session.commit()
+            uow.commit()
 
-        return jsonify(updated_item.to_dict()), 200
+            with timed("serialize"):
+                response = jsonify(updated_item.to_dict())
+        return response, 200
 
     except Exception as e:
-        db.session.rollback()
         return jsonify({"error": str(e)}), 500
 
 
-@app.route("/api/v1/grocery-items/<int:item_id>/unpurchase", methods=["POST"])
+@api.route("/grocery-items/<int:item_id>/purchase", methods=["POST"])
+def mark_item_as_purchased(item_id):
+    """Mark a grocery item as purchased."""
+    return set_item_status(item_id, purchased=True)
+
+
+@api.route("/grocery-items/<int:item_id>/unpurchase", methods=["POST"])
 def mark_item_as_pending(item_id):
     """Mark a grocery item as pending (not purchased)."""
+    return set_item_status(item_id, purchased=False)
+
+
+def set_item_status(item_id, purchased):
+    """
+    Apply a status change to one grocery item, in its own transaction or,
+    with STATUS_WRITE_BUFFER, in the next batch of the write buffer.
+    """
     try:
-        # Create repositories
-        grocery_list_repo = SqlAlchemyRepository(db.session, GroceryList)
-        grocery_item_repo = SqlAlchemyRepository(db.session, GroceryItem)
+        write_buffer = current_app.extensions.get("status_write_buffer")
+        if write_buffer is not None:
+            # Answered once the batch holding the change has committed
+            try:
+                updated_item = write_buffer.submit(item_id, purchased).result(
+                    timeout=write_buffer.timeout
+                )
+            except FutureTimeoutError:
+                return jsonify(
+                    {"error": "Timed out waiting for the change to be saved"}
+                ), 503
+            if not updated_item:
+                return jsonify({"error": "Grocery item not found"}), 404
+            with timed("serialize"):
+                response = jsonify(updated_item.to_dict())
+            return response, 200
 
-        # Create service
-        service = GroceryItemService(
-            grocery_item_repo, grocery_list_repo, db.session
-        )
+        with make_unit_of_work() as uow:
+            service = GroceryItemService(uow.grocery_items, uow.grocery_lists)
 
-        # Mark item as pending
-        updated_item = service.mark_item_as_pending(item_id)
+            if purchased:
+                updated_item = service.mark_item_as_purchased(item_id)
+            else:
+                updated_item = service.mark_item_as_pending(item_id)
 
-        if not updated_item:
-            return jsonify({"error": "Grocery item not found"}), 404
+            if not updated_item:
+                return jsonify({"error": "Grocery item not found"}), 404
 
-        db.session.commit()
+            uow.commit()
 
-        return jsonify(updated_item.to_dict()), 200
+            with timed("serialize"):
+                response = jsonify(updated_item.to_dict())
+        return response, 200
 
     except Exception as e:
-        db.session.rollback()
         return jsonify({"error": str(e)}), 500
 
 
-@app.route("/api/v1/grocery-items/<int:item_id>", methods=["DELETE"])
+@api.route("/grocery-items/<int:item_id>", methods=["DELETE"])
 def delete_grocery_item(item_id):
     """Delete a grocery item by ID."""
     try:
-        # Create repositories
-        grocery_list_repo = SqlAlchemyRepository(db.session, GroceryList)
-        grocery_item_repo = SqlAlchemyRepository(db.session, GroceryItem)
+        with make_unit_of_work() as uow:
+            service = GroceryItemService(uow.grocery_items, uow.grocery_lists)
 
-        # Create service
-        service = GroceryItemService(
-            grocery_item_repo, grocery_list_repo, db.session
-        )
+            # Delete the item
+            is_deleted = service.delete_item(item_id)
+
+            if not is_deleted:
+                return jsonify({"error": "Grocery item not found"}), 404
+
+            uow.commit()
+        return jsonify({"message": "Grocery item deleted successfully"}), 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+# Operations of POST /batch. Each runs the same service call as its
+# endpoint and returns (status, result), where the result is an entity or
+# a message body on success and an error message otherwise.
+
+
+def batch_create_list(uow, arguments):
+    service = GroceryListService(uow.grocery_lists)
+    return 201, service.create_grocery_list(arguments["name"])
 
-        # Check if the item exists first
-        item = service.get_item(item_id)
-        if not item:
-            return jsonify({"error": "Grocery item not found"}), 404
 
-        # Delete the item
-        is_deleted = service.delete_item(item_id)
+def batch_rename_list(uow, arguments):
+    service = GroceryListService(uow.grocery_lists)
+    grocery_list = service.update_grocery_list(
+        arguments["list_id"], arguments["name"]
+    )
+    if not grocery_list:
+        return 404, "Grocery list not found"
+    return 200, grocery_list
 
-        if is_deleted:
-            db.session.commit()
-            return jsonify(
-                {"message": "Grocery item deleted successfully"}
-            ), 200
+
+def batch_delete_list(uow, arguments):
+    service = GroceryListService(uow.grocery_lists)
+    if not service.delete_grocery_list(arguments["list_id"]):
+        return 404, "Grocery list not found"
+    return 200, {"message": "Grocery list deleted successfully"}
+
+
+def batch_add_item(uow, arguments):
+    service = GroceryItemService(uow.grocery_items, uow.grocery_lists)
+    item = service.add_item_to_list(
+        arguments["list_id"], arguments["name"], arguments["quantity"]
+    )
+    if not item:
+        return 404, "Grocery list not found"
+    return 201, item
+
+
+def batch_update_item(uow, arguments):
+    service = GroceryItemService(uow.grocery_items, uow.grocery_lists)
+    item = service.update_item(
+        arguments["item_id"],
+        name=arguments["name"],
+        quantity=arguments["quantity"],
+    )
+    if not item:
+        return 404, "Grocery item not found"
+    return 200, item
+
+
+def batch_set_item_status(purchased):
+    def set_status(uow, arguments):
+        service = GroceryItemService(uow.grocery_items, uow.grocery_lists)
+        if purchased:
+            item = service.mark_item_as_purchased(arguments["item_id"])
         else:
-            return jsonify({"error": "Failed to delete grocery item"}), 500
+            item = service.mark_item_as_pending(arguments["item_id"])
+        if not item:
+            return 404, "Grocery item not found"
+        return 200, item
+
+    return set_status
+
+
+def batch_delete_item(uow, arguments):
+    service = GroceryItemService(uow.grocery_items, uow.grocery_lists)
+    if not service.delete_item(arguments["item_id"]):
+        return 404, "Grocery item not found"
+    return 200, {"message": "Grocery item deleted successfully"}
+
+
+BATCH_HANDLERS = {
+    "create_list": batch_create_list,
+    "rename_list": batch_rename_list,
+    "delete_list": batch_delete_list,
+    "add_item": batch_add_item,
+    "update_item": batch_update_item,
+    "purchase_item": batch_set_item_status(purchased=True),
+    "unpurchase_item": batch_set_item_status(purchased=False),
+    "delete_item": batch_delete_item,
+}
+
+
+def resolve_references(uow, operation, created):
+    """
+    Replace `{"$ref": name}` IDs with the ID of the entity created under
+    that name. New entities are flushed (together) on first reference.
+    """
+    arguments = dict(operation)
+    for field in ("list_id", "item_id"):
+        value = arguments.get(field)
+        if isinstance(value, dict):
+            entity = created[value["$ref"]]
+            if entity.id is None:
+                uow.flush()
+            arguments[field] = entity.id
+    return arguments
+
+
+@api.route("/batch", methods=["POST"])
+def run_batch():
+    """
+    Run an ordered batch of operations (see validate_batch) in a single
+    transaction. Responds with one {status, body} result per operation,
+    serialized as of the commit, or with the first failing operation, in
+    which case nothing is committed.
+    """
+    try:
+        operations, error = validate_batch(request.get_json(silent=True))
+        if error:
+            return jsonify({"error": error}), 400
+
+        with make_unit_of_work() as uow:
+            created = {}
+            results = []
+            for index, operation in enumerate(operations):
+                arguments = resolve_references(uow, operation, created)
+                status, result = BATCH_HANDLERS[operation["op"]](
+                    uow, arguments
+                )
+                if status >= 400:
+                    # Leaving the unit of work rolls back the whole batch
+                    body = {"error": result, "operation": index}
+                    return jsonify(body), status
+                if "ref" in operation:
+                    created[operation["ref"]] = result
+                results.append((status, result))
+
+            uow.commit()
+
+            with timed("serialize"):
+                response = jsonify(
+                    {
+                        "results": [
+                            {
+                                "status": status,
+                                "body": (
+                                    result
+                                    if isinstance(result, dict)
+                                    else result.to_dict()
+                                ),
+                            }
+                            for status, result in results
+                        ]
+                    }
+                )
+        return response, 200
 
     except Exception as e:
-        db.session.rollback()
         return jsonify({"error": str(e)}), 500
@@ -0,0 +1,283 @@
+"""
+Prometheus metrics for the Flask app, served at GET /metrics.
+
+Requests are counted and timed per Flask endpoint (without the blueprint
+prefix, e.g. `get_grocery_lists`), method and status code, and the
+requests in progress are tracked per endpoint. Connection pool and entity
+cache statistics are copied into metrics at most once per
+STATS_REFRESH_INTERVAL seconds, from the request hooks and on scrape.
+
+Under gunicorn each worker is a separate process. When the
+PROMETHEUS_MULTIPROC_DIR environment variable names a directory (empty at
+startup) the metrics are kept in memory-mapped files there and /metrics
+aggregates every worker's values, whichever worker answers the scrape.
+Otherwise they are the values of the current process.
+
+The cache hit ratio is derived at query time, e.g.
+`rate(grocery_cache_hits_total[5m]) / (rate(grocery_cache_hits_total[5m])
++ rate(grocery_cache_misses_total[5m]))`, since ratios cannot be summed
+across workers.
+"""
+
+import os
+import threading
+import time
+
+from flask import Flask, current_app, g, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client import multiprocess
+
+from adapters.database import pool_stats
+
+# Seconds between two copies of the pool and cache statistics
+STATS_REFRESH_INTERVAL = 5.0
+
+# Latency buckets (seconds) around the API's typical 1-50 ms responses
+LATENCY_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+)
+
+REQUESTS = Counter(
+    "grocery_http_requests_total",
+    "HTTP requests handled",
+    ["endpoint", "method", "status"],
+)
+REQUEST_DURATION = Histogram(
+    "grocery_http_request_duration_seconds",
+    "Time spent handling HTTP requests",
+    ["endpoint", "method", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "grocery_http_requests_in_progress",
+    "HTTP requests being handled",
+    ["endpoint"],
+    multiprocess_mode="livesum",
+)
+POOL_CONNECTIONS = Gauge(
+    "grocery_db_pool_connections",
+    "Database connections of the pool, by state",
+    ["state"],
+    multiprocess_mode="livesum",
+)
+POOL_SIZE = Gauge(
+    "grocery_db_pool_size",
+    "Connections the pool keeps open",
+    multiprocess_mode="livesum",
+)
+POOL_CHECKOUTS = Counter(
+    "grocery_db_pool_checkouts_total", "Connections checked out of the pool"
+)
+POOL_TIMEOUTS = Counter(
+    "grocery_db_pool_timeouts_total",
+    "Checkouts that timed out waiting for a connection",
+)
+POOL_WAIT = Counter(
+    "grocery_db_pool_wait_seconds_total",
+    "Time spent waiting for pooled connections",
+)
+CACHE_HITS = Counter(
+    "grocery_cache_hits_total", "Entity cache hits", ["cache"]
+)
+CACHE_MISSES = Counter(
+    "grocery_cache_misses_total", "Entity cache misses", ["cache"]
+)
+CACHE_EVICTIONS = Counter(
+    "grocery_cache_evictions_total", "Entity cache evictions", ["cache"]
+)
+CACHE_ENTRIES = Gauge(
+    "grocery_cache_entries",
+    "Entries in the entity cache",
+    ["cache"],
+    multiprocess_mode="livesum",
+)
+SINGLE_FLIGHT_CALLS = Counter(
+    "grocery_single_flight_calls_total",
+    "Grocery list reads run against the database",
+)
+SINGLE_FLIGHT_SHARED = Counter(
+    "grocery_single_flight_shared_total",
+    "Grocery list reads answered with another request's result",
+)
+
+
+class StatsExporter:
+    """
+    Copies an app's pool and cache statistics into the metrics. The pool
+    and the cache keep cumulative totals, which are added to the counters
+    as differences from the previous copy.
+    """
+
+    def __init__(self, app: Flask, interval: float = STATS_REFRESH_INTERVAL):
+        self.app = app
+        self.interval = interval
+        self._next_refresh = 0.0
+        self._last = {}
+        self._lock = threading.Lock()
+
+    def refresh(self, force: bool = False) -> None:
+        """Copy the statistics, unless done less than `interval` ago."""
+        now = time.monotonic()
+        if not force and now < self._next_refresh:
+            return
+        with self._lock:
+            if not force and now < self._next_refresh:
+                return
+            self._next_refresh = now + self.interval
+            self._copy_stats()
+
+    def _copy_stats(self) -> None:
+        engines = self.app.extensions.get("engines")
+        if engines:
+            # The app's default engine (Flask-SQLAlchemy's db.engine)
+            stats = pool_stats(engines[0])
+            if "size" in stats:
+                POOL_SIZE.set(stats["size"])
+                for state in ("checked_out", "checked_in", "overflow"):
+                    POOL_CONNECTIONS.labels(state).set(stats[state])
+            if "checkouts" in stats:
+                self._add("checkouts", stats["checkouts"], POOL_CHECKOUTS)
+                self._add("timeouts", stats["timeouts"], POOL_TIMEOUTS)
+                self._add("wait", stats["total_wait_seconds"], POOL_WAIT)
+
+        cache = self.app.extensions.get("grocery_list_cache")
+        if cache is not None:
+            stats = cache.stats()
+            name = cache.namespace
+            self._add("hits", stats["hits"], CACHE_HITS.labels(name))
+            self._add("misses", stats["misses"], CACHE_MISSES.labels(name))
+            self._add(
+                "evictions", stats["evictions"], CACHE_EVICTIONS.labels(name)
+            )
+            CACHE_ENTRIES.labels(name).set(stats["size"])
+
+        flight = self.app.extensions.get("grocery_list_flight")
+        if flight is not None:
+            stats = flight.stats()
+            self._add("flight_calls", stats["calls"], SINGLE_FLIGHT_CALLS)
+            self._add("flight_shared", stats["shared"], SINGLE_FLIGHT_SHARED)
+
+    def _add(self, key, total, counter) -> None:
+        last = self._last.get(key, 0)
+        # A smaller total means the source was recreated (e.g. the pool
+        # after a fork) and counts from zero again
+        counter.inc(total - last if total >= last else total)
+        self._last[key] = total
+
+    def reset_after_fork(self) -> None:
+        """Recreate the lock, which may have been held at fork time."""
+        self._lock = threading.Lock()
+        self._next_refresh = 0.0
+
+
+def endpoint_label(endpoint) -> str:
+    """A Flask endpoint without its blueprint, bounded in number."""
+    if endpoint is None:
+        return "unmatched"
+    return endpoint.rpartition(".")[2]
+
+
+# Labelled metric children by label values, so the request hooks skip
+# prometheus_client's label validation and locking after the first request
+_request_metrics = {}
+_in_progress_gauges = {}
+
+
+def _children(cache, make, key):
+    children = cache.get(key)
+    if children is None:
+        children = cache.setdefault(key, make(key))
+    return children
+
+
+def start_request_metrics():
+    # Read the request once; each access through the proxy has a cost
+    current_request = request._get_current_object()
+    endpoint = endpoint_label(current_request.endpoint)
+    in_progress = _children(
+        _in_progress_gauges, REQUESTS_IN_PROGRESS.labels, endpoint
+    )
+    in_progress.inc()
+    g.request_metrics = (
+        time.perf_counter(),
+        endpoint,
+        current_request.method,
+        in_progress,
+    )
+
+
+def record_request_metrics(response):
+    state = g.get("request_metrics")
+    if state is None:
+        return response
+    start, endpoint, method, _ = state
+    requests, duration = _children(
+        _request_metrics,
+        lambda labels: (
+            REQUESTS.labels(*labels),
+            REQUEST_DURATION.labels(*labels),
+        ),
+        (endpoint, method, str(response.status_code)),
+    )
+    requests.inc()
+    duration.observe(time.perf_counter() - start)
+    current_app.extensions["metrics_exporter"].refresh()
+    return response
+
+
+def end_request_metrics(exception=None):
+    state = g.pop("request_metrics", None)
+    if state is not None:
+        state[3].dec()
+
+
+def metrics_view():
+    """Serve every metric in the Prometheus text format."""
+    current_app.extensions["metrics_exporter"].refresh(force=True)
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return (
+        generate_latest(registry),
+        200,
+        {"Content-Type": CONTENT_TYPE_LATEST},
+    )
+
+
+def init_metrics(app: Flask) -> None:
+    """Record request metrics for `app` and serve them at /metrics."""
+    app.extensions["metrics_exporter"] = StatsExporter(app)
+    app.before_request(start_request_metrics)
+    app.after_request(record_request_metrics)
+    app.teardown_request(end_request_metrics)
+    app.add_url_rule("/metrics", "metrics", metrics_view, methods=["GET"])
+
+
+def mark_process_dead(pid: int) -> None:
+    """
+    Drop the live gauges of a worker that exited (gunicorn's child_exit
+    hook), so in-progress and pool gauges only sum running workers.
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(pid)
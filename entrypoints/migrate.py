@@ -0,0 +1,121 @@
+"""
+Container startup migrations: bring the database to the latest revision,
+skipping the upgrade when it is already there.
+
+Running `flask db upgrade` on every start imports the application,
+Flask-Migrate and Alembic and has Alembic inspect the database, even though
+the schema almost never changes between starts. Instead, the revisions in
+migrations/versions are read without importing Alembic, compared with the
+database's alembic_version in one query, and the full upgrade only runs
+when they differ (or the database has never been migrated).
+
+Usage:
+    uv run python -m entrypoints.migrate
+"""
+
+import ast
+import logging
+from pathlib import Path
+from typing import Optional, Set
+
+from sqlalchemy import create_engine, exc, text
+from sqlalchemy.pool import NullPool
+
+import config
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIRECTORY = Path(__file__).resolve().parent.parent / "migrations"
+
+
+def head_revisions(directory: Path = MIGRATIONS_DIRECTORY) -> Set[str]:
+    """
+    Revisions of the migration scripts that no other script builds on,
+    read from each script's `revision` and `down_revision` assignments.
+    """
+    revisions, parents = set(), set()
+    for path in (directory / "versions").glob("*.py"):
+        values = {}
+        for node in ast.parse(path.read_text()).body:
+            if isinstance(node, ast.Assign) and len(node.targets) == 1:
+                target = node.targets[0]
+                if isinstance(target, ast.Name) and target.id in (
+                    "revision",
+                    "down_revision",
+                ):
+                    values[target.id] = ast.literal_eval(node.value)
+        if "revision" not in values:
+            continue
+        revisions.add(values["revision"])
+        down_revision = values.get("down_revision")
+        if isinstance(down_revision, str):
+            parents.add(down_revision)
+        elif down_revision:
+            parents.update(down_revision)
+    return revisions - parents
+
+
+def current_revisions(uri: str) -> Optional[Set[str]]:
+    """
+    Revisions the database is at, in one query. None when it has no
+    alembic_version table, i.e. it was never migrated.
+    """
+    engine = create_engine(uri, poolclass=NullPool)
+    try:
+        with engine.connect() as connection:
+            rows = connection.execute(
+                text("SELECT version_num FROM alembic_version")
+            )
+            return {row[0] for row in rows}
+    except (exc.ProgrammingError, exc.OperationalError) as e:
+        # A missing table and an unreachable database both end up here;
+        # let the full upgrade create the table or report the real error
+        logger.info("Could not read the database revision: %s", e.orig)
+        return None
+    finally:
+        engine.dispose()
+
+
+def upgrade(database_config: config.DatabaseConfig) -> None:
+    """Run the Alembic upgrade to the head revision, like `flask db upgrade`."""
+    # Imported here, the app and the migration tooling are only loaded
+    # when there is something to migrate
+    from flask_migrate import upgrade as alembic_upgrade
+
+    from entrypoints.flask_app import create_app, init_migrations
+
+    app = create_app({"DATABASE_CONFIG": database_config, "WARM_UP": False})
+    init_migrations(app)
+    with app.app_context():
+        alembic_upgrade(directory=str(MIGRATIONS_DIRECTORY))
+
+
+def migrate_if_needed(database_config: config.DatabaseConfig) -> bool:
+    """
+    Upgrade the configured database unless it is already at the head
+    revision. Returns True if an upgrade was run.
+    """
+    heads = head_revisions()
+    current = current_revisions(database_config.uri)
+    if current == heads:
+        logger.info(
+            "Database is at revision %s, skipping migrations",
+            ", ".join(sorted(current)),
+        )
+        return False
+    logger.info(
+        "Database is at revision %s, upgrading to %s",
+        ", ".join(sorted(current)) if current else "none",
+        ", ".join(sorted(heads)),
+    )
+    upgrade(database_config)
+    return True
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    migrate_if_needed(config.get_database_config())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+"""
+Opt-in request profiling.
+
+With PROFILE_DIR set, a request runs under cProfile when it carries the
+`X-Profile-Token` header with the PROFILE_TOKEN value, or when it is picked
+by the PROFILE_SAMPLE_RATE sampling. For each profiled request three files
+are written to PROFILE_DIR, named after the request id (the
+`X-Request-ID` header when valid, with a random suffix if a profile of
+that id exists, otherwise a random one; returned in `X-Profile-Id`):
+
+- `<id>.prof`: pstats data, e.g. for `python -m pstats` or snakeviz
+- `<id>.collapsed`: collapsed stacks for flamegraph.pl or speedscope
+- `<id>.json`: the request's method, path, status and duration
+
+GET /api/v1/admin/profiles lists the captured profiles and
+GET /api/v1/admin/profiles/<file> downloads one; both require the token.
+Only the newest PROFILE_MAX_FILES profiles are kept.
+
+When profiling is disabled nothing is registered on the app, so requests
+do not pay for it. One request per process is profiled at a time (Python
+allows a single active profiler); others run normally meanwhile.
+"""
+
+import cProfile
+import hmac
+import json
+import os
+import pstats
+import random
+import re
+import threading
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from flask import (
+    Blueprint,
+    Flask,
+    current_app,
+    g,
+    jsonify,
+    request,
+    send_from_directory,
+)
+
+PROFILE_TOKEN_HEADER = "X-Profile-Token"
+
+# Request ids become file names, so only these are taken from clients
+REQUEST_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+PROFILE_SUFFIXES = (".prof", ".collapsed", ".json")
+
+admin = Blueprint("admin", __name__, url_prefix="/api/v1/admin")
+
+# Held while a request of this process is being profiled
+_profiling = threading.Lock()
+
+
+def frame_label(function) -> str:
+    """A pstats function key as a flame graph frame, e.g. `models.py:42(f)`."""
+    filename, line, name = function
+    if filename == "~":
+        # Built-in functions have no source location
+        return name
+    return f"{os.path.basename(filename)}:{line}({name})"
+
+
+def collapsed_stacks(stats: pstats.Stats, max_depth: int = 128) -> dict:
+    """
+    Rebuild call stacks from a profile's caller/callee edges, as
+    {"frame;frame;...": self time in seconds}.
+
+    cProfile records time per caller -> callee edge, not per full stack, so
+    the time of a function reached through several paths is split between
+    them in proportion to the edge times (the usual pstats-to-flame-graph
+    approximation).
+    """
+    entries = stats.stats
+    callees = defaultdict(list)
+    for function, (_, _, _, _, callers) in entries.items():
+        for caller, (_, _, _, edge_cumulative) in callers.items():
+            callees[caller].append((function, edge_cumulative))
+
+    stacks = defaultdict(float)
+
+    def walk(function, path, share):
+        _, _, self_time, _, _ = entries[function]
+        path = path + (function,)
+        stacks[";".join(frame_label(frame) for frame in path)] += (
+            share * self_time
+        )
+        if len(path) >= max_depth:
+            return
+        for callee, edge_cumulative in callees[function]:
+            callee_cumulative = entries[callee][3]
+            if callee in path or not callee_cumulative:
+                continue
+            callee_share = share * edge_cumulative / callee_cumulative
+            # Skip branches below a microsecond in total
+            if callee_share * callee_cumulative >= 1e-6:
+                walk(callee, path, callee_share)
+
+    for function, (_, _, _, _, callers) in entries.items():
+        if not callers:
+            walk(function, (), 1.0)
+    return stacks
+
+
+def write_collapsed(stats: pstats.Stats, path: str) -> None:
+    """Write collapsed stacks with integer microsecond counts."""
+    with open(path, "w") as output:
+        for stack, seconds in sorted(collapsed_stacks(stats).items()):
+            microseconds = round(seconds * 1_000_000)
+            if microseconds:
+                output.write(f"{stack} {microseconds}\n")
+
+
+def is_authorized() -> bool:
+    token = current_app.config["PROFILE_TOKEN"]
+    supplied = request.headers.get(PROFILE_TOKEN_HEADER, "")
+    return bool(token) and hmac.compare_digest(supplied, token)
+
+
+def should_profile() -> bool:
+    if is_authorized():
+        return True
+    rate = current_app.config["PROFILE_SAMPLE_RATE"]
+    return rate > 0 and random.random() < rate
+
+
+def profile_exists(directory: str, profile_id: str) -> bool:
+    return any(
+        os.path.exists(os.path.join(directory, profile_id + suffix))
+        for suffix in PROFILE_SUFFIXES
+    )
+
+
+def request_id(directory: str) -> str:
+    """
+    The id to save the request's profile under. A client reusing an
+    X-Request-ID gets a suffix instead of overwriting the earlier profile.
+    """
+    supplied = request.headers.get("X-Request-ID", "")
+    if not REQUEST_ID_PATTERN.match(supplied):
+        return uuid.uuid4().hex
+    profile_id = supplied
+    while profile_exists(directory, profile_id):
+        profile_id = f"{supplied}-{uuid.uuid4().hex[:8]}"
+    return profile_id
+
+
+def start_profile():
+    if request.blueprint == admin.name or not should_profile():
+        return
+    if not _profiling.acquire(blocking=False):
+        return
+    profile = cProfile.Profile()
+    g.profile = (profile, time.perf_counter())
+    profile.enable()
+
+
+def save_profile(response):
+    state = g.get("profile")
+    if state is None:
+        return response
+    profile, start = state
+    profile.disable()
+    duration = time.perf_counter() - start
+
+    directory = current_app.config["PROFILE_DIR"]
+    profile_id = request_id(directory)
+    base = os.path.join(directory, profile_id)
+    stats = pstats.Stats(profile)
+    stats.dump_stats(f"{base}.prof")
+    write_collapsed(stats, f"{base}.collapsed")
+    with open(f"{base}.json", "w") as metadata:
+        json.dump(
+            {
+                "id": profile_id,
+                "method": request.method,
+                "path": request.full_path.rstrip("?"),
+                "endpoint": request.endpoint,
+                "status": response.status_code,
+                "duration_ms": round(duration * 1000, 2),
+                "created_at": datetime.now(timezone.utc).isoformat(),
+            },
+            metadata,
+        )
+    prune_profiles(directory, current_app.config["PROFILE_MAX_FILES"])
+    response.headers["X-Profile-Id"] = profile_id
+    return response
+
+
+def end_profile(exception=None):
+    state = g.pop("profile", None)
+    if state is not None:
+        # Still enabled when the request failed before save_profile
+        state[0].disable()
+        _profiling.release()
+
+
+def list_profiles(directory: str) -> list:
+    """Metadata of the captured profiles, newest first."""
+    profiles = []
+    for name in os.listdir(directory):
+        if not name.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(directory, name)) as metadata:
+                profiles.append(json.load(metadata))
+        except (OSError, ValueError):
+            # Being written or pruned concurrently
+            continue
+    profiles.sort(key=lambda profile: profile["created_at"], reverse=True)
+    return profiles
+
+
+def prune_profiles(directory: str, max_profiles: int) -> None:
+    """Delete all but the newest `max_profiles` profiles."""
+    for profile in list_profiles(directory)[max_profiles:]:
+        for suffix in PROFILE_SUFFIXES:
+            try:
+                os.remove(os.path.join(directory, profile["id"] + suffix))
+            except FileNotFoundError:
+                pass
+
+
+@admin.before_request
+def require_token():
+    if not is_authorized():
+        return jsonify({"error": "Forbidden"}), 403
+
+
+@admin.route("/profiles", methods=["GET"])
+def get_profiles():
+    """List the captured profiles, newest first, with their files."""
+    profiles = list_profiles(current_app.config["PROFILE_DIR"])
+    for profile in profiles:
+        profile["files"] = {
+            suffix.lstrip("."): f"/api/v1/admin/profiles/{profile['id']}"
+            f"{suffix}"
+            for suffix in PROFILE_SUFFIXES
+        }
+    return jsonify({"profiles": profiles}), 200
+
+
+@admin.route("/profiles/<name>", methods=["GET"])
+def download_profile(name):
+    """Download one file of a captured profile."""
+    return send_from_directory(
+        current_app.config["PROFILE_DIR"], name, as_attachment=True
+    )
+
+
+def init_profiling(app: Flask) -> None:
+    """Profile requests of `app` as configured, if profiling is enabled."""
+    directory = app.config["PROFILE_DIR"]
+    if not directory or not (
+        app.config["PROFILE_TOKEN"] or app.config["PROFILE_SAMPLE_RATE"] > 0
+    ):
+        return
+    os.makedirs(directory, exist_ok=True)
+    app.before_request(start_profile)
+    app.after_request(save_profile)
+    app.teardown_request(end_profile)
+    app.register_blueprint(admin)
@@ -0,0 +1,141 @@
+"""
+Production entry point: serves the API with gunicorn's prefork server and
+threaded (gthread) workers instead of the single-process development
+server.
+
+Usage:
+    uv run python -m entrypoints.serve
+
+Settings come from the SERVER_* environment variables (see
+config.ServerConfig). The app is created once in the master process and
+forked into the workers, which drop the inherited database connections
+(see entrypoints.flask_app.reset_after_fork). SIGHUP replaces the
+workers gracefully: new workers are started and the old ones finish their
+in-flight requests before exiting. The new workers are forked from the app
+the master created at startup, so SIGHUP does not reload code or settings;
+restart the master for that (with SERVER_PRELOAD=0, each worker imports
+the code and reads the settings itself, and SIGHUP picks up code changes).
+"""
+
+import logging
+import os
+
+from gunicorn.app.base import BaseApplication
+
+import config
+from config import ConfigError, DatabaseConfig, ServerConfig
+from entrypoints.flask_app import create_app, warm_up
+from entrypoints.metrics import mark_process_dead
+
+logger = logging.getLogger(__name__)
+
+
+def gunicorn_options(server_config: ServerConfig) -> dict:
+    """Gunicorn settings built from the server configuration."""
+    return {
+        "bind": server_config.bind,
+        "workers": server_config.worker_count(),
+        "worker_class": "gthread",
+        "threads": server_config.threads,
+        "max_requests": server_config.max_requests,
+        "max_requests_jitter": server_config.max_requests_jitter,
+        "timeout": server_config.timeout,
+        "graceful_timeout": server_config.graceful_timeout,
+        "keepalive": server_config.keepalive,
+        "backlog": server_config.backlog,
+        "preload_app": server_config.preload,
+        "accesslog": "-",
+        "errorlog": "-",
+    }
+
+
+def check_pool_capacity(
+    server_config: ServerConfig, database_config: DatabaseConfig
+) -> None:
+    """Warn when worker threads can outnumber a worker's connections."""
+    if database_config.pgbouncer:
+        return
+    capacity = database_config.pool_size + database_config.max_overflow
+    if server_config.threads > capacity:
+        logger.warning(
+            "SERVER_THREADS=%d exceeds DB_POOL_SIZE + DB_MAX_OVERFLOW=%d; "
+            "requests will wait for database connections",
+            server_config.threads,
+            capacity,
+        )
+
+
+def check_cache_invalidation(server_config: ServerConfig) -> None:
+    """
+    Refuse to start several workers whose grocery list caches would not see
+    each other's writes, and serve stale lists for up to ENTITY_CACHE_TTL.
+    """
+    workers = server_config.worker_count()
+    if workers < 2 or config.get_entity_cache_size() == 0:
+        return
+    if config.get_cache_invalidation() != "postgres":
+        raise ConfigError(
+            f"{workers} workers cannot share CACHE_INVALIDATION=local: set "
+            "CACHE_INVALIDATION=postgres, WEB_CONCURRENCY=1 or "
+            "ENTITY_CACHE_SIZE=0"
+        )
+
+
+class GroceryApplication(BaseApplication):
+    """Gunicorn application running create_app() with our settings."""
+
+    def __init__(self, options: dict, warm_up_connections: int = 0):
+        self.options = options
+        self.warm_up_connections = warm_up_connections
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+        if self.warm_up_connections:
+            self.cfg.set("post_worker_init", self.post_worker_init)
+        self.cfg.set("child_exit", self.child_exit)
+
+    def load(self):
+        # Warm-up runs in each worker, once its inherited pool is dropped
+        return create_app({"WARM_UP": False})
+
+    def post_worker_init(self, worker):
+        warm_up(worker.wsgi, connections=self.warm_up_connections)
+
+    def child_exit(self, server, worker):
+        mark_process_dead(worker.pid)
+
+
+def check_metrics_directory(server_config: ServerConfig) -> None:
+    """Warn when several workers would each report only their own metrics."""
+    if server_config.worker_count() > 1 and not os.environ.get(
+        "PROMETHEUS_MULTIPROC_DIR"
+    ):
+        logger.warning(
+            "PROMETHEUS_MULTIPROC_DIR is not set; /metrics will only report "
+            "the worker that answers each scrape"
+        )
+
+
+def main():
+    server_config = config.get_server_config()
+    database_config = config.get_database_config()
+    check_pool_capacity(server_config, database_config)
+    check_cache_invalidation(server_config)
+    check_metrics_directory(server_config)
+    # A worker runs at most one request per thread, so connections opened
+    # beyond that would only sit idle in each worker's pool
+    warm_up_connections = 0
+    if config.get_warm_up():
+        warm_up_connections = min(
+            server_config.threads, database_config.pool_size
+        )
+    GroceryApplication(
+        gunicorn_options(server_config),
+        warm_up_connections=warm_up_connections,
+    ).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Settings shared by the Flask and ASGI applications.
+"""
+
+import config
+
+# Relationship loading strategies per endpoint.
+# Serializing a list touches every item, so load them up front in one query.
+LIST_INDEX_LOAD = {"grocery_items": "selectin"}
+LIST_DETAIL_LOAD = {"grocery_items": "selectin"}
+
+
+# Application settings, each with the config.py function that reads its
+# default from the environment
+SETTINGS = {
+    # Engine and pool settings, validated before anything connects
+    "DATABASE_CONFIG": config.get_database_config,
+    # When enabled, relationships that are not eagerly loaded raise on access
+    # instead of silently issuing one query per parent (N+1). Meant for tests.
+    "RAISE_ON_LAZY_LOAD": config.get_raise_on_lazy_load,
+    # When enabled, full grocery list reads are built as JSON by the database
+    # and sent as is, without creating ORM objects
+    "DB_JSON_DOCUMENTS": config.get_db_json_documents,
+    "ENTITY_CACHE_SIZE": config.get_entity_cache_size,
+    "ENTITY_CACHE_TTL": config.get_entity_cache_ttl,
+    "CACHE_INVALIDATION": config.get_cache_invalidation,
+    # Concurrent reads of the same list share one query and payload, which
+    # is reused for SINGLE_FLIGHT_WINDOW seconds after it completes
+    "SINGLE_FLIGHT": config.get_single_flight,
+    "SINGLE_FLIGHT_WINDOW": config.get_single_flight_window,
+    "JSON_BACKEND": config.get_json_backend,
+    # Group commit of single item purchase/unpurchase toggles, see
+    # service_layer/write_buffer.py
+    "STATUS_WRITE_BUFFER": config.get_status_write_buffer,
+    "STATUS_FLUSH_INTERVAL": config.get_status_flush_interval,
+    "STATUS_FLUSH_MAX_BATCH": config.get_status_flush_max_batch,
+    "WARM_UP": config.get_warm_up,
+    # Per-request SQL/ORM/serialization timings in a Server-Timing header
+    # and a log line, and the threshold (seconds) of the slow query log
+    "SERVER_TIMING": config.get_server_timing,
+    "SLOW_QUERY_THRESHOLD": config.get_slow_query_threshold,
+    # Prometheus metrics at GET /metrics
+    "METRICS": config.get_metrics,
+    # Opt-in request profiling, see entrypoints/profiling.py
+    "PROFILE_DIR": config.get_profile_dir,
+    "PROFILE_TOKEN": config.get_profile_token,
+    "PROFILE_SAMPLE_RATE": config.get_profile_sample_rate,
+    "PROFILE_MAX_FILES": config.get_profile_max_files,
+}
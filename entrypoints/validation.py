@@ -0,0 +1,308 @@
+"""
+Request validation and HTTP caching helpers shared by the Flask (WSGI) and
+ASGI entry points. They work on plain values (parsed JSON bodies, query
+argument mappings, raw header values) so they do not depend on either
+framework's request object.
+"""
+
+import hashlib
+from datetime import datetime, timezone
+from typing import Mapping, Optional
+
+from werkzeug.http import parse_date, parse_etags
+
+from domain.models import ItemStatus
+
+# Keyset pagination defaults for collection endpoints
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Upper bound on the number of items accepted by the bulk endpoints
+MAX_BULK_ITEMS = 500
+
+# Upper bound on the number of operations of a batch request
+MAX_BATCH_OPERATIONS = 100
+
+
+def parse_pagination_args(args: Mapping[str, str]):
+    """
+    Parse `limit` and `after` query parameters.
+    Returns a (limit, after, error) tuple where error is None when valid.
+    """
+    try:
+        limit = int(args.get("limit", DEFAULT_PAGE_SIZE))
+        after = args.get("after")
+        after = int(after) if after is not None else None
+    except ValueError:
+        return None, None, "limit and after must be integers"
+
+    if limit < 1 or limit > MAX_PAGE_SIZE:
+        return None, None, f"limit must be between 1 and {MAX_PAGE_SIZE}"
+    return limit, after, None
+
+
+def parse_status_filter(status: Optional[str]):
+    """
+    Parse the optional `status` query parameter.
+    Returns a (status, error) tuple where error is None when valid.
+    """
+    if status is None:
+        return None, None
+    try:
+        return ItemStatus(status), None
+    except ValueError:
+        return None, "status must be 'pending' or 'purchased'"
+
+
+def validate_list_name(data):
+    """
+    Validate the payload for creating or renaming a grocery list.
+    Returns a (name, error) tuple where error is None when valid.
+    """
+    if not data or "name" not in data:
+        return None, "Name is required"
+
+    name = data["name"].strip() if isinstance(data["name"], str) else ""
+    if not name:
+        return None, "Name cannot be empty"
+    return name, None
+
+
+def validate_new_item(data):
+    """
+    Validate the payload for a new grocery item.
+    Returns a (name, quantity, error) tuple where error is None when valid.
+    """
+    if not isinstance(data, dict) or "name" not in data:
+        return None, None, "Item name is required"
+
+    name = data["name"].strip() if isinstance(data["name"], str) else ""
+    if not name:
+        return None, None, "Item name cannot be empty"
+
+    quantity = data.get("quantity", 1)
+    if not isinstance(quantity, int) or quantity < 1:
+        return None, None, "Quantity must be a positive integer"
+    return name, quantity, None
+
+
+def validate_new_items(data):
+    """
+    Validate the payload for adding several grocery items at once.
+    Returns an (items, error) tuple where error is None when valid.
+    """
+    if not isinstance(data, list) or not data:
+        return None, "A non-empty array of items is required"
+    if len(data) > MAX_BULK_ITEMS:
+        return None, f"At most {MAX_BULK_ITEMS} items can be added"
+
+    items = []
+    for index, item_data in enumerate(data):
+        name, quantity, error = validate_new_item(item_data)
+        if error:
+            return None, f"Item {index}: {error}"
+        items.append({"name": name, "quantity": quantity})
+    return items, None
+
+
+def validate_item_update(data):
+    """
+    Validate the payload for updating a grocery item's name and/or quantity.
+    Returns a (name, quantity, error) tuple where error is None when valid.
+    """
+    if not data:
+        return None, None, "Request body is required"
+
+    # Extract optional fields
+    name = data.get("name")
+    quantity = data.get("quantity")
+
+    # Validate name if provided
+    if name is not None:
+        name = name.strip() if isinstance(name, str) else ""
+        if not name:
+            return None, None, "Name cannot be empty"
+
+    # Validate quantity if provided
+    if quantity is not None:
+        if not isinstance(quantity, int) or quantity < 1:
+            return None, None, "Quantity must be a positive integer"
+
+    # At least one field must be provided
+    if name is None and quantity is None:
+        return (
+            None,
+            None,
+            "At least one field (name or quantity) must be provided",
+        )
+    return name, quantity, None
+
+
+def parse_item_selection(data):
+    """
+    Parse a bulk status change payload: either `{"item_ids": [...]}` or
+    `{"all": true}`. Returns an (item_ids, error) tuple where item_ids is
+    None when every item should be changed.
+    """
+    if not isinstance(data, dict):
+        return None, "Request body is required"
+    if data.get("all") is True:
+        return None, None
+
+    item_ids = data.get("item_ids")
+    if (
+        not isinstance(item_ids, list)
+        or not item_ids
+        or not all(isinstance(item_id, int) for item_id in item_ids)
+    ):
+        return None, "item_ids must be a non-empty array of integers"
+    if len(item_ids) > MAX_BULK_ITEMS:
+        return None, f"At most {MAX_BULK_ITEMS} items can be changed"
+    return item_ids, None
+
+
+def _validate_list_payload(data):
+    name, error = validate_list_name(data)
+    return {"name": name}, error
+
+
+def _validate_item_payload(data):
+    name, quantity, error = validate_new_item(data)
+    return {"name": name, "quantity": quantity}, error
+
+
+def _validate_item_update_payload(data):
+    name, quantity, error = validate_item_update(data)
+    return {"name": name, "quantity": quantity}, error
+
+
+# Operations of a batch request: the ID argument each one takes, the
+# validator of its other arguments and the kind of entity it creates, if
+# any, which later operations may reference
+BATCH_OPERATIONS = {
+    "create_list": (None, _validate_list_payload, "list"),
+    "rename_list": ("list_id", _validate_list_payload, None),
+    "delete_list": ("list_id", None, None),
+    "add_item": ("list_id", _validate_item_payload, "item"),
+    "update_item": ("item_id", _validate_item_update_payload, None),
+    "purchase_item": ("item_id", None, None),
+    "unpurchase_item": ("item_id", None, None),
+    "delete_item": ("item_id", None, None),
+}
+
+# The kind of entity each ID argument names
+BATCH_ID_KINDS = {"list_id": "list", "item_id": "item"}
+
+
+def _parse_batch_id(value, field: str, refs: dict):
+    """
+    An ID argument: an integer, or `{"$ref": name}` naming an entity of the
+    right kind created by an earlier operation of the batch.
+    """
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value, None
+    if isinstance(value, dict) and set(value) == {"$ref"}:
+        ref = value["$ref"]
+        if not isinstance(ref, str):
+            return None, f"{field} $ref must be a string"
+        if ref not in refs:
+            return None, f"{field} references unknown ref {ref!r}"
+        if refs[ref] != BATCH_ID_KINDS[field]:
+            return None, f"{field} references {ref!r}, which is a {refs[ref]}"
+        return value, None
+    return None, f'{field} must be an integer or a {{"$ref": ...}} object'
+
+
+def _validate_batch_operation(data, refs: dict):
+    if not isinstance(data, dict):
+        return None, "Operation must be an object"
+    op = data.get("op")
+    if op not in BATCH_OPERATIONS:
+        return None, f"op must be one of {', '.join(BATCH_OPERATIONS)}"
+    id_field, validate_payload, creates = BATCH_OPERATIONS[op]
+
+    operation = {"op": op}
+    if id_field is not None:
+        operation[id_field], error = _parse_batch_id(
+            data.get(id_field), id_field, refs
+        )
+        if error:
+            return None, error
+    if validate_payload is not None:
+        payload, error = validate_payload(data)
+        if error:
+            return None, error
+        operation.update(payload)
+
+    if "ref" in data:
+        ref = data["ref"]
+        if creates is None:
+            return None, f"{op} creates nothing to reference"
+        if not isinstance(ref, str) or not ref:
+            return None, "ref must be a non-empty string"
+        if ref in refs:
+            return None, f"Duplicate ref {ref!r}"
+        refs[ref] = creates
+        operation["ref"] = ref
+    return operation, None
+
+
+def validate_batch(data):
+    """
+    Validate the payload of a batch request, `{"operations": [...]}`. Each
+    operation names its `op` (see BATCH_OPERATIONS) and takes the same
+    arguments as the matching endpoint, plus the ID of the list or item it
+    acts on. Creating operations may set a `ref` that later operations use
+    in place of an ID, as `{"$ref": name}`.
+    Returns an (operations, error) tuple where error is None when valid.
+    """
+    operations = data.get("operations") if isinstance(data, dict) else None
+    if not isinstance(operations, list) or not operations:
+        return None, "A non-empty array of operations is required"
+    if len(operations) > MAX_BATCH_OPERATIONS:
+        return None, f"At most {MAX_BATCH_OPERATIONS} operations are allowed"
+
+    refs = {}
+    validated = []
+    for index, operation_data in enumerate(operations):
+        operation, error = _validate_batch_operation(operation_data, refs)
+        if error:
+            return None, f"Operation {index}: {error}"
+        validated.append(operation)
+    return validated, None
+
+
+def make_validators(version, path: str, query_string: bytes):
+    """
+    Build a strong ETag and a Last-Modified date from a resource version
+    (see AbstractRepository.get_version). The ETag also covers the query
+    string, since filters and pagination change the representation.
+    """
+    fingerprint = repr((version, path, query_string))
+    etag = hashlib.sha256(fingerprint.encode()).hexdigest()[:32]
+    timestamps = [
+        value.astimezone(timezone.utc)
+        for value in version
+        if isinstance(value, datetime)
+    ]
+    last_modified = max(timestamps) if timestamps else None
+    return etag, last_modified
+
+
+def is_not_modified(
+    etag,
+    last_modified,
+    if_none_match: Optional[str],
+    if_modified_since: Optional[str],
+):
+    """
+    Evaluate the raw If-None-Match header, or If-Modified-Since when no
+    If-None-Match is sent (RFC 9110 precedence).
+    """
+    if if_none_match:
+        return parse_etags(if_none_match).contains(etag)
+    modified_since = parse_date(if_modified_since)
+    if modified_since and last_modified:
+        # HTTP dates have a resolution of one second
+        return last_modified.replace(microsecond=0) <= modified_since
+    return False
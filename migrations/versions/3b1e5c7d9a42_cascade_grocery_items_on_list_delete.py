@@ -0,0 +1,47 @@
+"""Cascade grocery_items deletes from grocery_lists at the database level
+
+Revision ID: 3b1e5c7d9a42
+Revises: f879a92970d9
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "3b1e5c7d9a42"
+down_revision = "f879a92970d9"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.drop_constraint(
+        "grocery_items_grocery_list_id_fkey",
+        "grocery_items",
+        type_="foreignkey",
+    )
+    op.create_foreign_key(
+        "grocery_items_grocery_list_id_fkey",
+        "grocery_items",
+        "grocery_lists",
+        ["grocery_list_id"],
+        ["id"],
+        ondelete="CASCADE",
+    )
+
+
+def downgrade():
+    op.drop_constraint(
+        "grocery_items_grocery_list_id_fkey",
+        "grocery_items",
+        type_="foreignkey",
+    )
+    op.create_foreign_key(
+        "grocery_items_grocery_list_id_fkey",
+        "grocery_items",
+        "grocery_lists",
+        ["grocery_list_id"],
+        ["id"],
+    )
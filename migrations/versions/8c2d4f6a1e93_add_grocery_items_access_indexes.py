@@ -0,0 +1,67 @@
+"""Add grocery_items indexes for per-list pages, status and delta reads
+
+Revision ID: 8c2d4f6a1e93
+Revises: 3b1e5c7d9a42
+Create Date: 2026-10-17 10:00:00.000000
+
+The indexes are built with CREATE INDEX CONCURRENTLY so the migration can
+run against a live table without blocking writes. CONCURRENTLY cannot run
+inside a transaction, hence the autocommit blocks.
+
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "8c2d4f6a1e93"
+down_revision = "3b1e5c7d9a42"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_grocery_items_grocery_list_id_status",
+            "grocery_items",
+            ["grocery_list_id", "status"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_grocery_items_grocery_list_id_id",
+            "grocery_items",
+            ["grocery_list_id", "id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_grocery_items_grocery_list_id_updated_at_id",
+            "grocery_items",
+            ["grocery_list_id", "updated_at", "id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_grocery_items_grocery_list_id_updated_at_id",
+            table_name="grocery_items",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            "ix_grocery_items_grocery_list_id_id",
+            table_name="grocery_items",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            "ix_grocery_items_grocery_list_id_status",
+            table_name="grocery_items",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,275 @@
+"""
+asyncio versions of the services in service_layer.services, working on
+AbstractAsyncRepository. The business rules stay in the domain model; as in
+the synchronous services, transactions are handled by the entry point.
+"""
+
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
+
+from adapters.async_repository import AbstractAsyncRepository
+from domain.models import GroceryItem, GroceryList, ItemStatus
+
+
+class AsyncGroceryListService:
+    """Service layer for grocery list operations."""
+
+    def __init__(
+        self,
+        grocery_list_repo: AbstractAsyncRepository[GroceryList],
+    ):
+        self.grocery_list_repo = grocery_list_repo
+
+    async def create_grocery_list(self, name: str) -> GroceryList:
+        """Create a new grocery list."""
+        grocery_list = GroceryList(name=name)
+        # A new list has no items; set the collection so serializing it
+        # does not try to load them
+        grocery_list.grocery_items = []
+        return await self.grocery_list_repo.add(grocery_list)
+
+    async def get_grocery_list(self, list_id: int) -> Optional[GroceryList]:
+        """Get a grocery list by ID."""
+        return await self.grocery_list_repo.get_by_id(list_id)
+
+    async def get_grocery_list_json(self, list_id: int) -> Optional[bytes]:
+        """Get a grocery list with its items as an encoded JSON document."""
+        return await self.grocery_list_repo.get_json(list_id)
+
+    async def get_grocery_list_version(self, list_id: int) -> Optional[tuple]:
+        """Get a fingerprint of a grocery list and its items."""
+        return await self.grocery_list_repo.get_version(list_id)
+
+    async def get_grocery_lists_page(
+        self, limit: int, after: Optional[int] = None
+    ) -> dict:
+        """Get a page of grocery lists along with the cursor for the next page."""
+        grocery_lists, next_cursor = await _paginate(
+            self.grocery_list_repo, limit, after
+        )
+        return {"grocery_lists": grocery_lists, "next_cursor": next_cursor}
+
+    async def update_grocery_list(
+        self, list_id: int, name: str
+    ) -> Optional[GroceryList]:
+        """Update a grocery list's name."""
+        grocery_list = await self.grocery_list_repo.get_by_id(list_id)
+        if grocery_list:
+            grocery_list.update(name=name)
+            return await self.grocery_list_repo.update(grocery_list)
+        return None
+
+    async def delete_grocery_list(self, list_id: int) -> bool:
+        """Delete a grocery list (the database cascades the delete to its items)."""
+        return await self.grocery_list_repo.delete_by_id(list_id)
+
+
+class AsyncGroceryItemService:
+    """Service layer for grocery item operations."""
+
+    def __init__(
+        self,
+        grocery_item_repo: AbstractAsyncRepository[GroceryItem],
+        grocery_list_repo: AbstractAsyncRepository[GroceryList],
+    ):
+        self.grocery_item_repo = grocery_item_repo
+        self.grocery_list_repo = grocery_list_repo
+
+    async def add_item_to_list(
+        self, list_id: int, name: str, quantity: int = 1
+    ) -> Optional[GroceryItem]:
+        """Add a new item to a grocery list."""
+        grocery_list = await self.grocery_list_repo.get_by_id(list_id)
+        if not grocery_list:
+            return None
+
+        item = GroceryItem(name=name, quantity=quantity)
+        # Set the foreign key rather than the relationship, whose backref
+        # would have to load the list's items
+        item.grocery_list_id = list_id
+        new_item = await self.grocery_item_repo.add(item)
+        await self._touch_list(grocery_list, new_item.updated_at)
+        return new_item
+
+    async def add_items_bulk(
+        self, list_id: int, items: List[dict]
+    ) -> Optional[List[GroceryItem]]:
+        """
+        Add several items to a grocery list in one statement.
+        Each entry of `items` holds a `name` and an optional `quantity`.
+        """
+        grocery_list = await self.grocery_list_repo.get_by_id(list_id)
+        if not grocery_list:
+            return None
+
+        new_items = []
+        for item_data in items:
+            item = GroceryItem(
+                name=item_data["name"], quantity=item_data.get("quantity", 1)
+            )
+            item.grocery_list_id = list_id
+            new_items.append(item)
+        new_items = await self.grocery_item_repo.add_all(new_items)
+        if new_items:
+            await self._touch_list(grocery_list, new_items[0].updated_at)
+        return new_items
+
+    async def get_items_by_list(
+        self,
+        list_id: int,
+        limit: Optional[int] = None,
+        after: Optional[int] = None,
+        status: Optional[ItemStatus] = None,
+    ) -> Optional[dict]:
+        """
+        Get grocery items for a specific grocery list along with the list
+        name, see GroceryItemService.get_items_by_list.
+        """
+        grocery_list = await self.grocery_list_repo.get_by_id(list_id)
+        if not grocery_list:
+            return None
+
+        filters = {"grocery_list_id": list_id}
+        if status is not None:
+            filters["status"] = status
+
+        if limit is None:
+            items = await self.grocery_item_repo.find_by(**filters)
+            next_cursor = None
+        else:
+            items, next_cursor = await _paginate(
+                self.grocery_item_repo, limit, after, **filters
+            )
+        return {
+            "grocery_list_name": grocery_list.name,
+            "items": items,
+            "next_cursor": next_cursor,
+        }
+
+    async def update_item(
+        self,
+        item_id: int,
+        name: Optional[str] = None,
+        quantity: Optional[int] = None,
+    ) -> Optional[GroceryItem]:
+        """Update a grocery item."""
+        return await self._update_item(
+            item_id, GroceryItem.update_changes(name=name, quantity=quantity)
+        )
+
+    async def mark_item_as_purchased(
+        self, item_id: int
+    ) -> Optional[GroceryItem]:
+        """Mark an item as purchased."""
+        return await self._update_item(
+            item_id, GroceryItem.purchased_changes()
+        )
+
+    async def mark_item_as_pending(
+        self, item_id: int
+    ) -> Optional[GroceryItem]:
+        """Mark an item as pending."""
+        return await self._update_item(item_id, GroceryItem.pending_changes())
+
+    async def _update_item(
+        self, item_id: int, changes: dict
+    ) -> Optional[GroceryItem]:
+        items = await self.grocery_item_repo.bulk_update(changes, [item_id])
+        if not items:
+            return None
+        await self._touch_lists(
+            [items[0].grocery_list_id], changes["updated_at"]
+        )
+        return items[0]
+
+    async def mark_items_as_purchased(
+        self, list_id: int, item_ids: Optional[List[int]] = None
+    ) -> Optional[List[GroceryItem]]:
+        """
+        Mark several items of a grocery list as purchased in one statement.
+        Without `item_ids` every pending item of the list is marked.
+        """
+        return await self._set_items_status(
+            list_id,
+            item_ids,
+            GroceryItem.purchased_changes(),
+            current_status=ItemStatus.PENDING,
+        )
+
+    async def mark_items_as_pending(
+        self, list_id: int, item_ids: Optional[List[int]] = None
+    ) -> Optional[List[GroceryItem]]:
+        """
+        Mark several items of a grocery list as pending in one statement.
+        Without `item_ids` every purchased item of the list is marked.
+        """
+        return await self._set_items_status(
+            list_id,
+            item_ids,
+            GroceryItem.pending_changes(),
+            current_status=ItemStatus.PURCHASED,
+        )
+
+    async def _set_items_status(
+        self,
+        list_id: int,
+        item_ids: Optional[List[int]],
+        changes: dict,
+        current_status: ItemStatus,
+    ) -> Optional[List[GroceryItem]]:
+        filters = {"grocery_list_id": list_id}
+        if item_ids is None:
+            filters["status"] = current_status
+        items = await self.grocery_item_repo.bulk_update(
+            changes, item_ids, **filters
+        )
+        if items:
+            await self._touch_lists([list_id], changes["updated_at"])
+        # Only look the list up when nothing matched, to tell an empty
+        # result apart from a missing list
+        elif not await self.grocery_list_repo.get_by_id(list_id):
+            return None
+        return items
+
+    async def delete_item(self, item_id: int) -> bool:
+        """Delete a grocery item."""
+        # Loaded first for its list, which the delete changes too
+        item = await self.grocery_item_repo.get_by_id(item_id)
+        if not item or not await self.grocery_item_repo.delete_by_id(item_id):
+            return False
+        await self._touch_lists([item.grocery_list_id])
+        return True
+
+    async def _touch_list(
+        self, grocery_list: GroceryList, changed_at: datetime
+    ) -> None:
+        """Move a loaded list's updated_at forward, see _touch_lists."""
+        grocery_list.touch(changed_at)
+        await self.grocery_list_repo.update(grocery_list)
+
+    async def _touch_lists(
+        self, list_ids: Iterable[int], changed_at: Optional[datetime] = None
+    ) -> None:
+        """
+        Move the updated_at of lists whose items changed forward, see
+        GroceryItemService._touch_lists.
+        """
+        list_ids = sorted(list_ids)
+        if list_ids:
+            await self.grocery_list_repo.bulk_update(
+                GroceryList.touch_changes(changed_at), list_ids
+            )
+
+
+async def _paginate(
+    repo: AbstractAsyncRepository,
+    limit: int,
+    after: Optional[int],
+    **filters,
+) -> Tuple[list, Optional[int]]:
+    """Fetch one page from `repo`, see service_layer.services._paginate."""
+    entities = await repo.get_page(limit + 1, after, **filters)
+    if len(entities) > limit:
+        entities = entities[:limit]
+        return entities, entities[-1].id
+    return entities, None
@@ -1,12 +1,13 @@
 """
 The service layer is only concerned with orchestrate business logic,
-transaction management (committing or rolling back) is handled by endpoints.
+transaction management (committing or rolling back) is handled by endpoints
+through a unit of work (see unit_of_work.py).
 """
 
-from typing import List, Optional
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
 from adapters.repository import AbstractRepository
-from domain.models import GroceryList, GroceryItem
-from sqlalchemy.orm import Session
+from domain.models import GroceryList, GroceryItem, ItemStatus
 
 
 class GroceryListService:
@@ -21,6 +22,9 @@ class GroceryListService:
     def create_grocery_list(self, name: str) -> GroceryList:
         """Create a new grocery list."""
         grocery_list = GroceryList(name=name)
+        # A new list has no items; set the collection so serializing it
+        # does not try to load them
+        grocery_list.grocery_items = []
         new_grocery_list = self.grocery_list_repo.add(grocery_list)
         return new_grocery_list
 
@@ -28,10 +32,33 @@ class GroceryListService:
         """Get a grocery list by ID."""
         return self.grocery_list_repo.get_by_id(list_id)
 
+    def get_grocery_list_json(self, list_id: int) -> Optional[bytes]:
+        """
+        Get a grocery list with its items as an encoded JSON document built
+        by the data store, without loading any domain objects.
+        """
+        return self.grocery_list_repo.get_json(list_id)
+
+    def get_grocery_list_version(self, list_id: int) -> Optional[tuple]:
+        """
+        Get a fingerprint of a grocery list and its items that changes
+        whenever either is modified, without loading them.
+        """
+        return self.grocery_list_repo.get_version(list_id)
+
     def get_all_grocery_lists(self) -> List[GroceryList]:
         """Get all grocery lists."""
         return self.grocery_list_repo.get_all()
 
+    def get_grocery_lists_page(
+        self, limit: int, after: Optional[int] = None
+    ) -> dict:
+        """Get a page of grocery lists along with the cursor for the next page."""
+        grocery_lists, next_cursor = _paginate(
+            self.grocery_list_repo, limit, after
+        )
+        return {"grocery_lists": grocery_lists, "next_cursor": next_cursor}
+
     def update_grocery_list(
         self, list_id: int, name: str
     ) -> Optional[GroceryList]:
@@ -44,17 +71,8 @@ class GroceryListService:
         return None
 
     def delete_grocery_list(self, list_id: int) -> bool:
-        """Delete a grocery list (cascade will automatically delete all items)."""
-        # Get the grocery list object first to enable cascade
-        grocery_list = self.grocery_list_repo.get_by_id(list_id)
-        if not grocery_list:
-            return False
-
-        # Access the session from the repository
-        session = self.grocery_list_repo.session
-        # Delete the object through the session to trigger ORM cascade
-        session.delete(grocery_list)
-        return True
+        """Delete a grocery list (the database cascades the delete to its items)."""
+        return self.grocery_list_repo.delete_by_id(list_id)
 
 
 class GroceryItemService:
@@ -64,7 +82,6 @@ class GroceryItemService:
         self,
         grocery_item_repo: AbstractRepository[GroceryItem],
         grocery_list_repo: AbstractRepository[GroceryList],
-        session: Session,
     ):
         self.grocery_item_repo = grocery_item_repo
         self.grocery_list_repo = grocery_list_repo
@@ -81,20 +98,68 @@ class GroceryItemService:
         item = GroceryItem(name=name, quantity=quantity)
         item.grocery_list = grocery_list
         new_item = self.grocery_item_repo.add(item)
+        self._touch_list(grocery_list, new_item.updated_at)
         return new_item
 
+    def add_items_bulk(
+        self, list_id: int, items: List[dict]
+    ) -> Optional[List[GroceryItem]]:
+        """
+        Add several items to a grocery list in one statement.
+        Each entry of `items` holds a `name` and an optional `quantity`.
+        """
+        grocery_list = self.grocery_list_repo.get_by_id(list_id)
+        if not grocery_list:
+            return None
+
+        new_items = []
+        for item_data in items:
+            item = GroceryItem(
+                name=item_data["name"], quantity=item_data.get("quantity", 1)
+            )
+            item.grocery_list_id = list_id
+            new_items.append(item)
+        new_items = self.grocery_item_repo.add_all(new_items)
+        if new_items:
+            self._touch_list(grocery_list, new_items[0].updated_at)
+        return new_items
+
     def get_item(self, item_id: int) -> Optional[GroceryItem]:
         """Get a grocery item by ID."""
         return self.grocery_item_repo.get_by_id(item_id)
 
-    def get_items_by_list(self, list_id: int) -> Optional[dict]:
-        """Get all grocery items for a specific grocery list along with the list name."""
+    def get_items_by_list(
+        self,
+        list_id: int,
+        limit: Optional[int] = None,
+        after: Optional[int] = None,
+        status: Optional[ItemStatus] = None,
+    ) -> Optional[dict]:
+        """
+        Get grocery items for a specific grocery list along with the list name.
+        When `limit` is given only one page of items is returned, together
+        with the cursor for the next page. `status` filters the items in the
+        database.
+        """
         grocery_list = self.grocery_list_repo.get_by_id(list_id)
         if not grocery_list:
             return None
+
+        filters = {"grocery_list_id": list_id}
+        if status is not None:
+            filters["status"] = status
+
+        if limit is None:
+            items = self.grocery_item_repo.find_by(**filters)
+            next_cursor = None
+        else:
+            items, next_cursor = _paginate(
+                self.grocery_item_repo, limit, after, **filters
+            )
         return {
             "grocery_list_name": grocery_list.name,
-            "items": grocery_list.grocery_items
+            "items": items,
+            "next_cursor": next_cursor,
         }
 
     def update_item(
@@ -104,34 +169,147 @@ class GroceryItemService:
         quantity: Optional[int] = None,
     ) -> Optional[GroceryItem]:
         """Update a grocery item."""
-        item = self.get_item(item_id)
-        if item:
-            item.update(name=name, quantity=quantity)
-            updated_item = self.grocery_item_repo.update(item)
-            return updated_item
-        return None
+        return self._update_item(
+            item_id, GroceryItem.update_changes(name=name, quantity=quantity)
+        )
 
     def mark_item_as_purchased(self, item_id: int) -> Optional[GroceryItem]:
         """Mark an item as purchased."""
-        item = self.get_item(item_id)
-        if item:
-            item.mark_as_purchased()
-            updated_item = self.grocery_item_repo.update(item)
-            return updated_item
-        return None
+        return self._update_item(item_id, GroceryItem.purchased_changes())
 
     def mark_item_as_pending(self, item_id: int) -> Optional[GroceryItem]:
         """Mark an item as pending."""
-        item = self.get_item(item_id)
-        if item:
-            item.mark_as_pending()
-            updated_item = self.grocery_item_repo.update(item)
-            return updated_item
-        return None
+        return self._update_item(item_id, GroceryItem.pending_changes())
+
+    def apply_item_changes(
+        self, changes_by_item: Dict[int, dict]
+    ) -> Dict[int, Optional[GroceryItem]]:
+        """
+        Apply queued changes to several items, e.g. a batch of status
+        toggles, with one UPDATE ... RETURNING per item. Items that do not
+        exist map to None.
+
+        updated_at is set when the batch is applied rather than when the
+        changes were queued: a write committed in between must not look
+        newer than these changes, or their list's version would not move.
+        """
+        applied_at = datetime.now()
+        items = {}
+        for item_id, changes in changes_by_item.items():
+            updated = self.grocery_item_repo.bulk_update(
+                {**changes, "updated_at": applied_at}, [item_id]
+            )
+            items[item_id] = updated[0] if updated else None
+        self._touch_lists(
+            {item.grocery_list_id for item in items.values() if item},
+            applied_at,
+        )
+        return items
+
+    def _update_item(
+        self, item_id: int, changes: dict
+    ) -> Optional[GroceryItem]:
+        """
+        Apply the domain's changes to one item with a single
+        UPDATE ... RETURNING, without loading the item first.
+        """
+        items = self.grocery_item_repo.bulk_update(changes, [item_id])
+        if not items:
+            return None
+        self._touch_lists([items[0].grocery_list_id], changes["updated_at"])
+        return items[0]
+
+    def mark_items_as_purchased(
+        self, list_id: int, item_ids: Optional[List[int]] = None
+    ) -> Optional[List[GroceryItem]]:
+        """
+        Mark several items of a grocery list as purchased in one statement.
+        Without `item_ids` every pending item of the list is marked.
+        """
+        return self._set_items_status(
+            list_id,
+            item_ids,
+            GroceryItem.purchased_changes(),
+            current_status=ItemStatus.PENDING,
+        )
+
+    def mark_items_as_pending(
+        self, list_id: int, item_ids: Optional[List[int]] = None
+    ) -> Optional[List[GroceryItem]]:
+        """
+        Mark several items of a grocery list as pending in one statement.
+        Without `item_ids` every purchased item of the list is marked.
+        """
+        return self._set_items_status(
+            list_id,
+            item_ids,
+            GroceryItem.pending_changes(),
+            current_status=ItemStatus.PURCHASED,
+        )
+
+    def _set_items_status(
+        self,
+        list_id: int,
+        item_ids: Optional[List[int]],
+        changes: dict,
+        current_status: ItemStatus,
+    ) -> Optional[List[GroceryItem]]:
+        filters = {"grocery_list_id": list_id}
+        if item_ids is None:
+            filters["status"] = current_status
+        items = self.grocery_item_repo.bulk_update(
+            changes, item_ids, **filters
+        )
+        if items:
+            self._touch_lists([list_id], changes["updated_at"])
+        # Only look the list up when nothing matched, to tell an empty
+        # result apart from a missing list
+        elif not self.grocery_list_repo.get_by_id(list_id):
+            return None
+        return items
 
     def delete_item(self, item_id: int) -> bool:
         """Delete a grocery item."""
-        # Simply delete the item from the repository
-        # The database foreign key relationship will handle the consistency
-        is_deleted = self.grocery_item_repo.delete_by_id(item_id)
-        return is_deleted
+        # Loaded first for its list, which the delete changes too
+        item = self.grocery_item_repo.get_by_id(item_id)
+        if not item or not self.grocery_item_repo.delete_by_id(item_id):
+            return False
+        self._touch_lists([item.grocery_list_id])
+        return True
+
+    def _touch_list(
+        self, grocery_list: GroceryList, changed_at: datetime
+    ) -> None:
+        """Move a loaded list's updated_at forward, see _touch_lists."""
+        grocery_list.touch(changed_at)
+        self.grocery_list_repo.update(grocery_list)
+
+    def _touch_lists(
+        self, list_ids: Iterable[int], changed_at: Optional[datetime] = None
+    ) -> None:
+        """
+        Move the updated_at of lists whose items changed forward, in the
+        same transaction, with one UPDATE. A list's version and
+        Last-Modified then cover item inserts, updates and deletes, which
+        an item's own updated_at cannot show once the item is gone.
+        """
+        list_ids = sorted(list_ids)
+        if list_ids:
+            self.grocery_list_repo.bulk_update(
+                GroceryList.touch_changes(changed_at), list_ids
+            )
+
+
+def _paginate(
+    repo: AbstractRepository, limit: int, after: Optional[int], **filters
+) -> Tuple[list, Optional[int]]:
+    """
+    Fetch one page from `repo`, returning the entities and the cursor for the
+    next page (None on the last page). One extra row is requested to tell
+    whether another page exists without a separate COUNT query.
+    """
+    entities = repo.get_page(limit + 1, after, **filters)
+    if len(entities) > limit:
+        entities = entities[:limit]
+        return entities, entities[-1].id
+    return entities, None
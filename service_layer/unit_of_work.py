@@ -0,0 +1,101 @@
+"""
+Unit of Work: the repositories of one operation and its transaction.
+
+Endpoints run inside `with uow:`, hand the unit's repositories to the
+services and call `uow.commit()` once the operation succeeded. Leaving the
+block without committing (a 404, a validation error or an exception)
+rolls back everything done inside it.
+"""
+
+from abc import ABC, abstractmethod
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from adapters.cache import EntityCache
+from adapters.repository import (
+    AbstractRepository,
+    CachedRepository,
+    LoadOptions,
+    SqlAlchemyRepository,
+)
+from domain.models import GroceryItem, GroceryList
+
+
+class AbstractUnitOfWork(ABC):
+    grocery_lists: AbstractRepository[GroceryList]
+    grocery_items: AbstractRepository[GroceryItem]
+
+    def __enter__(self) -> "AbstractUnitOfWork":
+        return self
+
+    def __exit__(self, *args) -> None:
+        # A no-op after commit; otherwise the work is discarded
+        self.rollback()
+
+    def flush(self) -> None:
+        """Send pending changes to the data store, e.g. to assign IDs."""
+
+    @abstractmethod
+    def commit(self) -> None:
+        """Make the work done in this unit permanent."""
+        ...
+
+    @abstractmethod
+    def rollback(self) -> None:
+        """Discard the work done in this unit since the last commit."""
+        ...
+
+
+class SqlAlchemyUnitOfWork(AbstractUnitOfWork):
+    """
+    Unit of work over a SQLAlchemy session.
+
+    New entities are not flushed when added but when the session next
+    queries or commits, so the inserts of one operation go out in a single
+    flush (batched with insertmanyvalues where the dialect supports it)
+    instead of one round trip each. Their IDs are set by then.
+
+    Grocery lists are read through `list_cache` when given, and loaded with
+    the `list_load` relationship strategies.
+    """
+
+    def __init__(
+        self,
+        session: Session,
+        list_cache: Optional[EntityCache] = None,
+        list_load: Optional[LoadOptions] = None,
+        raise_on_lazy_load: bool = False,
+    ):
+        self.session = session
+        self.list_cache = list_cache
+        self.list_load = list_load
+        self.raise_on_lazy_load = raise_on_lazy_load
+
+    def __enter__(self) -> "SqlAlchemyUnitOfWork":
+        grocery_lists = self._repository(GroceryList, self.list_load)
+        if self.list_cache is not None:
+            grocery_lists = CachedRepository(
+                grocery_lists, self.list_cache, self.session, self.list_load
+            )
+        self.grocery_lists = grocery_lists
+        self.grocery_items = self._repository(GroceryItem)
+        return super().__enter__()
+
+    def _repository(self, model_class, load=None) -> SqlAlchemyRepository:
+        return SqlAlchemyRepository(
+            self.session,
+            model_class,
+            load=load,
+            raise_on_lazy_load=self.raise_on_lazy_load,
+            defer_flush=True,
+        )
+
+    def flush(self) -> None:
+        self.session.flush()
+
+    def commit(self) -> None:
+        self.session.commit()
+
+    def rollback(self) -> None:
+        self.session.rollback()
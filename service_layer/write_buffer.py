@@ -0,0 +1,156 @@
+"""
+Group commit for item status toggles.
+
+Marking an item as purchased or pending normally runs in its own
+transaction, so a burst of taps pays one commit (and one fsync) each. With
+a StatusWriteBuffer the toggles are queued instead: a background thread
+applies everything queued in one transaction every `interval` seconds, or
+as soon as `max_batch` items are waiting, and each caller is answered once
+the transaction holding its toggle has committed.
+
+Toggles of the same item within a batch are coalesced, the last one
+winning. Its changes are taken when the toggle is queued, so
+`purchased_at` reflects the tap, but `updated_at` is set when the batch is
+written (see GroceryItemService.apply_item_changes), after any write
+committed while the toggle was waiting.
+
+Callers should wait at most `timeout` seconds for a toggle: past it the
+batch is stuck (e.g. waiting for a connection) and the toggle may or may
+not be committed later.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, Optional
+
+from domain.models import GroceryItem
+
+logger = logging.getLogger(__name__)
+
+# Applies {item ID: changes} in one transaction and returns
+# {item ID: updated item, or None when the item does not exist}
+ApplyBatch = Callable[[Dict[int, dict]], Dict[int, Optional[GroceryItem]]]
+
+
+class StatusWriteBuffer:
+    """Queues item status changes and commits them in batches."""
+
+    def __init__(
+        self,
+        apply_batch: ApplyBatch,
+        interval: float = 0.005,
+        max_batch: int = 100,
+        timeout: Optional[float] = None,
+    ):
+        self.apply_batch = apply_batch
+        self.interval = interval
+        self.max_batch = max_batch
+        self.timeout = timeout
+        self._reset()
+        self.batches = 0
+        self.toggles = 0
+        self.coalesced = 0
+
+    def _reset(self) -> None:
+        self._condition = threading.Condition()
+        # Item ID -> (changes, futures waiting for them), in queue order
+        self._pending: Dict[int, tuple] = {}
+        self._first_queued_at = 0.0
+        self._flusher: Optional[threading.Thread] = None
+
+    def submit(self, item_id: int, purchased: bool) -> Future:
+        """
+        Queue a status change of one item. The returned future resolves to
+        the updated item (None if it does not exist) once committed.
+        """
+        future = Future()
+        with self._condition:
+            # Taken under the lock, so the last queued change is the newest
+            if purchased:
+                changes = GroceryItem.purchased_changes()
+            else:
+                changes = GroceryItem.pending_changes()
+            self.toggles += 1
+            queued = self._pending.get(item_id)
+            if queued is None:
+                if not self._pending:
+                    self._first_queued_at = time.monotonic()
+                self._pending[item_id] = (changes, [future])
+            else:
+                self.coalesced += 1
+                self._pending[item_id] = (changes, queued[1] + [future])
+            if self._flusher is None:
+                self._start_flusher()
+            if len(self._pending) == 1 or len(self._pending) >= self.max_batch:
+                self._condition.notify()
+        return future
+
+    def stats(self) -> dict:
+        """Toggles queued, batches committed and toggles coalesced."""
+        with self._condition:
+            return {
+                "toggles": self.toggles,
+                "batches": self.batches,
+                "coalesced": self.coalesced,
+            }
+
+    def reset_after_fork(self) -> None:
+        """
+        The flusher thread does not exist in a forked child: forget the
+        parent's queue and lock, and start a flusher on the next toggle.
+        """
+        self._reset()
+
+    def _start_flusher(self) -> None:
+        self._flusher = threading.Thread(
+            target=self._run, name="status-write-buffer", daemon=True
+        )
+        self._flusher.start()
+
+    def _run(self) -> None:
+        try:
+            while True:
+                try:
+                    self._flush(self._next_batch())
+                except Exception:
+                    logger.exception("Status write buffer flush failed")
+        finally:
+            # Only reached when the thread is being torn down: the next
+            # toggle starts a new flusher, which also takes the queued ones
+            with self._condition:
+                self._flusher = None
+
+    def _next_batch(self) -> Dict[int, tuple]:
+        """Wait for the oldest toggle's interval or a full batch."""
+        with self._condition:
+            while not self._pending:
+                self._condition.wait()
+            deadline = self._first_queued_at + self.interval
+            while len(self._pending) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            batch, self._pending = self._pending, {}
+            self.batches += 1
+            return batch
+
+    def _flush(self, batch: Dict[int, tuple]) -> None:
+        try:
+            items = self.apply_batch(
+                {item_id: changes for item_id, (changes, _) in batch.items()}
+            )
+            for item_id, (_, futures) in batch.items():
+                for future in futures:
+                    future.set_result(items.get(item_id))
+        except BaseException as error:
+            logger.exception("Failed to apply %d status changes", len(batch))
+            # Every caller is answered, whatever went wrong
+            for _, futures in batch.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(error)
+            if not isinstance(error, Exception):
+                raise
@@ -1,6 +1,45 @@
 import sys
 from pathlib import Path
 
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import clear_mappers, sessionmaker
+
 # Add the project root to Python path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
+
+from adapters.orm import metadata, start_mappers
+
+
+def enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    # SQLite only enforces foreign keys (and ON DELETE CASCADE) when asked to
+    dbapi_connection.execute("PRAGMA foreign_keys=ON")
+
+
+@pytest.fixture
+def in_memory_db():
+    engine = create_engine("sqlite:///:memory:")
+    event.listen(engine, "connect", enable_sqlite_foreign_keys)
+    metadata.create_all(engine)
+    return engine
+
+
+@pytest.fixture
+def session(in_memory_db):
+    start_mappers()
+    yield sessionmaker(bind=in_memory_db)()
+    clear_mappers()
+
+
+@pytest.fixture
+def statements(in_memory_db):
+    """Record every SQL statement sent to the in-memory database."""
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(in_memory_db, "before_cursor_execute", record)
+    yield executed
+    event.remove(in_memory_db, "before_cursor_execute", record)
@@ -0,0 +1,610 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from prometheus_client import REGISTRY
+from sqlalchemy import text
+from sqlalchemy.orm import clear_mappers
+from werkzeug.http import http_date
+
+from adapters.orm import metadata, start_mappers
+from config import DatabaseConfig
+from entrypoints.flask_app import create_app, db, reset_after_fork, warm_up
+
+
+def make_app(path, **overrides):
+    app = create_app(
+        {
+            "DATABASE_CONFIG": DatabaseConfig(uri=f"sqlite:///{path}"),
+            "CACHE_INVALIDATION": "local",
+            "WARM_UP": False,
+            **overrides,
+        }
+    )
+    with app.app_context():
+        metadata.create_all(db.engine)
+    return app
+
+
+@pytest.fixture
+def app(tmp_path):
+    yield make_app(tmp_path / "grocery.db")
+    clear_mappers()
+
+
+def test_apps_in_one_process_are_isolated(app, tmp_path):
+    other_app = make_app(tmp_path / "other.db")
+
+    response = app.test_client().post(
+        "/api/v1/grocery-lists", json={"name": "Weekly"}
+    )
+    other_response = other_app.test_client().get("/api/v1/grocery-lists")
+
+    assert response.status_code == 201
+    assert other_response.get_json()["grocery_lists"] == []
+    assert (
+        app.extensions["grocery_list_cache"]
+        is not other_app.extensions["grocery_list_cache"]
+    )
+
+
+def test_start_mappers_is_idempotent(app):
+    start_mappers()
+    start_mappers()
+
+    response = app.test_client().get("/api/v1/grocery-lists")
+
+    assert response.status_code == 200
+
+
+def test_warm_up_opens_pooled_connections(app):
+    warm_up(app, connections=2)
+
+    with app.app_context():
+        assert db.engine.pool.checkedin() == 2
+
+
+def test_reset_after_fork_replaces_inherited_pool(app):
+    with app.app_context():
+        inherited_pool = db.engine.pool
+
+        reset_after_fork()
+
+        assert db.engine.pool is not inherited_pool
+
+
+def test_responses_carry_server_timing(app):
+    response = app.test_client().post(
+        "/api/v1/grocery-lists", json={"name": "Weekly"}
+    )
+
+    metrics = response.headers["Server-Timing"].split(", ")
+    assert [metric.split(";")[0] for metric in metrics] == [
+        "db",
+        "serialize",
+        "orm",
+        "total",
+    ]
+    # Only the INSERT: the new list's (empty) items are not loaded
+    assert 'desc="1 statements"' in metrics[0]
+
+
+def test_slow_queries_are_logged_with_parameter_shapes(app, tmp_path, caplog):
+    slow_app = make_app(tmp_path / "slow.db", SLOW_QUERY_THRESHOLD=1e-9)
+
+    with caplog.at_level("WARNING", logger="adapters.instrumentation"):
+        slow_app.test_client().get("/api/v1/grocery-lists/1")
+
+    assert any(
+        "FROM grocery_lists" in record.getMessage()
+        and "parameters=('int'," in record.getMessage()
+        for record in caplog.records
+    )
+
+
+def test_list_lookups_are_served_from_the_cache_between_writes(app):
+    client = app.test_client()
+    list_id = client.post(
+        "/api/v1/grocery-lists", json={"name": "Weekly"}
+    ).get_json()["id"]
+    items_path = f"/api/v1/grocery-lists/{list_id}/items"
+
+    client.get(items_path)
+    client.get(items_path)
+    client.post(items_path, json={"name": "Milk"})
+    client.put(f"/api/v1/grocery-lists/{list_id}", json={"name": "Monthly"})
+    response = client.get(items_path)
+
+    assert response.get_json()["grocery_list_name"] == "Monthly"
+    assert [item["name"] for item in response.get_json()["items"]] == ["Milk"]
+    # The second read and the item's list lookup hit; each write drops
+    # the list, so the read after them misses
+    stats = app.extensions["grocery_list_cache"].stats()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (2, 2, 1)
+
+
+def test_single_flight_reads_see_committed_writes(app, tmp_path):
+    flight_app = make_app(tmp_path / "flight.db", SINGLE_FLIGHT_WINDOW=60)
+    client = flight_app.test_client()
+    list_id = client.post(
+        "/api/v1/grocery-lists", json={"name": "Weekly"}
+    ).get_json()["id"]
+
+    first = client.get(f"/api/v1/grocery-lists/{list_id}")
+    client.post(
+        f"/api/v1/grocery-lists/{list_id}/items",
+        json={"name": "Milk", "quantity": 1},
+    )
+    second = client.get(f"/api/v1/grocery-lists/{list_id}")
+
+    assert first.get_json()["grocery_items"] == []
+    assert [item["name"] for item in second.get_json()["grocery_items"]] == [
+        "Milk"
+    ]
+    assert second.headers["ETag"] != first.headers["ETag"]
+    assert flight_app.extensions["grocery_list_flight"].stats()["calls"] == 4
+
+
+def test_grocery_list_body_matches_its_etag(app, tmp_path):
+    app = make_app(tmp_path / "etag.db", SINGLE_FLIGHT=False)
+    client = app.test_client()
+    list_id = client.post(
+        "/api/v1/grocery-lists", json={"name": "Weekly"}
+    ).get_json()["id"]
+    first = client.get(f"/api/v1/grocery-lists/{list_id}")
+
+    # A write that bypasses the application, and so the cache invalidation
+    with app.app_context():
+        db.session.execute(
+            text(
+                "UPDATE grocery_lists SET name = 'Monthly', "
+                "updated_at = '2100-01-01 00:00:00' WHERE id = :id"
+            ),
+            {"id": list_id},
+        )
+        db.session.commit()
+    second = client.get(f"/api/v1/grocery-lists/{list_id}")
+
+    assert second.headers["ETag"] != first.headers["ETag"]
+    assert second.get_json()["name"] == "Monthly"
+
+
+def backdate(app, list_id):
+    """Move a list's and its items' timestamps into the past."""
+    with app.app_context():
+        for table, column in (
+            ("grocery_lists", "id"),
+            ("grocery_items", "grocery_list_id"),
+        ):
+            db.session.execute(
+                text(
+                    f"UPDATE {table} SET updated_at = '2000-01-01 00:00:00' "
+                    f"WHERE {column} = :id"
+                ),
+                {"id": list_id},
+            )
+        db.session.commit()
+
+
+def test_unchanged_lists_and_items_are_not_modified(app):
+    client = app.test_client()
+    list_id = client.post(
+        "/api/v1/grocery-lists", json={"name": "Weekly"}
+    ).get_json()["id"]
+    client.post(
+        f"/api/v1/grocery-lists/{list_id}/items/bulk",
+        json=[{"name": "Milk"}, {"name": "Eggs"}],
+    )
+
+    for path in (
+        f"/api/v1/grocery-lists/{list_id}",
+        f"/api/v1/grocery-lists/{list_id}/items",
+    ):
+        response = client.get(path)
+        etag = response.headers["ETag"]
+        last_modified = response.headers["Last-Modified"]
+        by_etag = client.get(path, headers={"If-None-Match": etag})
+        by_date = client.get(
+            path, headers={"If-Modified-Since": last_modified}
+        )
+        stale_etag = client.get(path, headers={"If-None-Match": '"other"'})
+
+        assert by_etag.status_code == 304
+        assert by_etag.get_data() == b""
+        assert by_etag.headers["ETag"] == etag
+        assert by_date.status_code == 304
+        assert stale_etag.status_code == 200
+
+
+def test_deleting_items_modifies_their_list(app, tmp_path):
+    app = make_app(tmp_path / "deletes.db", SINGLE_FLIGHT=False)
+    client = app.test_client()
+    list_id = client.post(
+        "/api/v1/grocery-lists", json={"name": "Weekly"}
+    ).get_json()["id"]
+    milk, eggs = client.post(
+        f"/api/v1/grocery-lists/{list_id}/items/bulk",
+        json=[{"name": "Milk"}, {"name": "Eggs"}],
+    ).get_json()
+    paths = (
+        f"/api/v1/grocery-lists/{list_id}",
+        f"/api/v1/grocery-lists/{list_id}/items",
+    )
+
+    # Deleting the older item, then the last one, with timestamps far
+    # enough apart for the one-second resolution of HTTP dates
+    for item, remaining in ((milk, 1), (eggs, 0)):
+        backdate(app, list_id)
+        last_modified = [client.get(path).last_modified for path in paths]
+        client.delete(f"/api/v1/grocery-items/{item['id']}")
+        responses = [
+            client.get(path, headers={"If-Modified-Since": http_date(date)})
+            for path, date in zip(paths, last_modified)
+        ]
+
+        assert [response.status_code for response in responses] == [200, 200]
+        assert len(responses[0].get_json()["grocery_items"]) == remaining
+        assert len(responses[1].get_json()["items"]) == remaining
+        assert all(
+            response.last_modified > date
+            for response, date in zip(responses, last_modified)
+        )
+
+
+def test_buffered_status_toggles_are_committed_in_batches(app, tmp_path):
+    buffered_app = make_app(
+        tmp_path / "buffered.db",
+        STATUS_WRITE_BUFFER=True,
+        STATUS_FLUSH_INTERVAL=0.05,
+    )
+    client = buffered_app.test_client()
+    list_id = client.post(
+        "/api/v1/grocery-lists", json={"name": "Weekly"}
+    ).get_json()["id"]
+    items = client.post(
+        f"/api/v1/grocery-lists/{list_id}/items/bulk",
+        json=[{"name": f"Item {i}"} for i in range(4)],
+    ).get_json()
+    client.get(f"/api/v1/grocery-lists/{list_id}")
+
+    def toggle(item):
+        response = buffered_app.test_client().post(
+            f"/api/v1/grocery-items/{item['id']}/purchase"
+        )
+        return response.status_code, response.get_json()
+
+    with ThreadPoolExecutor(max_workers=len(items)) as executor:
+        results = list(executor.map(toggle, items))
+
+    assert all(status == 200 for status, _ in results)
+    assert all(body["is_purchased"] for _, body in results)
+    grocery_list = client.get(f"/api/v1/grocery-lists/{list_id}").get_json()
+    assert all(item["is_purchased"] for item in grocery_list["grocery_items"])
+    stats = buffered_app.extensions["status_write_buffer"].stats()
+    assert stats["toggles"] == 4
+    assert stats["batches"] < 4
+    assert client.post("/api/v1/grocery-items/999/purchase").status_code == 404
+
+
+def test_buffered_status_toggle_times_out_with_503(app, tmp_path):
+    buffered_app = make_app(tmp_path / "stuck.db", STATUS_WRITE_BUFFER=True)
+    write_buffer = buffered_app.extensions["status_write_buffer"]
+    released = threading.Event()
+    write_buffer.apply_batch = lambda changes: released.wait(5) and {}
+    write_buffer.timeout = 0.01
+
+    response = buffered_app.test_client().post(
+        "/api/v1/grocery-items/1/purchase"
+    )
+    released.set()
+
+    assert response.status_code == 503
+
+
+def collect_pages(client, path, key, limit):
+    """Follow next_cursor from the first page; returns each page's items."""
+    pages, after = [], None
+    while True:
+        query = f"?limit={limit}" + (f"&after={after}" if after else "")
+        body = client.get(path + query).get_json()
+        pages.append(body[key])
+        after = body["next_cursor"]
+        if after is None:
+            return pages
+
+
+def test_lists_and_items_are_paginated_by_cursor(app):
+    client = app.test_client()
+    list_ids = [
+        client.post("/api/v1/grocery-lists", json={"name": name}).get_json()[
+            "id"
+        ]
+        for name in ("Weekly", "Party", "Camping")
+    ]
+    items_path = f"/api/v1/grocery-lists/{list_ids[0]}/items"
+    client.post(
+        f"{items_path}/bulk", json=[{"name": f"Item {i}"} for i in range(5)]
+    )
+
+    list_pages = collect_pages(
+        client, "/api/v1/grocery-lists", "grocery_lists", limit=2
+    )
+    item_pages = collect_pages(client, items_path, "items", limit=2)
+
+    assert [[entry["id"] for entry in page] for page in list_pages] == [
+        list_ids[:2],
+        list_ids[2:],
+    ]
+    assert [len(page) for page in item_pages] == [2, 2, 1]
+    assert [item["name"] for page in item_pages for item in page] == [
+        f"Item {i}" for i in range(5)
+    ]
+
+
+@pytest.mark.parametrize(
+    "query", ["limit=0", "limit=201", "limit=ten", "after=first"]
+)
+def test_pagination_rejects_invalid_arguments(app, query):
+    client = app.test_client()
+    list_id = client.post(
+        "/api/v1/grocery-lists", json={"name": "Weekly"}
+    ).get_json()["id"]
+
+    for path in (
+        "/api/v1/grocery-lists",
+        f"/api/v1/grocery-lists/{list_id}/items",
+    ):
+        response = client.get(f"{path}?{query}")
+
+        assert response.status_code == 400
+        assert "error" in response.get_json()
+
+
+def test_items_are_filtered_by_status(app):
+    client = app.test_client()
+    list_id = client.post(
+        "/api/v1/grocery-lists", json={"name": "Weekly"}
+    ).get_json()["id"]
+    items_path = f"/api/v1/grocery-lists/{list_id}/items"
+    items = client.post(
+        f"{items_path}/bulk",
+        json=[{"name": name} for name in ("Milk", "Eggs", "Bread")],
+    ).get_json()
+    client.post(f"/api/v1/grocery-items/{items[1]['id']}/purchase")
+
+    pending = client.get(f"{items_path}?status=pending").get_json()
+    purchased = client.get(f"{items_path}?status=purchased").get_json()
+    purchased_page = client.get(
+        f"{items_path}?status=purchased&limit=1&after={items[0]['id']}"
+    ).get_json()
+
+    assert [item["name"] for item in pending["items"]] == ["Milk", "Bread"]
+    assert [item["name"] for item in purchased["items"]] == ["Eggs"]
+    assert purchased["items"][0]["is_purchased"] is True
+    assert purchased_page["items"] == purchased["items"]
+    assert purchased_page["next_cursor"] is None
+
+
+def test_items_reject_an_unknown_status(app):
+    client = app.test_client()
+    list_id = client.post(
+        "/api/v1/grocery-lists", json={"name": "Weekly"}
+    ).get_json()["id"]
+
+    response = client.get(f"/api/v1/grocery-lists/{list_id}/items?status=x")
+
+    assert response.status_code == 400
+    assert response.get_json() == {
+        "error": "status must be 'pending' or 'purchased'"
+    }
+
+
+def test_items_are_purchased_in_bulk_by_id_or_all_at_once(app):
+    client = app.test_client()
+    list_id = client.post(
+        "/api/v1/grocery-lists", json={"name": "Weekly"}
+    ).get_json()["id"]
+    items_path = f"/api/v1/grocery-lists/{list_id}/items"
+    items = client.post(
+        f"{items_path}/bulk",
+        json=[{"name": name} for name in ("Milk", "Eggs", "Bread")],
+    ).get_json()
+
+    by_id = client.post(
+        f"{items_path}/purchase", json={"item_ids": [items[0]["id"]]}
+    )
+    remaining = client.post(f"{items_path}/purchase", json={"all": True})
+
+    assert by_id.status_code == 200
+    assert [item["name"] for item in by_id.get_json()] == ["Milk"]
+    assert remaining.status_code == 200
+    assert sorted(item["name"] for item in remaining.get_json()) == [
+        "Bread",
+        "Eggs",
+    ]
+    listed = client.get(items_path).get_json()["items"]
+    assert all(item["is_purchased"] for item in listed)
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [None, {}, {"all": False}, {"item_ids": []}, {"item_ids": ["1"]}],
+)
+def test_bulk_purchase_rejects_invalid_selections(app, payload):
+    client = app.test_client()
+    list_id = client.post(
+        "/api/v1/grocery-lists", json={"name": "Weekly"}
+    ).get_json()["id"]
+
+    response = client.post(
+        f"/api/v1/grocery-lists/{list_id}/items/purchase", json=payload
+    )
+
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+
+
+def test_bulk_purchase_of_a_missing_list_is_not_found(app):
+    response = app.test_client().post(
+        "/api/v1/grocery-lists/999/items/purchase", json={"all": True}
+    )
+
+    assert response.status_code == 404
+    assert response.get_json() == {"error": "Grocery list not found"}
+
+
+def test_batch_runs_operations_in_order_with_references(app):
+    client = app.test_client()
+
+    response = client.post(
+        "/api/v1/batch",
+        json={
+            "operations": [
+                {"op": "create_list", "name": "Weekly", "ref": "weekly"},
+                {
+                    "op": "add_item",
+                    "list_id": {"$ref": "weekly"},
+                    "name": "Milk",
+                    "ref": "milk",
+                },
+                {"op": "purchase_item", "item_id": {"$ref": "milk"}},
+                {
+                    "op": "update_item",
+                    "item_id": {"$ref": "milk"},
+                    "quantity": 2,
+                },
+            ]
+        },
+    )
+
+    results = response.get_json()["results"]
+    assert response.status_code == 200
+    assert [result["status"] for result in results] == [201, 201, 200, 200]
+    list_id, item_id = results[0]["body"]["id"], results[1]["body"]["id"]
+    grocery_list = client.get(f"/api/v1/grocery-lists/{list_id}").get_json()
+    (milk,) = grocery_list["grocery_items"]
+    assert milk["id"] == item_id
+    assert milk["is_purchased"]
+    assert milk["quantity"] == 2
+
+
+def test_batch_results_do_not_lazy_load(app, tmp_path):
+    strict_app = make_app(tmp_path / "strict.db", RAISE_ON_LAZY_LOAD=True)
+
+    response = strict_app.test_client().post(
+        "/api/v1/batch",
+        json={
+            "operations": [
+                {"op": "create_list", "name": "Weekly", "ref": "weekly"},
+                {"op": "add_item", "list_id": {"$ref": "weekly"}, "name": "X"},
+                {"op": "create_list", "name": "Empty"},
+            ]
+        },
+    )
+
+    assert response.status_code == 200
+    weekly, item, empty = [
+        result["body"] for result in response.get_json()["results"]
+    ]
+    assert [entry["id"] for entry in weekly["grocery_items"]] == [item["id"]]
+    assert empty["grocery_items"] == []
+
+
+def test_batch_is_rolled_back_when_an_operation_fails(app):
+    client = app.test_client()
+    list_id = client.post(
+        "/api/v1/grocery-lists", json={"name": "Weekly"}
+    ).get_json()["id"]
+    client.get(f"/api/v1/grocery-lists/{list_id}")
+
+    response = client.post(
+        "/api/v1/batch",
+        json={
+            "operations": [
+                {"op": "rename_list", "list_id": list_id, "name": "Renamed"},
+                {"op": "add_item", "list_id": list_id, "name": "Milk"},
+                {"op": "delete_item", "item_id": 999},
+            ]
+        },
+    )
+
+    assert response.status_code == 404
+    assert response.get_json() == {
+        "error": "Grocery item not found",
+        "operation": 2,
+    }
+    grocery_list = client.get(f"/api/v1/grocery-lists/{list_id}").get_json()
+    assert grocery_list["name"] == "Weekly"
+    assert grocery_list["grocery_items"] == []
+
+
+def test_batch_rejects_invalid_operations(app):
+    client = app.test_client()
+
+    response = client.post(
+        "/api/v1/batch",
+        json={
+            "operations": [
+                {"op": "create_list", "name": "Weekly"},
+                {"op": "add_item", "list_id": {"$ref": "weekly"}, "name": "X"},
+            ]
+        },
+    )
+
+    assert response.status_code == 400
+    assert response.get_json()["error"] == (
+        "Operation 1: list_id references unknown ref 'weekly'"
+    )
+    assert (
+        client.get("/api/v1/grocery-lists").get_json()["grocery_lists"] == []
+    )
+
+
+def test_batch_rejects_references_to_the_wrong_kind_of_entity(app):
+    client = app.test_client()
+
+    response = client.post(
+        "/api/v1/batch",
+        json={
+            "operations": [
+                {"op": "create_list", "name": "Weekly", "ref": "weekly"},
+                {"op": "purchase_item", "item_id": {"$ref": "weekly"}},
+            ]
+        },
+    )
+    malformed = client.post(
+        "/api/v1/batch",
+        json={"operations": [{"op": "delete_item", "item_id": {"$ref": []}}]},
+    )
+
+    assert response.status_code == 400
+    assert response.get_json()["error"] == (
+        "Operation 1: item_id references 'weekly', which is a list"
+    )
+    assert malformed.status_code == 400
+    assert malformed.get_json()["error"] == (
+        "Operation 0: item_id $ref must be a string"
+    )
+
+
+def test_metrics_count_requests_by_endpoint_and_status(app):
+    labels = {
+        "endpoint": "get_grocery_list",
+        "method": "GET",
+        "status": "404",
+    }
+    before = (
+        REGISTRY.get_sample_value("grocery_http_requests_total", labels) or 0
+    )
+    client = app.test_client()
+
+    client.get("/api/v1/grocery-lists/1")
+    response = client.get("/metrics")
+
+    body = response.get_data(as_text=True)
+    assert response.status_code == 200
+    assert REGISTRY.get_sample_value(
+        "grocery_http_requests_total", labels
+    ) == (before + 1)
+    assert "grocery_http_request_duration_seconds_bucket{" in body
+    assert 'grocery_cache_misses_total{cache="grocery_lists"}' in body
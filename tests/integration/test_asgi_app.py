@@ -0,0 +1,78 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import clear_mappers
+
+from adapters.orm import metadata
+from config import DatabaseConfig
+
+pytest.importorskip("aiosqlite")
+pytest.importorskip("httpx")
+starlette_testclient = pytest.importorskip("starlette.testclient")
+
+from entrypoints.asgi_app import create_asgi_app
+
+
+@pytest.fixture
+def client(tmp_path):
+    uri = f"sqlite:///{tmp_path / 'grocery.db'}"
+    metadata.create_all(create_engine(uri))
+    app = create_asgi_app({"DATABASE_CONFIG": DatabaseConfig(uri=uri)})
+    with starlette_testclient.TestClient(app) as client:
+        yield client
+    clear_mappers()
+
+
+def test_list_and_item_lifecycle(client):
+    created = client.post("/api/v1/grocery-lists", json={"name": "Weekly"})
+    list_id = created.json()["id"]
+    bulk = client.post(
+        f"/api/v1/grocery-lists/{list_id}/items/bulk",
+        json=[{"name": "Apples", "quantity": 3}, {"name": "Bread"}],
+    )
+    purchased = client.post(
+        f"/api/v1/grocery-items/{bulk.json()[0]['id']}/purchase"
+    )
+    pending = client.get(
+        f"/api/v1/grocery-lists/{list_id}/items?status=pending"
+    )
+    grocery_list = client.get(f"/api/v1/grocery-lists/{list_id}")
+
+    assert created.status_code == 201
+    assert [item["name"] for item in bulk.json()] == ["Apples", "Bread"]
+    assert purchased.json()["is_purchased"] is True
+    assert [item["name"] for item in pending.json()["items"]] == ["Bread"]
+    assert len(grocery_list.json()["grocery_items"]) == 2
+
+
+def test_shares_validation_with_the_flask_app(client):
+    response = client.post("/api/v1/grocery-lists", json={"name": "  "})
+
+    assert response.status_code == 400
+    assert response.json() == {"error": "Name cannot be empty"}
+
+
+def test_unchanged_list_is_not_modified(client):
+    list_id = client.post(
+        "/api/v1/grocery-lists", json={"name": "Weekly"}
+    ).json()["id"]
+    first = client.get(f"/api/v1/grocery-lists/{list_id}")
+
+    second = client.get(
+        f"/api/v1/grocery-lists/{list_id}",
+        headers={"If-None-Match": first.headers["ETag"]},
+    )
+
+    assert second.status_code == 304
+
+
+def test_missing_list_is_not_found(client):
+    response = client.delete("/api/v1/grocery-lists/99")
+
+    assert response.status_code == 404
+
+
+def test_responses_carry_server_timing(client):
+    response = client.post("/api/v1/grocery-lists", json={"name": "Weekly"})
+
+    assert response.headers["Server-Timing"].startswith("db;dur=")
+    assert 'desc="0 statements"' not in response.headers["Server-Timing"]
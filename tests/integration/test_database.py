@@ -0,0 +1,46 @@
+import pytest
+from sqlalchemy import create_engine, exc
+
+from adapters.database import TimedQueuePool, pool_stats
+
+
+@pytest.fixture
+def pooled_engine(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=TimedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05,
+        wait_warning=1.0,
+    )
+    yield engine
+    engine.dispose()
+
+
+def test_pool_stats_report_checked_out_connections(pooled_engine):
+    with pooled_engine.connect():
+        stats = pool_stats(pooled_engine)
+
+    assert stats["pool"] == "TimedQueuePool"
+    assert stats["checked_out"] == 1
+    assert stats["checkouts"] == 1
+    assert stats["max_overflow"] == 0
+    assert pool_stats(pooled_engine)["checked_out"] == 0
+
+
+def test_recreated_pool_keeps_its_settings(pooled_engine):
+    pooled_engine.dispose()
+
+    assert pooled_engine.pool.max_overflow == 0
+    assert pooled_engine.pool.wait_warning == 1.0
+
+
+def test_pool_stats_count_exhausted_pool_timeouts(pooled_engine):
+    with pooled_engine.connect():
+        with pytest.raises(exc.TimeoutError):
+            pooled_engine.connect()
+
+    stats = pool_stats(pooled_engine)
+    assert stats["timeouts"] == 1
+    assert stats["max_wait_seconds"] >= 0.05
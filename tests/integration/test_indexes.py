@@ -0,0 +1,52 @@
+"""
+Check with EXPLAIN that the hot repository queries on grocery_items are
+served by an index instead of scanning the whole table.
+"""
+
+import pytest
+from sqlalchemy import event
+
+from adapters.repository import SqlAlchemyRepository
+from domain.models import GroceryItem, ItemStatus
+
+
+@pytest.fixture
+def selects(in_memory_db):
+    """Record every SELECT statement along with its parameters."""
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("SELECT"):
+            executed.append((statement, parameters))
+
+    event.listen(in_memory_db, "before_cursor_execute", record)
+    yield executed
+    event.remove(in_memory_db, "before_cursor_execute", record)
+
+
+def query_plan(session, statement, parameters):
+    rows = session.connection().exec_driver_sql(
+        f"EXPLAIN QUERY PLAN {statement}", parameters
+    )
+    return " ".join(row[-1] for row in rows)
+
+
+def test_list_items_page_uses_index(session, selects):
+    repo = SqlAlchemyRepository(session, GroceryItem)
+
+    repo.get_page(50, after=10, grocery_list_id=1)
+
+    plan = query_plan(session, *selects[-1])
+    assert "USING INDEX ix_grocery_items_grocery_list_id_id " in plan
+    assert "SCAN grocery_items" not in plan
+    # The index order serves ORDER BY id, so a page never sorts the list
+    assert "TEMP B-TREE" not in plan
+
+
+def test_list_items_status_filter_uses_index(session, selects):
+    repo = SqlAlchemyRepository(session, GroceryItem)
+
+    repo.get_page(50, grocery_list_id=1, status=ItemStatus.PENDING)
+
+    plan = query_plan(session, *selects[-1])
+    assert "USING INDEX ix_grocery_items_grocery_list_id_status " in plan
@@ -0,0 +1,49 @@
+import pytest
+from sqlalchemy import create_engine, text
+
+from config import DatabaseConfig
+from entrypoints import migrate
+
+
+@pytest.fixture
+def database_uri(tmp_path):
+    return f"sqlite:///{tmp_path / 'migrate.db'}"
+
+
+def set_revision(uri, revision):
+    engine = create_engine(uri)
+    with engine.begin() as connection:
+        connection.execute(
+            text("CREATE TABLE alembic_version (version_num VARCHAR(32))")
+        )
+        connection.execute(
+            text("INSERT INTO alembic_version VALUES (:revision)"),
+            {"revision": revision},
+        )
+    engine.dispose()
+
+
+def test_head_revisions_is_the_latest_migration():
+    assert migrate.head_revisions() == {"8c2d4f6a1e93"}
+
+
+def test_current_revisions_of_unmigrated_database_is_none(database_uri):
+    assert migrate.current_revisions(database_uri) is None
+
+
+def test_migrate_if_needed_skips_database_at_head(database_uri, monkeypatch):
+    set_revision(database_uri, "8c2d4f6a1e93")
+    upgrades = []
+    monkeypatch.setattr(migrate, "upgrade", upgrades.append)
+
+    assert not migrate.migrate_if_needed(DatabaseConfig(uri=database_uri))
+    assert upgrades == []
+
+
+def test_migrate_if_needed_upgrades_older_database(database_uri, monkeypatch):
+    set_revision(database_uri, "f879a92970d9")
+    upgrades = []
+    monkeypatch.setattr(migrate, "upgrade", upgrades.append)
+
+    assert migrate.migrate_if_needed(DatabaseConfig(uri=database_uri))
+    assert len(upgrades) == 1
@@ -0,0 +1,112 @@
+import cProfile
+import pstats
+
+import pytest
+from sqlalchemy.orm import clear_mappers
+
+from adapters.orm import metadata
+from config import DatabaseConfig
+from entrypoints.flask_app import create_app, db
+from entrypoints.profiling import collapsed_stacks
+
+TOKEN = "secret-token"
+
+
+def make_app(tmp_path, **overrides):
+    app = create_app(
+        {
+            "DATABASE_CONFIG": DatabaseConfig(
+                uri=f"sqlite:///{tmp_path / 'grocery.db'}"
+            ),
+            "WARM_UP": False,
+            "PROFILE_DIR": str(tmp_path / "profiles"),
+            "PROFILE_TOKEN": TOKEN,
+            **overrides,
+        }
+    )
+    with app.app_context():
+        metadata.create_all(db.engine)
+    return app
+
+
+@pytest.fixture
+def client(tmp_path):
+    yield make_app(tmp_path).test_client()
+    clear_mappers()
+
+
+def test_requests_with_the_token_are_profiled_and_listed(client, tmp_path):
+    client.get("/api/v1/grocery-lists")
+    response = client.get(
+        "/api/v1/grocery-lists",
+        headers={"X-Profile-Token": TOKEN, "X-Request-ID": "req-1"},
+    )
+    listing = client.get(
+        "/api/v1/admin/profiles", headers={"X-Profile-Token": TOKEN}
+    )
+
+    assert response.headers["X-Profile-Id"] == "req-1"
+    assert sorted(path.name for path in (tmp_path / "profiles").iterdir()) == [
+        "req-1.collapsed",
+        "req-1.json",
+        "req-1.prof",
+    ]
+    [profile] = listing.get_json()["profiles"]
+    assert profile["id"] == "req-1"
+    assert profile["endpoint"] == "api.get_grocery_lists"
+    pstats.Stats(str(tmp_path / "profiles" / "req-1.prof"))
+
+
+def test_reused_request_ids_do_not_overwrite_profiles(client):
+    headers = {"X-Profile-Token": TOKEN, "X-Request-ID": "req-1"}
+    first = client.get("/api/v1/grocery-lists", headers=headers)
+    second = client.get("/api/v1/grocery-lists", headers=headers)
+    listing = client.get(
+        "/api/v1/admin/profiles", headers={"X-Profile-Token": TOKEN}
+    )
+
+    assert first.headers["X-Profile-Id"] == "req-1"
+    assert second.headers["X-Profile-Id"].startswith("req-1-")
+    assert len(listing.get_json()["profiles"]) == 2
+
+
+def test_admin_endpoint_requires_the_token(client):
+    response = client.get(
+        "/api/v1/admin/profiles", headers={"X-Profile-Token": "wrong"}
+    )
+
+    assert response.status_code == 403
+
+
+def test_profiling_is_not_registered_when_disabled(tmp_path):
+    app = make_app(tmp_path, PROFILE_DIR=None)
+    try:
+        response = app.test_client().get(
+            "/api/v1/admin/profiles", headers={"X-Profile-Token": TOKEN}
+        )
+    finally:
+        clear_mappers()
+
+    assert response.status_code == 404
+    assert "X-Profile-Id" not in response.headers
+
+
+def inner():
+    return sum(range(10_000))
+
+
+def outer():
+    return inner()
+
+
+def test_collapsed_stacks_follow_calls():
+    profile = cProfile.Profile()
+    profile.enable()
+    outer()
+    profile.disable()
+
+    stacks = collapsed_stacks(pstats.Stats(profile))
+
+    assert any(
+        "(outer);" in stack and stack.endswith("(inner)") for stack in stacks
+    )
@@ -0,0 +1,190 @@
+import json
+
+import pytest
+from sqlalchemy.exc import InvalidRequestError
+
+from adapters.cache import EntityCache
+from adapters.repository import CachedRepository, SqlAlchemyRepository
+from domain.models import GroceryItem, GroceryList
+
+
+def seed_lists(session, number_of_lists=3, items_per_list=2):
+    for i in range(number_of_lists):
+        grocery_list = GroceryList(f"List {i}")
+        for j in range(items_per_list):
+            grocery_list.grocery_items.append(GroceryItem(f"Item {j}"))
+        session.add(grocery_list)
+    session.commit()
+    session.expunge_all()
+
+
+def test_get_all_with_selectin_loads_items_in_constant_queries(
+    session, statements
+):
+    seed_lists(session, number_of_lists=5)
+    repo = SqlAlchemyRepository(
+        session, GroceryList, load={"grocery_items": "selectin"}
+    )
+
+    statements.clear()
+    serialized = [grocery_list.to_dict() for grocery_list in repo.get_all()]
+
+    assert len(serialized) == 5
+    assert all(len(gl["grocery_items"]) == 2 for gl in serialized)
+    assert len(statements) == 2
+
+
+def test_get_by_id_with_joined_load_uses_a_single_query(session, statements):
+    seed_lists(session)
+    repo = SqlAlchemyRepository(session, GroceryList)
+
+    statements.clear()
+    grocery_list = repo.get_by_id(1, load={"grocery_items": "joined"})
+
+    assert len(grocery_list.to_dict()["grocery_items"]) == 2
+    assert len(statements) == 1
+
+
+def test_raise_on_lazy_load_fails_on_unloaded_relationship(session):
+    seed_lists(session)
+    repo = SqlAlchemyRepository(session, GroceryList, raise_on_lazy_load=True)
+
+    grocery_list = repo.get_by_id(1)
+
+    with pytest.raises(InvalidRequestError):
+        grocery_list.to_dict()
+
+
+def test_unknown_loading_strategy_is_rejected(session):
+    repo = SqlAlchemyRepository(session, GroceryList)
+
+    with pytest.raises(ValueError):
+        repo.get_all(load={"grocery_items": "eventually"})
+
+
+def test_add_all_returns_stored_items_in_input_order(session):
+    seed_lists(session, number_of_lists=1, items_per_list=0)
+    repo = SqlAlchemyRepository(session, GroceryItem)
+    new_items = []
+    for name in ["Apples", "Bread", "Milk"]:
+        item = GroceryItem(name, quantity=2)
+        item.grocery_list_id = 1
+        new_items.append(item)
+
+    stored = repo.add_all(new_items)
+    session.commit()
+
+    assert [item.name for item in stored] == ["Apples", "Bread", "Milk"]
+    assert all(item.id is not None for item in stored)
+    assert len(session.get(GroceryList, 1).grocery_items) == 3
+
+
+def test_delete_list_cascades_to_items_in_one_statement(session, statements):
+    seed_lists(session, number_of_lists=2, items_per_list=3)
+    repo = SqlAlchemyRepository(session, GroceryList)
+
+    statements.clear()
+    assert repo.delete_by_id(1) is True
+    session.commit()
+
+    assert len([s for s in statements if s.startswith("DELETE")]) == 1
+    remaining = SqlAlchemyRepository(session, GroceryItem).get_all()
+    assert {item.grocery_list_id for item in remaining} == {2}
+
+
+def test_delete_missing_entity_returns_false(session):
+    repo = SqlAlchemyRepository(session, GroceryItem)
+
+    assert repo.delete_by_id(42) is False
+
+
+def test_cached_repository_serves_hits_without_queries(session, statements):
+    seed_lists(session)
+    repo = CachedRepository(
+        SqlAlchemyRepository(session, GroceryList), EntityCache(), session
+    )
+    repo.get_by_id(1)
+    session.close()
+
+    statements.clear()
+    grocery_list = repo.get_by_id(1)
+
+    assert grocery_list.name == "List 0"
+    assert grocery_list in session
+    assert statements == []
+    # The items are not cached with the list, but still load on access
+    assert len(grocery_list.to_dict()["grocery_items"]) == 2
+    assert len(statements) == 1
+
+
+def test_cached_repository_reads_eager_loads_from_the_database(
+    session, statements
+):
+    seed_lists(session)
+    load = {"grocery_items": "selectin"}
+    repo = CachedRepository(
+        SqlAlchemyRepository(session, GroceryList, load=load),
+        EntityCache(),
+        session,
+        load,
+    )
+
+    repo.get_by_id(1)
+    session.close()
+    statements.clear()
+    grocery_list = repo.get_by_id(1)
+
+    assert len(grocery_list.to_dict()["grocery_items"]) == 2
+    assert len(statements) == 2
+    assert repo.cache.stats() == {
+        "hits": 0,
+        "misses": 0,
+        "evictions": 0,
+        "size": 0,
+    }
+
+
+def test_get_version_changes_with_the_list_items(session, statements):
+    seed_lists(session, number_of_lists=1, items_per_list=2)
+    list_repo = SqlAlchemyRepository(session, GroceryList)
+    item_repo = SqlAlchemyRepository(session, GroceryItem)
+
+    statements.clear()
+    initial = list_repo.get_version(1)
+    assert len(statements) == 1
+    assert list_repo.get_version(1) == initial
+
+    item_repo.bulk_update(GroceryItem.purchased_changes(), [1])
+    after_update = list_repo.get_version(1)
+    assert after_update != initial
+
+    item_repo.delete_by_id(2)
+    after_delete = list_repo.get_version(1)
+    assert after_delete != after_update
+
+    assert list_repo.get_version(42) is None
+
+
+def test_get_json_matches_to_dict_in_one_query(session, statements):
+    seed_lists(session, number_of_lists=2, items_per_list=3)
+    session.get(GroceryItem, 2).mark_as_purchased()
+    session.commit()
+    expected = session.get(GroceryList, 1).to_dict()
+    expected["grocery_items"].sort(key=lambda item: item["id"])
+    session.expunge_all()
+    repo = SqlAlchemyRepository(session, GroceryList)
+
+    statements.clear()
+    document = repo.get_json(1)
+
+    assert json.loads(document) == expected
+    assert len(statements) == 1
+    assert len(session.identity_map) == 0
+
+
+def test_get_json_of_empty_and_missing_list(session):
+    seed_lists(session, number_of_lists=1, items_per_list=0)
+    repo = SqlAlchemyRepository(session, GroceryList)
+
+    assert json.loads(repo.get_json(1))["grocery_items"] == []
+    assert repo.get_json(99) is None
@@ -0,0 +1,54 @@
+from adapters.cache import EntityCache, InProcessInvalidationChannel
+from adapters.repository import CachedRepository
+from domain.models import GroceryItem, GroceryList
+from service_layer.unit_of_work import SqlAlchemyUnitOfWork
+
+
+def test_unit_of_work_defers_inserts_to_one_flush(session, statements):
+    with SqlAlchemyUnitOfWork(session) as uow:
+        grocery_list = uow.grocery_lists.add(GroceryList("Weekly"))
+        milk = GroceryItem("Milk")
+        milk.grocery_list = grocery_list
+        uow.grocery_items.add(milk)
+        assert statements == []
+
+        uow.commit()
+
+    assert [statement.split()[0] for statement in statements] == [
+        "INSERT",
+        "INSERT",
+    ]
+    assert milk.grocery_list_id == grocery_list.id is not None
+
+
+def test_unit_of_work_rolls_back_uncommitted_work(session):
+    with SqlAlchemyUnitOfWork(session) as uow:
+        uow.grocery_lists.add(GroceryList("Weekly"))
+        uow.grocery_lists.get_all()
+
+    with SqlAlchemyUnitOfWork(session) as uow:
+        assert uow.grocery_lists.get_all() == []
+
+
+def test_unit_of_work_reads_lists_through_the_cache(session):
+    with SqlAlchemyUnitOfWork(session, list_cache=EntityCache()) as uow:
+        assert isinstance(uow.grocery_lists, CachedRepository)
+        assert uow.grocery_items.defer_flush
+
+
+def test_invalidations_are_published_once_after_commit(session):
+    channel = InProcessInvalidationChannel()
+    published = []
+    channel.subscribe(published.append)
+    cache = EntityCache(channel=channel, namespace="grocery_lists")
+    cache.set(1, "cached list")
+
+    with SqlAlchemyUnitOfWork(session, list_cache=cache) as uow:
+        uow.grocery_lists.invalidate(1)
+        uow.grocery_lists.invalidate(1)
+        assert cache.get(1) is None
+        assert published == []
+
+        uow.commit()
+
+    assert published == ["grocery_lists:1"]
@@ -0,0 +1,211 @@
+import threading
+
+import pytest
+
+from adapters.cache import (
+    INVALIDATE_ALL,
+    EntityCache,
+    InProcessInvalidationChannel,
+    SingleFlight,
+)
+from adapters.repository import CachedRepository
+from domain.models import GroceryList
+from tests.unit.test_services import FakeGroceryListRepository
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_cache_evicts_least_recently_used_entry():
+    cache = EntityCache(maxsize=2)
+    cache.set(1, "one")
+    cache.set(2, "two")
+    cache.get(1)
+    cache.set(3, "three")
+
+    assert cache.get(2) is None
+    assert cache.get(1) == "one"
+    assert cache.get(3) == "three"
+    assert cache.stats() == {"hits": 3, "misses": 1, "evictions": 1, "size": 2}
+
+
+def test_cache_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = EntityCache(ttl=10, clock=clock)
+    cache.set(1, "one")
+
+    clock.now = 9
+    assert cache.get(1) == "one"
+    clock.now = 10
+    assert cache.get(1) is None
+
+
+def test_disabled_cache_stores_nothing():
+    cache = EntityCache(maxsize=0)
+    cache.set(1, "one")
+
+    assert cache.get(1) is None
+
+
+def test_invalidation_reaches_caches_sharing_a_channel():
+    channel = InProcessInvalidationChannel()
+    worker_a = EntityCache(channel=channel, namespace="grocery_lists")
+    worker_b = EntityCache(channel=channel, namespace="grocery_lists")
+    other = EntityCache(channel=channel, namespace="grocery_items")
+    for cache in (worker_a, worker_b, other):
+        cache.set(1, "one")
+        cache.set(2, "two")
+
+    worker_a.invalidate(1)
+    assert worker_b.get(1) is None
+    assert worker_b.get(2) == "two"
+    assert other.get(1) == "one"
+
+    worker_a.clear()
+    assert worker_b.get(2) is None
+
+
+def test_cached_repository_serves_hits_and_invalidates_on_writes():
+    repo = FakeGroceryListRepository()
+    cached_repo = CachedRepository(repo, EntityCache())
+    grocery_list = cached_repo.add(GroceryList("Groceries"))
+
+    assert cached_repo.get_by_id(grocery_list.id) is grocery_list
+    repo.grocery_lists.clear()
+    # served from the cache even though the backing store no longer has it
+    assert cached_repo.get_by_id(grocery_list.id) is grocery_list
+
+    cached_repo.update(grocery_list)
+    assert cached_repo.get_by_id(grocery_list.id) is None
+    assert cached_repo.cache.stats()["hits"] == 1
+
+
+def test_cache_drops_values_loaded_before_an_invalidation():
+    cache = EntityCache()
+    generation = cache.generation(1)
+    cache.invalidate(1)
+    cache.set(1, "stale", generation)
+    assert cache.get(1) is None
+
+    generation = cache.generation(1)
+    cache.clear()
+    cache.set(1, "stale", generation)
+    assert cache.get(1) is None
+
+    cache.set(1, "fresh", cache.generation(1))
+    assert cache.get(1) == "fresh"
+
+
+def test_cached_repository_does_not_cache_a_read_raced_by_a_write():
+    repo = FakeGroceryListRepository()
+    cached_repo = CachedRepository(repo, EntityCache())
+    grocery_list = cached_repo.add(GroceryList("Groceries"))
+    read = repo.get_by_id
+
+    def read_then_write(entity_id, load=None):
+        entity = read(entity_id, load)
+        # another request commits a write after the SELECT
+        cached_repo.invalidate(entity_id)
+        return entity
+
+    repo.get_by_id = read_then_write
+    cached_repo.get_by_id(grocery_list.id)
+
+    assert cached_repo.cache.stats()["size"] == 0
+
+
+def test_single_flight_shares_a_call_in_flight():
+    flight = SingleFlight(window=0)
+    started, release = threading.Event(), threading.Event()
+    calls, results = [], []
+
+    def read():
+        calls.append(1)
+        started.set()
+        release.wait()
+        return "document"
+
+    leader = threading.Thread(
+        target=lambda: results.append(flight.do((1, "document"), read))
+    )
+    leader.start()
+    started.wait()
+    follower = threading.Thread(
+        target=lambda: results.append(flight.do((1, "document"), read))
+    )
+    follower.start()
+    release.set()
+    leader.join()
+    follower.join()
+
+    assert results == ["document", "document"]
+    assert len(calls) == 1
+    assert flight.stats() == {"calls": 1, "shared": 1}
+
+
+def test_single_flight_reuses_results_within_the_window():
+    clock = FakeClock()
+    flight = SingleFlight(window=0.05, clock=clock)
+    values = iter(["first", "second"])
+
+    assert flight.do((1, "version"), lambda: next(values)) == "first"
+    clock.now = 0.04
+    assert flight.do((1, "version"), lambda: next(values)) == "first"
+    clock.now = 0.05
+    assert flight.do((1, "version"), lambda: next(values)) == "second"
+
+
+def test_single_flight_forgets_the_reads_of_an_invalidated_entity():
+    flight = SingleFlight(window=60)
+    flight.do((1, "version"), lambda: "old")
+    flight.do((2, "version"), lambda: "other")
+
+    flight.forget(1)
+    assert flight.do((1, "version"), lambda: "new") == "new"
+    assert flight.do((2, "version"), lambda: "unused") == "other"
+
+    flight.forget(INVALIDATE_ALL)
+    assert flight.do((2, "version"), lambda: "new") == "new"
+
+
+def test_single_flight_does_not_keep_a_result_forgotten_in_flight():
+    flight = SingleFlight(window=60)
+
+    def read():
+        # A write to the list commits while it is being read
+        flight.forget(1)
+        return "stale"
+
+    assert flight.do((1, "document"), read) == "stale"
+    assert flight.do((1, "document"), lambda: "fresh") == "fresh"
+
+
+def test_single_flight_does_not_keep_errors():
+    flight = SingleFlight(window=60)
+
+    def fail():
+        raise RuntimeError("database is down")
+
+    with pytest.raises(RuntimeError):
+        flight.do((1, "version"), fail)
+    assert flight.do((1, "version"), lambda: "ok") == "ok"
+
+
+def test_cache_listeners_see_local_and_remote_invalidations():
+    channel = InProcessInvalidationChannel()
+    worker_a = EntityCache(channel=channel, namespace="grocery_lists")
+    worker_b = EntityCache(channel=channel, namespace="grocery_lists")
+    invalidated = []
+    worker_b.add_listener(invalidated.append)
+
+    worker_b.invalidate(1)
+    worker_a.invalidate(2)
+    worker_a.clear()
+
+    # worker_b also receives its own invalidation back from the channel
+    assert invalidated == [1, 1, 2, INVALIDATE_ALL]
@@ -0,0 +1,98 @@
+import pytest
+
+from adapters.database import TimedQueuePool, engine_options
+from config import (
+    ConfigError,
+    DatabaseConfig,
+    get_database_config,
+    get_server_config,
+)
+from sqlalchemy.pool import NullPool
+
+POSTGRES_URL = "postgresql://user:secret@db:5432/grocery"
+
+
+def test_defaults_are_valid():
+    database_config = get_database_config({"DATABASE_URL": POSTGRES_URL})
+
+    assert database_config.uri == POSTGRES_URL
+    assert database_config.pool_size == 10
+    assert database_config.pool_pre_ping is True
+
+
+def test_database_uri_is_built_from_the_given_environment():
+    database_config = get_database_config(
+        {"DB_HOST": "db", "DB_USER": "user", "DB_PASSWORD": "secret"}
+    )
+
+    assert database_config.uri == POSTGRES_URL
+
+
+def test_environment_overrides_config_file(tmp_path):
+    config_file = tmp_path / "database.env"
+    config_file.write_text(
+        "# pool settings\nDB_POOL_SIZE=4\nDB_APPLICATION_NAME='worker'\n"
+    )
+
+    database_config = get_database_config(
+        {"DB_CONFIG_FILE": str(config_file), "DB_POOL_SIZE": "8"}
+    )
+
+    assert database_config.pool_size == 8
+    assert database_config.application_name == "worker"
+
+
+@pytest.mark.parametrize(
+    "environ",
+    [
+        {"DB_POOL_SIZE": "many"},
+        {"DB_POOL_SIZE": "0"},
+        {"DB_MAX_OVERFLOW": "-1"},
+        {"DB_POOL_PRE_PING": "maybe"},
+        {"DB_STATEMENT_TIMEOUT": "-5"},
+    ],
+)
+def test_invalid_settings_are_rejected(environ):
+    with pytest.raises(ConfigError):
+        get_database_config(environ)
+
+
+def test_engine_options_for_postgres():
+    options = engine_options(
+        DatabaseConfig(uri=POSTGRES_URL, statement_timeout=5000)
+    )
+
+    assert options["poolclass"] is TimedQueuePool
+    assert options["pool_size"] == 10
+    assert options["connect_args"] == {
+        "application_name": "grocery-app-backend",
+        "options": "-c statement_timeout=5000",
+    }
+
+
+def test_engine_options_for_pgbouncer_disable_client_pooling():
+    options = engine_options(
+        DatabaseConfig(
+            uri="postgresql+asyncpg://user@db/grocery", pgbouncer=True
+        )
+    )
+
+    assert options["poolclass"] is NullPool
+    assert options["connect_args"]["statement_cache_size"] == 0
+    assert options["connect_args"]["prepared_statement_cache_size"] == 0
+
+
+def test_server_workers_default_to_cpu_cores(monkeypatch):
+    monkeypatch.setattr("os.cpu_count", lambda: 4)
+
+    assert get_server_config({}).worker_count() == 4
+    assert get_server_config({"WEB_CONCURRENCY": "3"}).worker_count() == 3
+
+
+@pytest.mark.parametrize(
+    "environ",
+    [{"SERVER_THREADS": "0"}, {"SERVER_KEEPALIVE": "-1"}, {"SERVER_BIND": ""}],
+)
+def test_invalid_server_settings_are_rejected(environ):
+    with pytest.raises(ConfigError):
+        get_server_config(environ)
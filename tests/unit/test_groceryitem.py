@@ -1,4 +1,4 @@
-from domain.models import GroceryItem, ItemStatus
+from domain.models import GroceryItem, GroceryList, ItemStatus
 
 
 def test_marked_as_purchased():
@@ -16,3 +16,22 @@ def test_marked_as_pending():
     assert apples.status is ItemStatus.PURCHASED
     apples.mark_as_pending()
     assert apples.status is ItemStatus.PENDING
+
+
+def test_pending_and_purchased_items_from_repository():
+    class FilteringRepository:
+        def __init__(self):
+            self.filters = None
+
+        def find_by(self, **filters):
+            self.filters = filters
+            return []
+
+    groceries = GroceryList("Groceries")
+    groceries.id = 1
+    repo = FilteringRepository()
+
+    assert groceries.get_pending_items(repo) == []
+    assert repo.filters == {"grocery_list_id": 1, "status": ItemStatus.PENDING}
+    groceries.get_purchased_items(repo)
+    assert repo.filters["status"] is ItemStatus.PURCHASED
@@ -0,0 +1,67 @@
+from adapters.instrumentation import (
+    RequestTimings,
+    current_timings,
+    end_request,
+    parameter_shape,
+    start_request,
+    timed,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_durations_split_request_time_between_db_serialize_and_orm():
+    clock = FakeClock()
+    timings = RequestTimings(clock=clock)
+    timings.add_query(0.002)
+    timings.add_query(0.003)
+    timings.add_phase("serialize", 0.004)
+    clock.now = 0.020
+    timings.finish()
+
+    assert timings.statements == 2
+    assert timings.as_fields() == {
+        "statements": 2,
+        "db_ms": 5.0,
+        "serialize_ms": 4.0,
+        "orm_ms": 11.0,
+        "total_ms": 20.0,
+    }
+    assert timings.server_timing() == (
+        'db;dur=5.00;desc="2 statements", serialize;dur=4.00, '
+        "orm;dur=11.00, total;dur=20.00"
+    )
+
+
+def test_sql_inside_a_phase_is_reported_as_db_time():
+    timings = start_request()
+    try:
+        with timed("serialize"):
+            timings.add_query(0.5)
+    finally:
+        end_request()
+
+    assert timings.durations()["db"] == 0.5
+    assert timings.durations()["serialize"] < 0.5
+
+
+def test_timed_is_a_no_op_outside_a_request():
+    with timed("serialize"):
+        pass
+
+    assert current_timings() is None
+
+
+def test_parameter_shape_hides_values():
+    assert parameter_shape({"id": 1, "name": "Milk"}) == {
+        "id": "int",
+        "name": "str",
+    }
+    assert parameter_shape((1, "Milk")) == ("int", "str")
+    assert parameter_shape([(1,), (2,)]) == "2 x ('int',)"
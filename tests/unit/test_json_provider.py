@@ -0,0 +1,36 @@
+import json
+
+import pytest
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from domain.models import GroceryItem
+from entrypoints.json_provider import make_json_provider
+
+
+def test_std_backend_uses_flask_default_provider():
+    provider = make_json_provider(Flask(__name__), "std")
+
+    assert type(provider) is DefaultJSONProvider
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        make_json_provider(Flask(__name__), "simdjson")
+
+
+def test_orjson_backend_matches_std_output():
+    pytest.importorskip("orjson")
+    app = Flask(__name__)
+    item = GroceryItem("Apples", 3)
+    item.id = 1
+    item.mark_as_purchased()
+    payload = {"items": [item.to_dict()], "next_cursor": None}
+
+    with app.app_context():
+        fast = make_json_provider(app, "orjson").response(payload)
+        std = make_json_provider(app, "std").response(payload)
+
+    assert fast.mimetype == "application/json"
+    assert fast.get_data() == std.get_data()
+    assert json.loads(fast.get_data()) == payload
@@ -1,7 +1,24 @@
+import json
+from datetime import datetime
+
 from adapters.repository import AbstractRepository
-from service_layer.services import GroceryListService
+from service_layer.services import GroceryListService, GroceryItemService
+from service_layer.unit_of_work import AbstractUnitOfWork
 from typing import List, Optional
-from domain.models import GroceryList
+from domain.models import GroceryList, GroceryItem, ItemStatus
+
+
+def _bulk_update(entities, values, ids, filters):
+    updated = []
+    for entity in entities:
+        if ids is not None and entity.id not in ids:
+            continue
+        if not all(getattr(entity, k) == v for k, v in filters.items()):
+            continue
+        for field, value in values.items():
+            setattr(entity, field, value)
+        updated.append(entity)
+    return updated
 
 
 class FakeGroceryListRepository(AbstractRepository[GroceryList]):
@@ -22,16 +39,58 @@ class FakeGroceryListRepository(AbstractRepository[GroceryList]):
         self.grocery_lists.append(entity)
         return entity
 
-    def get_by_id(self, entity_id: int) -> Optional[GroceryList]:
+    def add_all(self, entities: List[GroceryList]) -> List[GroceryList]:
+        """Add several grocery lists to the repository."""
+        return [self.add(entity) for entity in entities]
+
+    def get_by_id(
+        self, entity_id: int, load: Optional[dict] = None
+    ) -> Optional[GroceryList]:
         """Retrieve a grocery list by its ID."""
         return next(
             (gl for gl in self.grocery_lists if gl.id == entity_id), None
         )
 
-    def get_all(self) -> List[GroceryList]:
+    def get_all(self, load: Optional[dict] = None) -> List[GroceryList]:
         """Retrieve all grocery lists from the repository."""
         return self.grocery_lists.copy()
 
+    def get_page(
+        self,
+        limit: int,
+        after: Optional[int] = None,
+        load: Optional[dict] = None,
+        **filters,
+    ) -> List[GroceryList]:
+        """Retrieve a page of grocery lists ordered by ID."""
+        matching = [
+            gl
+            for gl in sorted(self.grocery_lists, key=lambda gl: gl.id)
+            if (after is None or gl.id > after)
+            and all(getattr(gl, k) == v for k, v in filters.items())
+        ]
+        return matching[:limit]
+
+    def find_by(
+        self, load: Optional[dict] = None, **filters
+    ) -> List[GroceryList]:
+        """Retrieve all grocery lists matching the filters."""
+        return self.get_page(len(self.grocery_lists), **filters)
+
+    def get_json(self, entity_id: int) -> Optional[bytes]:
+        """JSON document of a grocery list."""
+        grocery_list = self.get_by_id(entity_id)
+        return (
+            json.dumps(grocery_list.to_dict()).encode()
+            if grocery_list
+            else None
+        )
+
+    def get_version(self, entity_id: int) -> Optional[tuple]:
+        """Fingerprint of a grocery list."""
+        grocery_list = self.get_by_id(entity_id)
+        return (grocery_list.updated_at,) if grocery_list else None
+
     def update(self, entity: GroceryList) -> GroceryList:
         """Update an existing grocery list in the repository."""
         existing = self.get_by_id(entity.id)
@@ -42,6 +101,12 @@ class FakeGroceryListRepository(AbstractRepository[GroceryList]):
             return existing
         return entity
 
+    def bulk_update(
+        self, values: dict, ids: Optional[List[int]] = None, **filters
+    ) -> List[GroceryList]:
+        """Set values on every matching grocery list."""
+        return _bulk_update(self.grocery_lists, values, ids, filters)
+
     def delete_by_id(self, entity_id: int) -> bool:
         """Delete a grocery list by its ID. Returns True if successful."""
         grocery_list = self.get_by_id(entity_id)
@@ -51,7 +116,86 @@ class FakeGroceryListRepository(AbstractRepository[GroceryList]):
         return False
 
 
-# TODO: FakeGroceryItemRepository
+class FakeGroceryItemRepository(AbstractRepository[GroceryItem]):
+    """In-memory implementation to simulate the GroceryItem repository."""
+
+    def __init__(self, grocery_items: List[GroceryItem] = None):
+        self.grocery_items = grocery_items or []
+        self._next_id = 1
+
+    def add(self, entity: GroceryItem) -> GroceryItem:
+        """Add a new grocery item to the repository."""
+        entity.id = self._next_id
+        self._next_id += 1
+        self.grocery_items.append(entity)
+        return entity
+
+    def add_all(self, entities: List[GroceryItem]) -> List[GroceryItem]:
+        """Add several grocery items to the repository."""
+        return [self.add(entity) for entity in entities]
+
+    def get_by_id(
+        self, entity_id: int, load: Optional[dict] = None
+    ) -> Optional[GroceryItem]:
+        """Retrieve a grocery item by its ID."""
+        return next(
+            (item for item in self.grocery_items if item.id == entity_id),
+            None,
+        )
+
+    def get_all(self, load: Optional[dict] = None) -> List[GroceryItem]:
+        """Retrieve all grocery items from the repository."""
+        return self.grocery_items.copy()
+
+    def get_page(
+        self,
+        limit: int,
+        after: Optional[int] = None,
+        load: Optional[dict] = None,
+        **filters,
+    ) -> List[GroceryItem]:
+        """Retrieve a page of grocery items ordered by ID."""
+        matching = [
+            item
+            for item in sorted(self.grocery_items, key=lambda i: i.id)
+            if (after is None or item.id > after)
+            and all(getattr(item, k) == v for k, v in filters.items())
+        ]
+        return matching[:limit]
+
+    def find_by(
+        self, load: Optional[dict] = None, **filters
+    ) -> List[GroceryItem]:
+        """Retrieve all grocery items matching the filters."""
+        return self.get_page(len(self.grocery_items), **filters)
+
+    def get_json(self, entity_id: int) -> Optional[bytes]:
+        """JSON document of a grocery item."""
+        item = self.get_by_id(entity_id)
+        return json.dumps(item.to_dict()).encode() if item else None
+
+    def get_version(self, entity_id: int) -> Optional[tuple]:
+        """Fingerprint of a grocery item."""
+        item = self.get_by_id(entity_id)
+        return (item.updated_at,) if item else None
+
+    def update(self, entity: GroceryItem) -> GroceryItem:
+        """Update an existing grocery item in the repository."""
+        return entity
+
+    def bulk_update(
+        self, values: dict, ids: Optional[List[int]] = None, **filters
+    ) -> List[GroceryItem]:
+        """Set values on every matching grocery item."""
+        return _bulk_update(self.grocery_items, values, ids, filters)
+
+    def delete_by_id(self, entity_id: int) -> bool:
+        """Delete a grocery item by its ID. Returns True if successful."""
+        item = self.get_by_id(entity_id)
+        if item:
+            self.grocery_items.remove(item)
+            return True
+        return False
 
 
 # Test cases for GroceryListService
@@ -127,4 +271,185 @@ def test_delete_grocery_list():
     assert retrieved_list is None
 
 
-# TODO: Implement GroceryItemService Tests
+def test_get_grocery_lists_page():
+    """Test keyset pagination over grocery lists."""
+    repo = FakeGroceryListRepository()
+    grocery_list_service = GroceryListService(repo)
+    for i in range(5):
+        grocery_list_service.create_grocery_list(f"List {i}")
+
+    first_page = grocery_list_service.get_grocery_lists_page(limit=2)
+    assert [gl.id for gl in first_page["grocery_lists"]] == [1, 2]
+    assert first_page["next_cursor"] == 2
+
+    second_page = grocery_list_service.get_grocery_lists_page(
+        limit=2, after=first_page["next_cursor"]
+    )
+    assert [gl.id for gl in second_page["grocery_lists"]] == [3, 4]
+
+    last_page = grocery_list_service.get_grocery_lists_page(
+        limit=2, after=second_page["next_cursor"]
+    )
+    assert [gl.id for gl in last_page["grocery_lists"]] == [5]
+    assert last_page["next_cursor"] is None
+
+
+# Test cases for GroceryItemService
+class FakeUnitOfWork(AbstractUnitOfWork):
+    """In-memory unit of work over the fake repositories."""
+
+    def __init__(self):
+        self.grocery_lists = FakeGroceryListRepository()
+        self.grocery_items = FakeGroceryItemRepository()
+        self.committed = False
+
+    def commit(self) -> None:
+        self.committed = True
+
+    def rollback(self) -> None:
+        pass
+
+
+def make_item_service():
+    grocery_list_repo = FakeGroceryListRepository()
+    grocery_item_repo = FakeGroceryItemRepository()
+    service = GroceryItemService(grocery_item_repo, grocery_list_repo)
+    grocery_list = GroceryListService(grocery_list_repo).create_grocery_list(
+        "Test Shopping List"
+    )
+    return service, grocery_list
+
+
+def test_add_items_bulk():
+    """Test adding several items to a grocery list at once."""
+    service, grocery_list = make_item_service()
+
+    items = service.add_items_bulk(
+        grocery_list.id,
+        [{"name": "Apples", "quantity": 3}, {"name": "Bread"}],
+    )
+
+    assert [item.name for item in items] == ["Apples", "Bread"]
+    assert [item.quantity for item in items] == [3, 1]
+    assert all(item.grocery_list_id == grocery_list.id for item in items)
+
+
+def test_add_items_bulk_to_missing_list():
+    """Test that a bulk add to an unknown list adds nothing."""
+    service, _ = make_item_service()
+
+    assert service.add_items_bulk(999, [{"name": "Apples"}]) is None
+    assert service.grocery_item_repo.get_all() == []
+
+
+def test_mark_items_as_purchased_by_ids():
+    """Test marking selected items of a list as purchased."""
+    service, grocery_list = make_item_service()
+    apples, bread, milk = service.add_items_bulk(
+        grocery_list.id,
+        [{"name": "Apples"}, {"name": "Bread"}, {"name": "Milk"}],
+    )
+
+    purchased = service.mark_items_as_purchased(
+        grocery_list.id, [apples.id, milk.id]
+    )
+
+    assert [item.id for item in purchased] == [apples.id, milk.id]
+    assert all(item.purchased_at is not None for item in purchased)
+    assert bread.status is ItemStatus.PENDING
+
+
+def test_mark_all_items_as_purchased_and_pending():
+    """Test toggling every item of a list in one call."""
+    service, grocery_list = make_item_service()
+    service.add_items_bulk(
+        grocery_list.id, [{"name": "Apples"}, {"name": "Bread"}]
+    )
+
+    purchased = service.mark_items_as_purchased(grocery_list.id)
+    assert len(purchased) == 2
+    assert service.mark_items_as_purchased(grocery_list.id) == []
+
+    pending = service.mark_items_as_pending(grocery_list.id)
+    assert len(pending) == 2
+    assert all(item.purchased_at is None for item in pending)
+
+
+def test_mark_items_as_purchased_on_missing_list():
+    """Test that a bulk status change on an unknown list returns None."""
+    service, _ = make_item_service()
+
+    assert service.mark_items_as_purchased(999) is None
+
+
+def test_update_and_toggle_single_item():
+    """Test single-item updates go through the repository's update path."""
+    service, grocery_list = make_item_service()
+    (apples,) = service.add_items_bulk(grocery_list.id, [{"name": "Apples"}])
+
+    updated = service.update_item(apples.id, quantity=4)
+    assert updated.quantity == 4
+    assert updated.name == "Apples"
+
+    purchased = service.mark_item_as_purchased(apples.id)
+    assert purchased.status is ItemStatus.PURCHASED
+    assert purchased.purchased_at == purchased.updated_at
+
+    pending = service.mark_item_as_pending(apples.id)
+    assert pending.status is ItemStatus.PENDING
+    assert pending.purchased_at is None
+
+    assert service.mark_item_as_purchased(999) is None
+
+
+def test_get_items_by_list_filtered_by_status():
+    """Test filtering a list's items by status."""
+    service, grocery_list = make_item_service()
+    apples, bread = service.add_items_bulk(
+        grocery_list.id, [{"name": "Apples"}, {"name": "Bread"}]
+    )
+    service.mark_item_as_purchased(apples.id)
+
+    pending = service.get_items_by_list(
+        grocery_list.id, status=ItemStatus.PENDING
+    )
+    purchased = service.get_items_by_list(
+        grocery_list.id, limit=10, status=ItemStatus.PURCHASED
+    )
+
+    assert [item.id for item in pending["items"]] == [bread.id]
+    assert [item.id for item in purchased["items"]] == [apples.id]
+
+
+def test_services_run_in_a_unit_of_work():
+    """Test that services work on the unit of work's repositories."""
+    with FakeUnitOfWork() as uow:
+        grocery_list = GroceryListService(
+            uow.grocery_lists
+        ).create_grocery_list("Weekly")
+        item = GroceryItemService(
+            uow.grocery_items, uow.grocery_lists
+        ).add_item_to_list(grocery_list.id, "Milk")
+        uow.commit()
+
+    assert uow.committed
+    assert uow.grocery_items.get_by_id(item.id) is item
+
+
+def test_item_changes_move_their_list_forward():
+    """Test that adding, changing and deleting items touches their list."""
+    service, grocery_list = make_item_service()
+    past = datetime(2000, 1, 1)
+
+    grocery_list.updated_at = past
+    (apples,) = service.add_items_bulk(grocery_list.id, [{"name": "Apples"}])
+    assert grocery_list.updated_at == apples.updated_at
+
+    grocery_list.updated_at = past
+    purchased = service.mark_item_as_purchased(apples.id)
+    assert grocery_list.updated_at == purchased.updated_at
+
+    grocery_list.updated_at = past
+    assert service.delete_item(apples.id)
+    assert grocery_list.updated_at > past
+    assert not service.delete_item(apples.id)
@@ -0,0 +1,80 @@
+from datetime import datetime
+
+import pytest
+
+from domain.models import ItemStatus
+from service_layer.write_buffer import StatusWriteBuffer
+from tests.unit.test_services import make_item_service
+
+
+def make_buffer(**options):
+    """A buffer applying its batches to in-memory items, recording them."""
+    service, grocery_list = make_item_service()
+    items = service.add_items_bulk(
+        grocery_list.id, [{"name": "Apples"}, {"name": "Bread"}]
+    )
+    batches = []
+
+    def apply_batch(changes_by_item):
+        batches.append((datetime.now(), changes_by_item))
+        return service.apply_item_changes(changes_by_item)
+
+    return StatusWriteBuffer(apply_batch, **options), items, batches
+
+
+def test_toggles_are_committed_in_one_batch_last_write_winning():
+    buffer, (apples, bread), batches = make_buffer(interval=60, max_batch=2)
+
+    first = buffer.submit(apples.id, purchased=True)
+    second = buffer.submit(apples.id, purchased=False)
+    other = buffer.submit(bread.id, purchased=True)
+
+    assert first.result(timeout=5) is second.result(timeout=5)
+    assert second.result().status is ItemStatus.PENDING
+    assert second.result().purchased_at is None
+    assert other.result(timeout=5).status is ItemStatus.PURCHASED
+    assert len(batches) == 1
+    assert buffer.stats() == {"toggles": 3, "batches": 1, "coalesced": 1}
+
+
+def test_purchased_at_is_the_time_of_the_toggle_updated_at_of_the_batch():
+    buffer, (apples, _), batches = make_buffer(interval=0.02)
+
+    queued_at = datetime.now()
+    item = buffer.submit(apples.id, purchased=True).result(timeout=5)
+
+    ((applied_at, _),) = batches
+    assert queued_at <= item.purchased_at < applied_at
+    assert item.updated_at >= applied_at
+
+
+def test_missing_items_resolve_to_none():
+    buffer, _, _ = make_buffer(interval=0)
+
+    assert buffer.submit(999, purchased=True).result(timeout=5) is None
+
+
+def test_failed_batch_fails_every_waiting_toggle():
+    def apply_batch(changes_by_item):
+        raise RuntimeError("database is down")
+
+    buffer = StatusWriteBuffer(apply_batch, interval=60, max_batch=2)
+    futures = [buffer.submit(1, True), buffer.submit(2, False)]
+
+    for future in futures:
+        with pytest.raises(RuntimeError):
+            future.result(timeout=5)
+
+
+def test_flusher_survives_a_failing_batch():
+    results = iter([None, {1: "item"}])
+
+    def apply_batch(changes_by_item):
+        # The first batch returns garbage, failing after apply_batch
+        return next(results)
+
+    buffer = StatusWriteBuffer(apply_batch, interval=0)
+
+    with pytest.raises(AttributeError):
+        buffer.submit(1, True).result(timeout=5)
+    assert buffer.submit(1, True).result(timeout=5) == "item"